@@ -11,159 +11,429 @@ import argparse
 import importlib
 import importlib.util
 import shutil
+import email.utils
+import http.client
 import http.server
-import socketserver
-import urllib.request
+import mimetypes
+import queue
+import signal
+import socket
+import time
+import urllib.parse
 from urllib.parse import urlparse
 import tempfile
-import boto3
 from datetime import datetime, timedelta
 
 
-def run_static_server(static_url, static_dir, port=8080):
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# これ以上のサイズのファイルはsendfileでゼロコピー送信する
+SENDFILE_THRESHOLD = 64 * 1024
+
+# Accept-Encodingに応じて配信する事前圧縮ファイル（優先順）
+PRECOMPRESSED_VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFileHandler(http.server.BaseHTTPRequestHandler):
+  """
+  静的ファイルを配信するリクエストハンドラー
+
+  ETag/Last-Modifiedによる条件付きリクエスト（304）、Rangeリクエスト（206）、
+  事前圧縮ファイル（.br/.gz）の配信、大きなファイルのsendfile送信に対応します。
+  static_url, static_dir, max_age, quiet はサブクラスで設定します。
+  """
+  protocol_version = 'HTTP/1.1'
+  static_url = '/static'
+  static_dir = 'static'
+  max_age = 0
+  quiet = False
+
+  def log_message(self, format, *args):
+    if not self.quiet:
+      super().log_message(format, *args)
+
+  def do_GET(self):
+    self._serve_static()
+
+  def do_HEAD(self):
+    self._serve_static()
+
+  def _resolve_static_path(self):
+    """URLパスを静的ディレクトリ内のファイルパスに変換（ディレクトリ外はNone）"""
+    url_path = urllib.parse.unquote(urlparse(self.path).path)
+    relative = url_path[len(self.static_url):]
+    if not url_path.startswith(self.static_url) or (relative and not relative.startswith('/')):
+      return None
+    relative = relative.lstrip('/')
+    root = os.path.realpath(self.static_dir)
+    full_path = os.path.realpath(os.path.join(root, relative))
+    if full_path != root and not full_path.startswith(root + os.sep):
+      return None
+    return full_path
+
+  def _accepted_encodings(self):
+    """Accept-Encodingヘッダーから受け入れ可能なエンコーディングを取得"""
+    accepted = set()
+    for item in self.headers.get('Accept-Encoding', '').split(','):
+      params = item.strip().split(';')
+      encoding = params[0].strip().lower()
+      quality = 1.0
+      for param in params[1:]:
+        key, _, value = param.strip().partition('=')
+        if key == 'q':
+          try:
+            quality = float(value)
+          except ValueError:
+            quality = 0.0
+      if encoding and quality > 0:
+        accepted.add(encoding)
+    return accepted
+
+  def _select_variant(self, path, stat):
+    """事前圧縮ファイルが存在し受け入れ可能ならそれを選択。(パス, stat, エンコーディング)を返す"""
+    accepted = self._accepted_encodings()
+    for encoding, suffix in PRECOMPRESSED_VARIANTS:
+      if encoding not in accepted:
+        continue
+      try:
+        variant_stat = os.stat(path + suffix)
+      except OSError:
+        continue
+      # 元ファイルより古い圧縮ファイルは使わない
+      if variant_stat.st_mtime >= stat.st_mtime:
+        return path + suffix, variant_stat, encoding
+    return path, stat, None
+
+  def _is_not_modified(self, etag, mtime):
+    """If-None-Match / If-Modified-Since を評価"""
+    if_none_match = self.headers.get('If-None-Match')
+    if if_none_match is not None:
+      candidates = [tag.strip() for tag in if_none_match.split(',')]
+      return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+    if_modified_since = self.headers.get('If-Modified-Since')
+    if if_modified_since:
+      try:
+        since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+      except (TypeError, ValueError):
+        return False
+      return int(mtime) <= since
+    return False
+
+  def _parse_range(self, size, etag, mtime):
+    """
+    Rangeヘッダーを解析
+
+    Returns:
+      None: Rangeなし（全体を返す）
+      (start, end): 単一の範囲
+      False: 範囲が満たせない（416）
+    """
+    range_header = self.headers.get('Range')
+    if not range_header or not range_header.startswith('bytes='):
+      return None
+    if_range = self.headers.get('If-Range')
+    if if_range and if_range != etag and if_range != email.utils.formatdate(mtime, usegmt=True):
+      return None
+    ranges = range_header[len('bytes='):].split(',')
+    # 複数範囲には対応せず全体を返す
+    if len(ranges) != 1:
+      return None
+    start_str, _, end_str = ranges[0].strip().partition('-')
+    try:
+      if start_str:
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+      else:
+        suffix_length = int(end_str)
+        if suffix_length == 0:
+          return False
+        start = max(size - suffix_length, 0)
+        end = size - 1
+    except ValueError:
+      return None
+    if start >= size or start > end:
+      return False
+    return start, min(end, size - 1)
+
+  def _serve_static(self):
+    path = self._resolve_static_path()
+    if path is None:
+      self.send_error(403, "Forbidden")
+      return
+    try:
+      stat = os.stat(path)
+    except OSError:
+      stat = None
+    if stat is None or not os.path.isfile(path):
+      self.send_error(404, "File Not Found")
+      return
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    path, stat, encoding = self._select_variant(path, stat)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+    last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+
+    if self._is_not_modified(etag, stat.st_mtime):
+      self.send_response(304)
+      self._send_cache_headers(etag, last_modified)
+      self.end_headers()
+      return
+
+    size = stat.st_size
+    byte_range = self._parse_range(size, etag, stat.st_mtime)
+    if byte_range is False:
+      self.send_response(416)
+      self.send_header('Content-Range', f'bytes */{size}')
+      self.send_header('Content-Length', '0')
+      self.end_headers()
+      return
+
+    if byte_range is None:
+      start, end = 0, size - 1
+      self.send_response(200)
+    else:
+      start, end = byte_range
+      self.send_response(206)
+      self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+    length = end - start + 1 if size else 0
+
+    self.send_header('Content-Type', content_type)
+    self.send_header('Content-Length', str(length))
+    self.send_header('Accept-Ranges', 'bytes')
+    if encoding:
+      self.send_header('Content-Encoding', encoding)
+    self._send_cache_headers(etag, last_modified)
+    self.end_headers()
+
+    if self.command == 'HEAD' or length == 0:
+      return
+    with open(path, 'rb') as f:
+      self._send_file_range(f, start, length)
+
+  def _send_cache_headers(self, etag, last_modified):
+    self.send_header('ETag', etag)
+    self.send_header('Last-Modified', last_modified)
+    self.send_header('Cache-Control', f'public, max-age={self.max_age}')
+    self.send_header('Vary', 'Accept-Encoding')
+
+  def _send_file_range(self, f, offset, length):
+    """ファイルの指定範囲を送信（大きなファイルはsendfileでゼロコピー）"""
+    if length >= SENDFILE_THRESHOLD and hasattr(os, 'sendfile'):
+      self.wfile.flush()
+      out_fd = self.connection.fileno()
+      while length > 0:
+        sent = os.sendfile(out_fd, f.fileno(), offset, length)
+        if sent == 0:
+          break
+        offset += sent
+        length -= sent
+      return
+    f.seek(offset)
+    while length > 0:
+      chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+      if not chunk:
+        break
+      self.wfile.write(chunk)
+      length -= len(chunk)
+
+
+def run_static_server(static_url, static_dir, port=8080, max_age=0, quiet=False):
   """
   静的ファイルを提供するサーバーを実行します。
   
+  リクエストはスレッドごとに並行して処理されます。
+  
   Args:
       static_url: 静的ファイルのURLパス（例: '/static'）
       static_dir: 静的ファイルのディレクトリパス
       port: サーバーのポート番号（デフォルト: 8080）
+      max_age: Cache-Controlのmax-age秒数（デフォルト: 0）
+      quiet: Trueの場合、リクエストごとのログを出力しない
   """
-  class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    def translate_path(self, path):
-      if path.startswith(static_url):
-        return os.path.join(os.getcwd(), path[1:])
-      else:
-        return None
-        
-    def do_GET(self):
-      path = self.translate_path(self.path)
-      if path:
-        if os.path.exists(path) and os.path.isfile(path):
-          super().do_GET()
-        else:
-          self.send_error(404, "File Not Found")
-      else:
-        self.send_error(403, "Forbidden")
-        
-  with socketserver.TCPServer(("localhost", port), MyHTTPRequestHandler) as httpd:
-    print(f"静的ファイルサーバーを起動しました: http://localhost:{port}{static_url}")
-    httpd.serve_forever()
+  handler = type('StaticHandler', (StaticFileHandler,), {
+    'static_url': static_url.rstrip('/'),
+    'static_dir': static_dir,
+    'max_age': max_age,
+    'quiet': quiet,
+  })
+  httpd = http.server.ThreadingHTTPServer(("localhost", port), handler)
+  httpd.daemon_threads = True
+  print(f"静的ファイルサーバーを起動しました: http://localhost:{port}{static_url}")
+  httpd.serve_forever()
+
+# プロキシで転送しないホップバイホップヘッダー
+HOP_BY_HOP_HEADERS = frozenset([
+  'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+  'te', 'trailers', 'transfer-encoding', 'upgrade', 'host'
+])
+
+class UpstreamPool:
+  """
+  上流サーバーへのキープアライブ接続プール
 
-def run_proxy_server(static_url, port=8000, sam_port=3000, static_port=8080):
+  スレッド間で共有し、レスポンスを読み切った接続のみを再利用します。
+  """
+  def __init__(self, host, port, maxsize=16, timeout=60):
+    self.host = host
+    self.port = port
+    self.timeout = timeout
+    self._idle = queue.LifoQueue(maxsize)
+
+  def acquire(self):
+    """アイドル接続を取り出す（なければ新規作成）。(接続, 再利用かどうか)を返す"""
+    try:
+      return self._idle.get_nowait(), True
+    except queue.Empty:
+      return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+  def release(self, conn):
+    """接続をプールに戻す（満杯の場合は閉じる）"""
+    try:
+      self._idle.put_nowait(conn)
+    except queue.Full:
+      conn.close()
+
+
+def _iter_request_body(rfile, content_length):
+  """リクエストボディをチャンク単位で読み出すジェネレータ"""
+  remaining = content_length
+  while remaining > 0:
+    chunk = rfile.read(min(STREAM_CHUNK_SIZE, remaining))
+    if not chunk:
+      break
+    remaining -= len(chunk)
+    yield chunk
+
+
+def run_proxy_server(static_url, port=8000, sam_port=3000, static_port=8080, quiet=False, verbose=False):
   """
   リバースプロキシサーバーを実行します。
   
   静的ファイルリクエストは static_port に、その他のリクエストは sam_port に転送します。
+  リクエストはスレッドごとに並行して処理され、上流への接続はキープアライブでプールされます。
+  リクエスト・レスポンスのボディはメモリに溜めずにストリーミングで転送します。
   
   Args:
       static_url: 静的ファイルのURLパス（例: '/static'）
       port: プロキシサーバーのポート番号（デフォルト: 8000）
       sam_port: SAM Localサーバーのポート番号（デフォルト: 3000）
       static_port: 静的ファイルサーバーのポート番号（デフォルト: 8080）
+      quiet: Trueの場合、リクエストごとのログを出力しない
+      verbose: Trueの場合、リクエスト・レスポンスヘッダーも出力する
   """
+  pools = {
+    'static': UpstreamPool('localhost', static_port),
+    'sam': UpstreamPool('localhost', sam_port),
+  }
+
   class ReverseProxyHandler(http.server.BaseHTTPRequestHandler):
+    # クライアントとの接続もキープアライブにする
+    protocol_version = 'HTTP/1.1'
+
     def log_message(self, format, *args):
       """HTTPサーバーのログメッセージをカスタマイズ"""
-      print(f"[PROXY] {format % args}")
-    
+      if not quiet:
+        print(f"[PROXY] {format % args}")
+
+    def _forward_headers(self):
+      """上流に転送するリクエストヘッダーを作成"""
+      headers = {}
+      for header_name, header_value in self.headers.items():
+        if header_name.lower() not in HOP_BY_HOP_HEADERS:
+          headers[header_name] = header_value
+      return headers
+
+    def _send_upstream(self, pool, headers, content_length):
+      """上流にリクエストを送信してレスポンスを返す（古いキープアライブ接続は一度だけ再試行）"""
+      conn, reused = pool.acquire()
+      try:
+        body = _iter_request_body(self.rfile, content_length) if content_length > 0 else None
+        conn.request(self.command, self.path, body=body, headers=headers)
+        return conn, conn.getresponse()
+      except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+        conn.close()
+        # ボディを送信済みの可能性がある場合は再試行しない
+        if not reused or content_length > 0:
+          raise
+        conn = http.client.HTTPConnection(pool.host, pool.port, timeout=pool.timeout)
+        conn.request(self.command, self.path, headers=headers)
+        return conn, conn.getresponse()
+      except Exception:
+        conn.close()
+        raise
+
     def _handle_request(self):
       """すべてのHTTPメソッドを処理する汎用メソッド"""
       parsed_url = urlparse(self.path)
-      if parsed_url.path.startswith(static_url):
-        target_url = f'http://localhost:{static_port}{self.path}'
-      else:
-        target_url = f'http://localhost:{sam_port}{self.path}'
-      
-      print(f"[PROXY] {self.command} {self.path} -> {target_url}")
-      
-      # リクエストヘッダーをログ出力
-      print(f"[PROXY] Request headers:")
-      for header_name, header_value in self.headers.items():
-        print(f"[PROXY]   {header_name}: {header_value}")
-      
-      try:
-        # リクエストボディを読み取り
-        content_length = int(self.headers.get('Content-Length', 0))
-        request_body = self.rfile.read(content_length) if content_length > 0 else None
-        
-        if request_body:
-          print(f"[PROXY] Request body: {request_body.decode('utf-8', errors='ignore')[:200]}...")
-        
-        # リクエストを作成
-        req = urllib.request.Request(target_url, data=request_body, method=self.command)
-        
-        # ヘッダーをコピー（Hostヘッダーは除く）
-        copied_headers = []
+      pool = pools['static'] if parsed_url.path.startswith(static_url) else pools['sam']
+
+      if verbose:
+        print(f"[PROXY] {self.command} {self.path} -> http://{pool.host}:{pool.port}{self.path}")
         for header_name, header_value in self.headers.items():
-          if header_name.lower() not in ['host', 'connection']:
-            req.add_header(header_name, header_value)
-            copied_headers.append(f"{header_name}: {header_value}")
-        
-        print(f"[PROXY] Forwarded headers: {len(copied_headers)} headers")
-        
-        # リダイレクト無効化のカスタムErrorHandlerを作成
-        class NoRedirectErrorHandler(urllib.request.HTTPErrorProcessor):
-          def http_response(self, request, response):
-            # 3xxレスポンスでもエラーとして扱わない
-            return response
-          
-          def https_response(self, request, response):
-            return self.http_response(request, response)
-        
-        # カスタムopenerを作成（リダイレクト追跡なし）
-        opener = urllib.request.build_opener(NoRedirectErrorHandler)
-        opener.add_handler(urllib.request.HTTPHandler())
-        opener.add_handler(urllib.request.HTTPSHandler())
-        
-        # リクエストを送信
-        try:
-          response = opener.open(req)
-        except urllib.error.HTTPError as e:
-          # HTTPErrorも通常のレスポンスとして扱う（3xxリダイレクトのため）
-          response = e
-        
-        print(f"[PROXY] Response status: {response.status}")
-        self.send_response(response.status)
-        
-        # レスポンスヘッダーをログ出力
-        print(f"[PROXY] Response headers from SAM Local:")
-        for header_name, header_value in response.headers.items():
-          print(f"[PROXY]   {header_name}: {header_value}")
-        
-        # レスポンスヘッダーをコピー（Set-Cookieヘッダーを特別処理）
-        set_cookie_headers = []
-        forwarded_headers = []
-        for header_name, header_value in response.headers.items():
-          if header_name.lower() not in ['connection', 'transfer-encoding']:
-            if header_name.lower() == 'set-cookie':
-              set_cookie_headers.append(header_value)
-            else:
-              self.send_header(header_name, header_value)
-              forwarded_headers.append(f"{header_name}: {header_value}")
-        
-        print(f"[PROXY] Forwarded {len(forwarded_headers)} response headers")
-        
-        # 複数のSet-Cookieヘッダーを個別に送信
-        if set_cookie_headers:
-          print(f"[PROXY] Found {len(set_cookie_headers)} Set-Cookie headers:")
-          for i, cookie_header in enumerate(set_cookie_headers):
-            print(f"[PROXY]   Cookie {i+1}: {cookie_header}")
-            self.send_header('Set-Cookie', cookie_header)
+          print(f"[PROXY]   > {header_name}: {header_value}")
+
+      content_length = int(self.headers.get('Content-Length', 0))
+      headers = self._forward_headers()
+      if content_length > 0:
+        headers['Content-Length'] = str(content_length)
+
+      try:
+        conn, response = self._send_upstream(pool, headers, content_length)
+      except (OSError, http.client.HTTPException) as e:
+        self.send_error(502, f"Proxy error: {e}")
+        return
+
+      try:
+        self._relay_response(response)
+      except (BrokenPipeError, ConnectionResetError):
+        # クライアントが途中で切断した場合（ブラウザのリロードなど）はトレースバックを出さない
+        conn.close()
+        self.close_connection = True
+        if verbose:
+          print(f"[PROXY] client disconnected: {self.command} {self.path}")
+        return
+      except Exception:
+        conn.close()
+        self.close_connection = True
+        raise
+      if response.will_close:
+        conn.close()
+      else:
+        pool.release(conn)
+
+    def _relay_response(self, response):
+      """上流のレスポンスをクライアントにストリーミングで返す"""
+      # send_response_onlyはアクセスログを出力しないため、ここで出力する（--quietの場合はlog_messageで抑止）
+      self.log_request(response.status)
+      self.send_response_only(response.status, response.reason)
+      has_body = self.command != 'HEAD' and response.status not in (204, 304) and response.status >= 200
+      content_length = response.getheader('Content-Length')
+      # Content-Lengthがない場合（上流がchunked）は改めてchunkedで送る
+      chunked = has_body and content_length is None
+
+      for header_name, header_value in response.getheaders():
+        if header_name.lower() not in HOP_BY_HOP_HEADERS:
+          # Set-Cookieなど同名の複数ヘッダーもそのまま個別に送信される
+          self.send_header(header_name, header_value)
+          if verbose:
+            print(f"[PROXY]   < {header_name}: {header_value}")
+      if chunked:
+        self.send_header('Transfer-Encoding', 'chunked')
+      self.end_headers()
+
+      while has_body:
+        chunk = response.read1(STREAM_CHUNK_SIZE)
+        if not chunk:
+          break
+        if chunked:
+          self.wfile.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
         else:
-          print(f"[PROXY] No Set-Cookie headers found")
-        
-        self.end_headers()
-        
-        response_body = response.read()
-        print(f"[PROXY] Response body length: {len(response_body)} bytes")
-        self.wfile.write(response_body)
-          
-      except urllib.error.URLError as e:
-        self.send_error(500, str(e.reason))
-      except Exception as e:
-        self.send_error(500, f"Proxy error: {str(e)}")
-    
+          self.wfile.write(chunk)
+      if chunked:
+        self.wfile.write(b"0\r\n\r\n")
+      # レスポンスを完了状態にして接続を再利用可能にする
+      response.read()
+
     def do_GET(self):
       self._handle_request()
     
@@ -184,20 +454,185 @@ def run_proxy_server(static_url, port=8000, sam_port=3000, static_port=8080):
     
     def do_OPTIONS(self):
       self._handle_request()
-        
-  httpd = http.server.HTTPServer(('localhost', port), ReverseProxyHandler)
+
+  httpd = http.server.ThreadingHTTPServer(('localhost', port), ReverseProxyHandler)
+  httpd.daemon_threads = True
   print(f"プロキシサーバーを起動しました: http://localhost:{port}")
   print(f"- 静的ファイル ({static_url}*) は port {static_port} に転送")
   print(f"- その他のリクエストは port {sam_port} に転送")
   httpd.serve_forever()
 
+def _load_lambda_handler(lambda_dir):
+  """lambda_function.lambda_handlerをインポート（プロセスごとに一度だけ）"""
+  lambda_dir = os.path.abspath(lambda_dir)
+  if lambda_dir not in sys.path:
+    sys.path.insert(0, lambda_dir)
+  # ローカル環境として動作させる（Secure Cookieを付与しないなど）
+  os.environ.setdefault('AWS_SAM_LOCAL', 'true')
+  lambda_function = importlib.import_module('lambda_function')
+  return lambda_function.lambda_handler
+
+
+def _make_lambda_handler_class(lambda_handler, static_url, static_dir, quiet, memory_size):
+  """Lambdaハンドラーを呼び出すリクエストハンドラークラスを作成"""
+  from wambda.debug import create_event_from_http, response_to_http, LambdaContext
+
+  serve_static = static_dir is not None and os.path.isdir(static_dir)
+
+  class LambdaEmulatorHandler(StaticFileHandler):
+    def _dispatch(self):
+      if serve_static and urlparse(self.path).path.startswith(self.static_url + '/'):
+        if self.command in ('GET', 'HEAD'):
+          self._serve_static()
+        else:
+          self.send_error(405, "Method Not Allowed")
+        return
+      self._invoke_lambda()
+
+    def _invoke_lambda(self):
+      content_length = int(self.headers.get('Content-Length', 0))
+      body = self.rfile.read(content_length) if content_length > 0 else None
+      context = LambdaContext(memory_limit_in_mb=memory_size)
+      event = create_event_from_http(
+        self.command, self.path, self.headers.items(), body,
+        source_ip=self.client_address[0], request_id=context.aws_request_id
+      )
+      try:
+        response = lambda_handler(event, context)
+        status, header_items, response_body = response_to_http(response)
+      except Exception:
+        import traceback
+        traceback.print_exc()
+        status, header_items, response_body = 502, [('Content-Type', 'text/plain; charset=UTF-8')], b"Internal Lambda error"
+
+      self.send_response(status)
+      for name, value in header_items:
+        if name.lower() not in ('content-length', 'connection', 'transfer-encoding'):
+          self.send_header(name, value)
+      self.send_header('Content-Length', str(len(response_body)))
+      self.end_headers()
+      if self.command != 'HEAD':
+        self.wfile.write(response_body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = do_OPTIONS = _dispatch
+
+  return type('LambdaHandler', (LambdaEmulatorHandler,), {
+    'static_url': static_url.rstrip('/'),
+    'static_dir': static_dir,
+    'quiet': quiet,
+  })
+
+
+def _serve_lambda_forever(sock, lambda_dir, static_url, static_dir, quiet, memory_size):
+  """リッスン中のソケットでLambdaエミュレーターを実行"""
+  lambda_handler = _load_lambda_handler(lambda_dir)
+  handler_class = _make_lambda_handler_class(lambda_handler, static_url, static_dir, quiet, memory_size)
+  httpd = http.server.ThreadingHTTPServer(sock.getsockname()[:2], handler_class, bind_and_activate=False)
+  httpd.socket.close()
+  httpd.socket = sock
+  httpd.daemon_threads = True
+  httpd.serve_forever()
+
+
+def _snapshot_mtimes(directory):
+  """リロード判定用にディレクトリ内のソース・テンプレートの更新時刻を取得"""
+  mtimes = {}
+  for root, dirs, files in os.walk(directory):
+    dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+    for name in files:
+      if name.endswith(('.py', '.html', '.json')):
+        path = os.path.join(root, name)
+        try:
+          mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+          pass
+  return mtimes
+
+
+def run_lambda_server(lambda_dir, port=8000, static_url='/static', static_dir=None,
+                      workers=1, reload=False, quiet=False, memory_size=128):
+  """
+  lambda_handlerをプロセス内で直接呼び出すLambdaエミュレーターサーバーを実行します。
+  
+  HTTPリクエストをAPI Gatewayプロキシ形式のイベントに変換してlambda_handlerを呼び出します。
+  lambda_functionは各ワーカーで一度だけインポートされ、リクエスト間でウォーム状態が保持されます。
+  
+  Args:
+      lambda_dir: lambda_function.pyがあるディレクトリ
+      port: サーバーのポート番号（デフォルト: 8000）
+      static_url: 静的ファイルのURLパス（例: '/static'）
+      static_dir: 静的ファイルのディレクトリ（指定時は同じサーバーで配信）
+      workers: プリフォークするワーカープロセス数（デフォルト: 1）
+      reload: Trueの場合、ソース変更を検知してワーカーを再起動
+      quiet: Trueの場合、リクエストごとのログを出力しない
+      memory_size: コンテキストに設定するメモリサイズ（MB）
+  """
+  sock = socket.create_server(('localhost', port), backlog=128)
+  print(f"Lambdaエミュレーターを起動しました: http://localhost:{port}")
+
+  if workers <= 1 and not reload:
+    _serve_lambda_forever(sock, lambda_dir, static_url, static_dir, quiet, memory_size)
+    return
+
+  if not hasattr(os, 'fork'):
+    raise RuntimeError("--workers と --reload はfork可能なOSでのみ使用できます")
+
+  def spawn_workers():
+    pids = []
+    for _ in range(max(workers, 1)):
+      pid = os.fork()
+      if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+          _serve_lambda_forever(sock, lambda_dir, static_url, static_dir, quiet, memory_size)
+        finally:
+          os._exit(0)
+      pids.append(pid)
+    return pids
+
+  def stop_workers(pids):
+    for pid in pids:
+      try:
+        os.kill(pid, signal.SIGTERM)
+      except ProcessLookupError:
+        pass
+    for pid in pids:
+      try:
+        os.waitpid(pid, 0)
+      except ChildProcessError:
+        pass
+
+  # SIGTERMでもワーカーを停止してから終了する
+  signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+  pids = spawn_workers()
+  print(f"- ワーカー数: {len(pids)}{'（リロード有効）' if reload else ''}")
+  mtimes = _snapshot_mtimes(lambda_dir) if reload else None
+  try:
+    while True:
+      time.sleep(1)
+      if reload:
+        current = _snapshot_mtimes(lambda_dir)
+        if current != mtimes:
+          print("変更を検知しました。ワーカーを再起動します...")
+          mtimes = current
+          stop_workers(pids)
+          pids = spawn_workers()
+  finally:
+    stop_workers(pids)
+    sock.close()
+
 def print_usage():
   print("Usage: hads-admin <function>")
   print("Functions:")
   print("  init: create hads project")
   print("  proxy: run proxy server")
   print("  static: run static server")
+  print("  collectstatic: build hashed, precompressed static files and a manifest")
+  print("  deploy-static: upload changed static files to S3")
+  print("  serve: run lambda_handler in-process as a local HTTP server")
+  print("  cognito: run a local Cognito user pool emulator")
   print("  log: retrieve recent Lambda function logs from CloudWatch")
+  print("  analyze-bundle: report package sizes and unused dependencies in the sam build artifact")
 
 
 def init():
@@ -287,6 +722,8 @@ Run proxy server that forwards requests to SAM local API server and static file
   parser.add_argument("--static-port", type=int, default=8080, help="static file server port")
   parser.add_argument("--static-url", default="/static", help="static files URL prefix")
   parser.add_argument("-d", "--static-dir", default="static", help="static files directory")
+  parser.add_argument("-q", "--quiet", action="store_true", help="do not log each request")
+  parser.add_argument("-v", "--verbose", action="store_true", help="log request and response headers")
   parser.add_argument("function", metavar="function", help="function to run")
   options = parser.parse_args()
   
@@ -299,7 +736,9 @@ Run proxy server that forwards requests to SAM local API server and static file
       static_url=options.static_url,
       port=options.proxy_port,
       sam_port=options.sam_port,
-      static_port=options.static_port
+      static_port=options.static_port,
+      quiet=options.quiet,
+      verbose=options.verbose
     )
   except KeyboardInterrupt:
     print("\nProxy server stopped.")
@@ -315,6 +754,8 @@ Run static file server for local development.
   parser.add_argument("-p", "--port", type=int, default=8080, help="static file server port")
   parser.add_argument("--static-url", default="/static", help="static files URL prefix")
   parser.add_argument("-d", "--static-dir", default="static", help="static files directory")
+  parser.add_argument("--max-age", type=int, default=0, help="Cache-Control max-age in seconds")
+  parser.add_argument("-q", "--quiet", action="store_true", help="do not log each request")
   parser.add_argument("function", metavar="function", help="function to run")
   options = parser.parse_args()
   
@@ -332,7 +773,9 @@ Run static file server for local development.
     run_static_server(
       static_url=options.static_url,
       static_dir=options.static_dir,
-      port=options.port
+      port=options.port,
+      max_age=options.max_age,
+      quiet=options.quiet
     )
   except KeyboardInterrupt:
     print("\nStatic file server stopped.")
@@ -341,25 +784,324 @@ Run static file server for local development.
     sys.exit(1)
 
 
+def collectstatic():
+  parser = argparse.ArgumentParser(description="""\
+Build static files for deployment: copy them with content-hashed names,
+write precompressed .gz/.br variants and a manifest used by shortcuts.static().
+Unchanged files (same mtime and size as in the previous manifest) are reused.
+""", formatter_class = argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--version", action="version", version='%(prog)s 0.0.1')
+  parser.add_argument("-d", "--static-dir", default="static", help="static files directory")
+  parser.add_argument("-o", "--output-dir", default="staticfiles", help="output directory (upload this to S3)")
+  parser.add_argument("-m", "--manifest", help="manifest path (default: <output-dir>/staticfiles.json); point STATIC_MANIFEST at it")
+  parser.add_argument("--no-gzip", action="store_true", help="do not write .gz variants")
+  parser.add_argument("--no-brotli", action="store_true", help="do not write .br variants (requires the brotli package)")
+  parser.add_argument("-w", "--workers", type=int, help="number of hashing/compression threads")
+  parser.add_argument("--force", action="store_true", help="process all files even if unchanged")
+  parser.add_argument("-q", "--quiet", action="store_true", help="do not list processed files")
+  parser.add_argument("function", metavar="function", help="function to run")
+  options = parser.parse_args()
+
+  from wambda.staticfiles import collect
+  encodings = []
+  if not options.no_gzip:
+    encodings.append("gzip")
+  if not options.no_brotli:
+    if importlib.util.find_spec("brotli") is None:
+      print("Note: brotli is not installed; .br variants are skipped (pip install brotli)")
+    else:
+      encodings.append("br")
+
+  try:
+    result = collect(
+      static_dir=options.static_dir,
+      output_dir=options.output_dir,
+      manifest_path=options.manifest,
+      encodings=encodings,
+      max_workers=options.workers,
+      force=options.force
+    )
+  except (OSError, ValueError) as e:
+    print(f"Error: {e}")
+    sys.exit(1)
+
+  if not options.quiet:
+    for name in result.processed:
+      print(f"  {name} -> {result.manifest['paths'][name]}")
+    for name in result.removed:
+      print(f"  {name} (removed)")
+  print(f"Collected static files into {os.path.abspath(options.output_dir)}: {result}")
+  print(f"Manifest: {os.path.abspath(options.manifest or os.path.join(options.output_dir, 'staticfiles.json'))}")
+
+
+def deploy_static():
+  parser = argparse.ArgumentParser(description="""\
+Upload static files to S3, sending only files whose content hash differs from
+the deploy manifest stored in the bucket (no bucket listing). Sets Content-Type,
+Content-Encoding (.gz/.br) and Cache-Control (immutable for hashed names).
+""", formatter_class = argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--version", action="version", version='%(prog)s 0.0.1')
+  parser.add_argument("-d", "--source-dir", default="staticfiles", help="directory to upload (e.g. collectstatic output)")
+  parser.add_argument("-b", "--bucket", help="S3 bucket name (required)")
+  parser.add_argument("--prefix", default="static", help="S3 key prefix")
+  parser.add_argument("-r", "--region", help="AWS region")
+  parser.add_argument("-p", "--profile", help="AWS profile name to use")
+  parser.add_argument("-w", "--workers", type=int, default=16, help="number of parallel uploads")
+  parser.add_argument("--max-age", type=int, default=300, help="Cache-Control max-age for files without a content hash in their name")
+  parser.add_argument("--delete", action="store_true", help="delete objects for files removed locally")
+  parser.add_argument("-n", "--dry-run", action="store_true", help="show what would be uploaded without uploading")
+  parser.add_argument("--force", action="store_true", help="upload all files ignoring the deploy manifest")
+  parser.add_argument("--manifest-key", help="S3 key of the deploy manifest (default: .wambda/deploy-manifests/<prefix>/manifest.json); keep it outside the served prefix")
+  parser.add_argument("-q", "--quiet", action="store_true", help="do not list uploaded files")
+  parser.add_argument("function", metavar="function", help="function to run")
+  options = parser.parse_args()
+
+  if not options.bucket:
+    print("Error: S3 bucket name is required. Use -b/--bucket to specify it.")
+    sys.exit(1)
+
+  import boto3
+  from wambda.s3sync import deploy
+  session = boto3.Session(profile_name=options.profile) if options.profile else boto3.Session()
+  client = session.client('s3', region_name=options.region)
+
+  def on_upload(name, size):
+    if not options.quiet:
+      print(f"  upload: {name} ({size} bytes)")
+
+  try:
+    result = deploy(
+      source_dir=options.source_dir,
+      bucket=options.bucket,
+      prefix=options.prefix,
+      client=client,
+      max_workers=options.workers,
+      cache_control=f"public, max-age={options.max_age}",
+      delete=options.delete,
+      dry_run=options.dry_run,
+      force=options.force,
+      on_upload=on_upload,
+      manifest_key=options.manifest_key
+    )
+  except Exception as e:
+    print(f"Error deploying static files: {e}")
+    sys.exit(1)
+
+  if options.dry_run and not options.quiet:
+    for name in result.uploaded:
+      print(f"  (dry run) upload: {name}")
+  if not options.quiet:
+    for name in result.deleted:
+      print(f"  {'(dry run) ' if options.dry_run else ''}delete: {name}")
+  print(f"s3://{options.bucket}/{options.prefix.strip('/')}: {result}")
+
+
+def analyze_bundle():
+  parser = argparse.ArgumentParser(description="""\
+Analyze a built Lambda artifact (sam build output): size and import time per
+top-level package, packages never imported from the app, and suggested exclusions.
+Optionally write a slimmed artifact with .pyc precompiled and tests, docs and
+dist-info stripped.
+""", formatter_class = argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--version", action="version", version='%(prog)s 0.0.1')
+  parser.add_argument("-b", "--build-dir", help="artifact directory (default: the .aws-sam/build/<Function> containing lambda_function.py)")
+  parser.add_argument("-s", "--source-dir", default="Lambda", help="application source directory (CodeUri)")
+  parser.add_argument("--import-time", action="store_true", help="measure the import time of each package (uses this Python)")
+  parser.add_argument("--format", choices=("table", "json"), default="table", help="output format")
+  parser.add_argument("--slim", metavar="OUTPUT_DIR", help="write a slimmed copy of the artifact to this directory")
+  parser.add_argument("-x", "--exclude", action="append", default=[], help="package to leave out of the slim artifact (repeatable)")
+  parser.add_argument("--exclude-unused", action="store_true", help="leave all suggested exclusions out of the slim artifact")
+  parser.add_argument("--keep-dist-info", action="store_true", help="keep *.dist-info in the slim artifact (for importlib.metadata users)")
+  parser.add_argument("--no-compile", action="store_true", help="do not precompile .pyc in the slim artifact")
+  parser.add_argument("function", metavar="function", help="function to run")
+  options = parser.parse_args()
+
+  build_dir = options.build_dir
+  if build_dir is None:
+    sam_build_dir = os.path.join(".aws-sam", "build")
+    candidates = []
+    if os.path.isdir(sam_build_dir):
+      for name in sorted(os.listdir(sam_build_dir)):
+        if os.path.isfile(os.path.join(sam_build_dir, name, "lambda_function.py")):
+          candidates.append(os.path.join(sam_build_dir, name))
+    if len(candidates) != 1:
+      print("Error: could not determine the artifact directory. Run 'sam build' or use -b/--build-dir.")
+      for candidate in candidates:
+        print(f"  candidate: {candidate}")
+      sys.exit(1)
+    build_dir = candidates[0]
+
+  from wambda import bundle
+  try:
+    report = bundle.analyze(build_dir, source_dir=options.source_dir, import_time=options.import_time)
+  except OSError as e:
+    print(f"Error: {e}")
+    sys.exit(1)
+
+  if options.format == "json":
+    print(bundle.report_to_json(report))
+  else:
+    print(bundle.format_report(report))
+
+  if options.slim:
+    exclude = list(options.exclude)
+    if options.exclude_unused:
+      exclude.extend(p.name for p in bundle.suggest_exclusions(report))
+    try:
+      size = bundle.slim(
+        report, options.slim,
+        exclude=exclude,
+        strip_dist_info=not options.keep_dist_info,
+        compile_pyc=not options.no_compile
+      )
+    except (OSError, ValueError) as e:
+      print(f"Error: {e}")
+      sys.exit(1)
+    print()
+    print(f"Slim artifact: {os.path.abspath(options.slim)} ({size / 1024 / 1024:.1f}MB, was {report['total_size'] / 1024 / 1024:.1f}MB)")
+    if exclude:
+      print(f"  excluded: {', '.join(sorted(set(exclude)))}")
+    if not options.no_compile:
+      print(f"  .pyc compiled for Python {sys.version_info.major}.{sys.version_info.minor}; it must match the Lambda runtime")
+
+
+def serve():
+  parser = argparse.ArgumentParser(description="""\
+Run lambda_handler in-process behind a local HTTP server (no SAM containers).
+""", formatter_class = argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--version", action="version", version='%(prog)s 0.0.1')
+  parser.add_argument("-p", "--port", type=int, default=8000, help="server port")
+  parser.add_argument("-l", "--lambda-dir", default="Lambda", help="directory containing lambda_function.py")
+  parser.add_argument("--static-url", default="/static", help="static files URL prefix")
+  parser.add_argument("-d", "--static-dir", default="static", help="static files directory (served in-process if it exists)")
+  parser.add_argument("-w", "--workers", type=int, default=1, help="number of prefork worker processes")
+  parser.add_argument("-r", "--reload", action="store_true", help="restart workers when source files change")
+  parser.add_argument("-m", "--memory-size", type=int, default=128, help="memory size reported by the Lambda context (MB)")
+  parser.add_argument("-q", "--quiet", action="store_true", help="do not log each request")
+  parser.add_argument("function", metavar="function", help="function to run")
+  options = parser.parse_args()
+
+  if not os.path.isfile(os.path.join(options.lambda_dir, "lambda_function.py")):
+    print(f"Error: lambda_function.py not found in '{options.lambda_dir}'")
+    sys.exit(1)
+
+  try:
+    print(f"Starting in-process Lambda server on port {options.port}")
+    print(f"  - Lambda directory: {os.path.abspath(options.lambda_dir)}")
+    if os.path.isdir(options.static_dir):
+      print(f"  - Static files ({options.static_url}*) from: {os.path.abspath(options.static_dir)}")
+    run_lambda_server(
+      lambda_dir=options.lambda_dir,
+      port=options.port,
+      static_url=options.static_url,
+      static_dir=options.static_dir,
+      workers=options.workers,
+      reload=options.reload,
+      quiet=options.quiet,
+      memory_size=options.memory_size
+    )
+  except KeyboardInterrupt:
+    print("\nLambda server stopped.")
+  except Exception as e:
+    print(f"Error starting Lambda server: {e}")
+    sys.exit(1)
+
+
+def cognito():
+  parser = argparse.ArgumentParser(description="""\
+Run a local Cognito user pool emulator (RS256 tokens, JWKS, cognito-idp JSON API).
+Point the app at it with COGNITO_ENDPOINT_URL and COGNITO_ISSUER_URL in settings.py.
+""", formatter_class = argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--version", action="version", version='%(prog)s 0.0.1')
+  parser.add_argument("-p", "--port", type=int, default=9229, help="server port")
+  parser.add_argument("--pool-id", default="ap-northeast-1_local", help="user pool id (must match USER_POOL_ID)")
+  parser.add_argument("--client-id", default="local", help="app client id (must match CLIENT_ID)")
+  parser.add_argument("--client-secret", help="app client secret (must match CLIENT_SECRET)")
+  parser.add_argument("-u", "--user", action="append", default=[], metavar="USERNAME:PASSWORD[:EMAIL]", help="confirmed user to create (repeatable)")
+  parser.add_argument("--users-file", help="JSON file with a list of {username, password, email}")
+  parser.add_argument("--issuer-url", help="token issuer base URL (default: http://localhost:<port>)")
+  parser.add_argument("--token-ttl", type=int, default=3600, help="id/access token lifetime in seconds")
+  parser.add_argument("--latency", type=float, default=0.0, help="latency added to each request (ms)")
+  parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency up to this value (ms)")
+  parser.add_argument("-q", "--quiet", action="store_true", help="do not log each request")
+  parser.add_argument("function", metavar="function", help="function to run")
+  options = parser.parse_args()
+
+  users = []
+  for spec in options.user:
+    parts = spec.split(":", 2)
+    if len(parts) < 2:
+      print(f"Error: invalid --user '{spec}' (expected USERNAME:PASSWORD[:EMAIL])")
+      sys.exit(1)
+    users.append((parts[0], parts[1], parts[2] if len(parts) == 3 else None))
+  if options.users_file:
+    with open(options.users_file) as f:
+      for user in json.load(f):
+        users.append((user["username"], user["password"], user.get("email")))
+
+  from wambda.cognito_local import run_cognito_server
+  try:
+    run_cognito_server(
+      pool_id=options.pool_id,
+      client_id=options.client_id,
+      client_secret=options.client_secret,
+      port=options.port,
+      users=users,
+      issuer_url=options.issuer_url,
+      token_ttl=options.token_ttl,
+      latency=options.latency / 1000,
+      jitter=options.jitter / 1000,
+      quiet=options.quiet
+    )
+  except KeyboardInterrupt:
+    print("\nLocal Cognito server stopped.")
+  except Exception as e:
+    print(f"Error starting local Cognito server: {e}")
+    sys.exit(1)
+
+
 def log():
   parser = argparse.ArgumentParser(description="""\
-Retrieve recent Lambda function logs from CloudWatch.
+Retrieve Lambda function logs from CloudWatch.
+Events are paginated to the end of the time range and printed as they arrive.
 """, formatter_class = argparse.ArgumentDefaultsHelpFormatter)
   parser.add_argument("--version", action="version", version='%(prog)s 0.0.1')
   parser.add_argument("-f", "--function-name", help="Lambda function name (required)")
-  parser.add_argument("-l", "--limit", type=int, default=50, help="maximum number of log events to retrieve (default: 50)")
+  parser.add_argument("-l", "--limit", type=int, help="maximum number of log events to retrieve (default: 50, or no limit with --stats; 0: no limit)")
   parser.add_argument("--hours", type=int, default=1, help="number of hours to look back for logs (default: 1)")
   parser.add_argument("-r", "--region", default="ap-northeast-1", help="AWS region (default: ap-northeast-1)")
   parser.add_argument("-p", "--profile", help="AWS profile name to use")
   parser.add_argument("--start-time", help="start time in ISO format (e.g., 2025-01-01T00:00:00)")
   parser.add_argument("--end-time", help="end time in ISO format (e.g., 2025-01-01T23:59:59)")
+  parser.add_argument("--filter-pattern", help="CloudWatch Logs filter pattern applied server-side (e.g., 'ERROR', '{ $.level = \"ERROR\" }')")
+  parser.add_argument("--log-stream", action="append", default=[], help="only read this log stream (repeatable)")
+  parser.add_argument("--slices", type=int, default=1, help="split the time range into this many slices fetched in parallel")
+  parser.add_argument("--follow", action="store_true", help="keep polling for new events (like tail -f)")
+  parser.add_argument("--interval", type=float, default=2.0, help="polling interval for --follow in seconds")
+  parser.add_argument("--stats", action="store_true", help="aggregate REPORT and wambda-timing lines into per-route latency statistics")
+  parser.add_argument("--by-method", action="store_true", help="with --stats, split routes by HTTP method")
+  parser.add_argument("--format", choices=("table", "csv", "json"), default="table", help="--stats output format")
+  parser.add_argument("-o", "--output", help="write --stats output to this file instead of stdout")
+  parser.add_argument("-i", "--input", help="with --stats, read log lines from this file ('-' for stdin) instead of CloudWatch")
   parser.add_argument("function", metavar="function", help="function to run")
   options = parser.parse_args()
   
+  if options.stats and options.input:
+    # エクスポート済みのログファイルを集計（CloudWatchにはアクセスしない）
+    f = sys.stdin if options.input == "-" else open(options.input, errors="replace")
+    try:
+      _write_log_stats(options, (line.rstrip("\n") for line in f))
+    finally:
+      if f is not sys.stdin:
+        f.close()
+    return
+  
   if not options.function_name:
     print("Error: Lambda function name is required. Use -f/--function-name to specify it.")
     sys.exit(1)
   
+  import boto3
+  from wambda import cwlogs
   try:
     # Initialize CloudWatch Logs client
     session = boto3.Session(profile_name=options.profile) if options.profile else boto3.Session()
@@ -379,62 +1121,117 @@ Retrieve recent Lambda function logs from CloudWatch.
     # Convert to milliseconds since epoch
     start_time_ms = int(start_time.timestamp() * 1000)
     end_time_ms = int(end_time.timestamp() * 1000)
+    if options.limit is None:
+      limit = None if options.stats else 50
+    else:
+      limit = options.limit or None
+    filter_pattern = options.filter_pattern
+    if options.stats and not filter_pattern:
+      # 集計に必要な行だけをサーバー側で絞り込む
+      filter_pattern = '?"REPORT RequestId" ?"platform.report" ?"wambda-timing"'
     
     print(f"Retrieving logs for Lambda function: {options.function_name}")
     print(f"Log group: {log_group_name}")
-    print(f"Time range: {start_time.isoformat()} to {end_time.isoformat()}")
+    if options.follow:
+      print(f"Following from: {start_time.isoformat()} (Ctrl+C to stop)")
+    else:
+      print(f"Time range: {start_time.isoformat()} to {end_time.isoformat()}")
     print(f"Region: {options.region}")
-    print(f"Limit: {options.limit} events")
+    if filter_pattern:
+      print(f"Filter pattern: {filter_pattern}")
+    if not options.follow:
+      print(f"Limit: {f'{limit} events' if limit else 'none'}")
     print("-" * 80)
     
     # Get log events
-    try:
-      response = logs_client.filter_log_events(
-        logGroupName=log_group_name,
-        startTime=start_time_ms,
-        endTime=end_time_ms,
-        limit=options.limit
+    if options.follow:
+      events = cwlogs.follow(
+        logs_client, log_group_name, start_time_ms,
+        filter_pattern=filter_pattern,
+        log_stream_names=options.log_stream,
+        interval=options.interval
       )
-      
-      events = response.get('events', [])
-      
-      if not events:
-        print("No log events found in the specified time range.")
-        print("\nTroubleshooting:")
-        print(f"1. Check if the Lambda function '{options.function_name}' exists")
-        print(f"2. Verify the log group '{log_group_name}' exists")
-        print(f"3. Ensure your AWS credentials have CloudWatch Logs read permissions")
-        print(f"4. Try extending the time range with --hours option")
-        return
-      
-      print(f"Found {len(events)} log events:\n")
-      
+    else:
+      events = cwlogs.iter_log_events_parallel(
+        logs_client, log_group_name, start_time_ms, end_time_ms,
+        slices=options.slices,
+        filter_pattern=filter_pattern,
+        log_stream_names=options.log_stream,
+        limit=limit
+      )
+    
+    if options.stats:
+      try:
+        _write_log_stats(options, (event['message'] for event in events))
+      except KeyboardInterrupt:
+        print()
+      except logs_client.exceptions.ResourceNotFoundException:
+        print(f"Error: Log group '{log_group_name}' not found.")
+      return
+    
+    count = 0
+    try:
       for event in events:
         timestamp = datetime.fromtimestamp(event['timestamp'] / 1000)
         message = event['message'].rstrip('\n')
-        
-        print(f"[{timestamp.isoformat()}] {message}")
-      
-      print("-" * 80)
-      print(f"Retrieved {len(events)} log events from {log_group_name}")
-      
-      # Check if there might be more logs
-      if len(events) == options.limit:
-        print(f"Note: Result limited to {options.limit} events. There might be more logs available.")
-        print("Use --limit option to retrieve more events.")
-        
+        # 取得したイベントから順に出力する
+        print(f"[{timestamp.isoformat()}] {message}", flush=options.follow)
+        count += 1
+    except KeyboardInterrupt:
+      print()
     except logs_client.exceptions.ResourceNotFoundException:
       print(f"Error: Log group '{log_group_name}' not found.")
       print(f"Make sure the Lambda function '{options.function_name}' exists and has been invoked at least once.")
+      return
     except Exception as e:
       print(f"Error retrieving logs: {e}")
       sys.exit(1)
+    
+    if count == 0 and not options.follow:
+      print("No log events found in the specified time range.")
+      print("\nTroubleshooting:")
+      print(f"1. Check if the Lambda function '{options.function_name}' exists")
+      print(f"2. Verify the log group '{log_group_name}' exists")
+      print(f"3. Ensure your AWS credentials have CloudWatch Logs read permissions")
+      print(f"4. Try extending the time range with --hours option")
+      if options.filter_pattern:
+        print(f"5. Check the filter pattern '{options.filter_pattern}'")
+      return
+    
+    print("-" * 80)
+    print(f"Retrieved {count} log events from {log_group_name}")
+    
+    # 件数の上限で打ち切った場合のみ表示（ページングは最後まで行う）
+    if limit and count == limit:
+      print(f"Note: Result limited to {limit} events. There might be more logs available.")
+      print("Use --limit option to retrieve more events (--limit 0 for no limit).")
       
   except Exception as e:
     print(f"Error initializing AWS client: {e}")
     print("Make sure your AWS credentials are configured correctly.")
     sys.exit(1)
 
+def _write_log_stats(options, messages):
+  """ログ行を逐次集計して --format の形式で出力（--follow の場合はCtrl+Cで集計結果を出力）"""
+  from wambda.logstats import LatencyStats
+  stats = LatencyStats(by_method=options.by_method)
+  try:
+    for message in messages:
+      stats.add_line(message)
+  finally:
+    if options.format == "json":
+      text = stats.to_json()
+    elif options.format == "csv":
+      text = stats.to_csv()
+    else:
+      text = stats.format_table()
+    if options.output:
+      with open(options.output, "w", newline="") as f:
+        f.write(text if text.endswith("\n") else text + "\n")
+      print(f"Wrote statistics for {stats.lines} lines to {options.output}")
+    else:
+      print(text)
+
 def main():
   if len(sys.argv) == 1:
     print("You must specify a function.")
@@ -451,8 +1248,18 @@ def main():
       proxy()
     elif sys.argv[1] == "static":
       static()
+    elif sys.argv[1] == "collectstatic":
+      collectstatic()
+    elif sys.argv[1] == "deploy-static":
+      deploy_static()
+    elif sys.argv[1] == "serve":
+      serve()
+    elif sys.argv[1] == "cognito":
+      cognito()
     elif sys.argv[1] == "log":
       log()
+    elif sys.argv[1] == "analyze-bundle":
+      analyze_bundle()
     else:
       print(f"Unknown function: {sys.argv[1]}")
       print()
@@ -1,2 +1,10 @@
-from . import urls, handler, shortcuts, authenticate
+import importlib
+
 __all__ = ["urls", "handler", "shortcuts", "authenticate"]
+
+
+def __getattr__(name):
+  """サブモジュールを最初の参照時にインポート（import wambda だけでは boto3 などを読み込まない）"""
+  if name in __all__:
+    return importlib.import_module(f".{name}", __name__)
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
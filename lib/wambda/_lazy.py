@@ -0,0 +1,58 @@
+"""
+WAMBDA 遅延インポート
+
+boto3・jwt・jinja2・wtformsなど、インポートに時間のかかる依存モジュールを
+最初に使われるまで読み込まないためのヘルパーです。
+Lambdaのコールドスタートでは、そのリクエストで使わないモジュールのインポート時間を払わずに済みます。
+
+  from wambda._lazy import lazy_import
+  boto3 = lazy_import('boto3')
+
+  def get_client():
+    return boto3.client('ssm')   # ここで初めてboto3がインポートされる
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+  """最初の属性アクセスでモジュールをインポートする代理オブジェクト"""
+  def __init__(self, name):
+    self._lazy_name = name
+    self._lazy_module = None
+
+  def _load(self):
+    # importlibがモジュールごとのロックで排他するため、ここでは独自のロックを持たない
+    # （グローバルなロックは、インポート中のモジュールが別の遅延インポートを使うとデッドロックする）
+    module = self._lazy_module
+    if module is None:
+      module = self._lazy_module = importlib.import_module(self._lazy_name)
+    return module
+
+  def __getattr__(self, name):
+    return getattr(self._load(), name)
+
+  def __dir__(self):
+    return dir(self._load())
+
+  def __repr__(self):
+    state = "loaded" if self._lazy_module is not None else "not loaded"
+    return f"<lazy module '{self._lazy_name}' ({state})>"
+
+
+def lazy_import(name):
+  """
+  モジュールを遅延インポート
+
+  既にインポート済みの場合はモジュールそのものを返します。
+
+  Args:
+    name: モジュール名（'boto3', 'jwt' など）
+
+  Returns:
+    モジュール、またはLazyModule
+  """
+  module = sys.modules.get(name)
+  if module is not None:
+    return module
+  return LazyModule(name)
@@ -0,0 +1,161 @@
+"""
+WAMBDA ASGI/WSGIアダプター
+
+lambda_handlerをASGI・WSGIアプリケーションとして公開し、
+uvicornやgunicornなどのアプリケーションサーバー上で同じアプリを実行できるようにします。
+
+使用例（Lambda/asgi.py）:
+
+  from lambda_function import lambda_handler
+  from wambda.adapters import ASGIAdapter, WSGIAdapter
+
+  app = ASGIAdapter(lambda_handler)        # uvicorn asgi:app --workers 4
+  wsgi_app = WSGIAdapter(lambda_handler)   # gunicorn asgi:wsgi_app -w 4
+"""
+import asyncio
+import os
+import urllib.parse
+from http import HTTPStatus
+
+from wambda.debug import create_event_from_http, response_to_http, LambdaContext
+
+
+def _canonical_header_name(name):
+  """ヘッダー名を 'Content-Type' 形式に正規化（authenticate.pyは 'Cookie' で参照する）"""
+  return "-".join(part.capitalize() for part in name.split("-"))
+
+
+def _default_memory_size():
+  return int(os.getenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "128"))
+
+
+class ASGIAdapter:
+  """
+  lambda_handlerをASGIアプリケーションとして公開するアダプター
+
+  リクエストボディをすべて受信してからAPI Gatewayプロキシ形式のイベントを生成し、
+  lambda_handlerをスレッドプールで実行します。
+  """
+  def __init__(self, lambda_handler, function_name="wambda-asgi", memory_size=None):
+    """
+    Args:
+      lambda_handler: lambda_function.lambda_handler
+      function_name: コンテキストに設定する関数名
+      memory_size: コンテキストに設定するメモリサイズ（MB）
+    """
+    self.lambda_handler = lambda_handler
+    self.function_name = function_name
+    self.memory_size = memory_size or _default_memory_size()
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] == "lifespan":
+      await self._lifespan(receive, send)
+      return
+    if scope["type"] != "http":
+      raise ValueError(f"未対応のASGIスコープです: {scope['type']}")
+
+    body = bytearray()
+    while True:
+      message = await receive()
+      if message["type"] == "http.disconnect":
+        return
+      body += message.get("body", b"")
+      if not message.get("more_body", False):
+        break
+
+    raw_path = scope.get("raw_path")
+    if raw_path:
+      raw_path = raw_path.decode("latin-1")
+    else:
+      raw_path = urllib.parse.quote(scope["path"])
+    if scope.get("query_string"):
+      raw_path = f"{raw_path}?{scope['query_string'].decode('latin-1')}"
+    header_items = [
+      (_canonical_header_name(name.decode("latin-1")), value.decode("latin-1"))
+      for name, value in scope.get("headers", [])
+    ]
+    client = scope.get("client") or ("127.0.0.1", 0)
+    context = LambdaContext(function_name=self.function_name, memory_limit_in_mb=self.memory_size)
+    event = create_event_from_http(
+      scope["method"], raw_path, header_items, bytes(body),
+      source_ip=client[0], request_id=context.aws_request_id
+    )
+
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(None, self.lambda_handler, event, context)
+    status, response_headers, response_body = response_to_http(response)
+
+    await send({
+      "type": "http.response.start",
+      "status": status,
+      "headers": [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in response_headers
+        if name.lower() != "content-length"
+      ] + [(b"content-length", str(len(response_body)).encode("ascii"))],
+    })
+    await send({"type": "http.response.body", "body": response_body})
+
+  async def _lifespan(self, receive, send):
+    while True:
+      message = await receive()
+      if message["type"] == "lifespan.startup":
+        await send({"type": "lifespan.startup.complete"})
+      elif message["type"] == "lifespan.shutdown":
+        await send({"type": "lifespan.shutdown.complete"})
+        return
+
+
+class WSGIAdapter:
+  """
+  lambda_handlerをWSGIアプリケーションとして公開するアダプター
+  """
+  def __init__(self, lambda_handler, function_name="wambda-wsgi", memory_size=None):
+    """
+    Args:
+      lambda_handler: lambda_function.lambda_handler
+      function_name: コンテキストに設定する関数名
+      memory_size: コンテキストに設定するメモリサイズ（MB）
+    """
+    self.lambda_handler = lambda_handler
+    self.function_name = function_name
+    self.memory_size = memory_size or _default_memory_size()
+
+  def __call__(self, environ, start_response):
+    header_items = []
+    for key, value in environ.items():
+      if key.startswith("HTTP_"):
+        header_items.append((_canonical_header_name(key[5:].replace("_", "-").lower()), value))
+    if environ.get("CONTENT_TYPE"):
+      header_items.append(("Content-Type", environ["CONTENT_TYPE"]))
+    if environ.get("CONTENT_LENGTH"):
+      header_items.append(("Content-Length", environ["CONTENT_LENGTH"]))
+
+    try:
+      content_length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+      content_length = 0
+    body = environ["wsgi.input"].read(content_length) if content_length > 0 else b""
+
+    # PATH_INFOはWSGIの規約でlatin-1デコード済みのため元のバイト列に戻す
+    path = environ.get("PATH_INFO", "/").encode("latin-1").decode("utf-8", "replace")
+    raw_path = urllib.parse.quote(environ.get("SCRIPT_NAME", "") + path)
+    if environ.get("QUERY_STRING"):
+      raw_path = f"{raw_path}?{environ['QUERY_STRING']}"
+
+    context = LambdaContext(function_name=self.function_name, memory_limit_in_mb=self.memory_size)
+    event = create_event_from_http(
+      environ["REQUEST_METHOD"], raw_path, header_items, body,
+      source_ip=environ.get("REMOTE_ADDR", "127.0.0.1"), request_id=context.aws_request_id
+    )
+    response = self.lambda_handler(event, context)
+    status, response_headers, response_body = response_to_http(response)
+
+    try:
+      reason = HTTPStatus(status).phrase
+    except ValueError:
+      reason = ""
+    headers = [(name, value) for name, value in response_headers if name.lower() != "content-length"]
+    headers.append(("Content-Length", str(len(response_body))))
+    start_response(f"{status} {reason}".strip(), headers)
+    return [response_body]
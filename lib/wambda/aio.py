@@ -0,0 +1,125 @@
+"""
+WAMBDA 非同期ビューのサポート
+
+`async def` で定義したビューを実行するためのイベントループと、
+boto3などのブロッキング呼び出しを並行して待機するためのヘルパーを提供します。
+
+イベントループはスレッドごとに一度だけ作成され、ウォームスタート間で再利用されます。
+"""
+import asyncio
+import functools
+import threading
+import weakref
+
+_local = threading.local()
+
+# イベントループごとのAWSクライアントキャッシュ
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_executor():
+  """ブロッキング呼び出し用の共有スレッドプールを取得（wambda.concurrentと共有）"""
+  from wambda.concurrent import get_executor as get_shared_executor
+  return get_shared_executor()
+
+
+def get_event_loop():
+  """
+  現在のスレッドのイベントループを取得
+
+  ループはスレッドごとに一度だけ作成され、Lambdaのウォームスタート間で再利用されます。
+  """
+  loop = getattr(_local, "loop", None)
+  if loop is None or loop.is_closed():
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(get_executor())
+    _local.loop = loop
+  return loop
+
+
+def run(awaitable):
+  """
+  コルーチンを再利用されるイベントループ上で完了まで実行
+
+  Args:
+    awaitable: コルーチンまたはawait可能なオブジェクト
+
+  Returns:
+    コルーチンの戻り値
+  """
+  loop = get_event_loop()
+  asyncio.set_event_loop(loop)
+  return loop.run_until_complete(awaitable)
+
+
+async def to_thread(func, *args, **kwargs):
+  """
+  ブロッキング関数を共有スレッドプールで実行してawaitする
+
+  Args:
+    func: 実行する関数（boto3クライアントのメソッドなど）
+    *args: 位置引数
+    **kwargs: キーワード引数
+
+  Returns:
+    関数の戻り値
+  """
+  loop = asyncio.get_running_loop()
+  return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+class ThreadedClient:
+  """
+  boto3クライアントのメソッドをawait可能にするラッパー
+
+  boto3クライアントはスレッドセーフなため、共有スレッドプール上で並行して呼び出せます。
+  """
+  def __init__(self, client):
+    self._client = client
+
+  @property
+  def exceptions(self):
+    return self._client.exceptions
+
+  def __getattr__(self, name):
+    method = getattr(self._client, name)
+    if not callable(method):
+      return method
+
+    async def call(*args, **kwargs):
+      return await to_thread(method, *args, **kwargs)
+    return call
+
+
+async def get_client(service_name, region_name=None, **kwargs):
+  """
+  awaitで呼び出せるAWSクライアントを取得
+
+  aiobotocoreがインストールされている場合はネイティブの非同期クライアントを、
+  そうでなければboto3クライアントを共有スレッドプールで実行するラッパーを返します。
+  クライアントはイベントループごとにキャッシュされ、ウォームスタート間で再利用されます。
+
+  Args:
+    service_name: サービス名（'dynamodb', 's3'など）
+    region_name: リージョン
+    **kwargs: クライアント作成時の追加引数
+
+  Returns:
+    メソッドがコルーチンを返すクライアント
+  """
+  clients = _clients.setdefault(asyncio.get_running_loop(), {})
+  key = (service_name, region_name, tuple(sorted(kwargs.items())))
+  if key in clients:
+    return clients[key]
+
+  try:
+    from aiobotocore.session import get_session
+  except ImportError:
+    import boto3
+    client = ThreadedClient(boto3.client(service_name, region_name=region_name, **kwargs))
+  else:
+    # ループが再利用されるため、クライアントもコンテナの寿命まで開いたままにする
+    client = await get_session().create_client(service_name, region_name=region_name, **kwargs).__aenter__()
+
+  clients[key] = client
+  return client
@@ -3,14 +3,26 @@ import logging
 import hmac
 import hashlib
 import base64
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from http.cookies import SimpleCookie
-import boto3
+from wambda import sessions, signing
+from wambda._lazy import lazy_import
+from wambda.cache import TTLCache
+
+# boto3のインポートには時間がかかるため、最初に使われるまで読み込まない
+boto3 = lazy_import('boto3')
 
 class MaintenanceOptionError(Exception):
   """メンテナンス時に発生するエラー"""
   pass
 
+# 署名付き認証Cookie（JWT検証結果のキャッシュ）の名前
+SIGNED_AUTH_COOKIE_NAME = 'wambda_auth'
+# 署名付き認証Cookieの署名に使う派生鍵の用途
+SIGNED_AUTH_COOKIE_PURPOSE = 'auth-cookie'
+
 # Lambdaコンテナレベルのキャッシュ
 _cognito_settings_cache = None
 
@@ -39,11 +51,136 @@ def get_cognito_settings(master):
       value = ssm.get_parameter(Name=param_name, WithDecryption=True)["Parameter"]["Value"]
       _cognito_settings_cache[key] = value
     except Exception as e:
-      logging.error(f"Failed to get SSM parameter {param_name}: {e}")
+      logging.error("Failed to get SSM parameter %s: %s", param_name, e)
       raise
   
   return _cognito_settings_cache
 
+# Lambdaコンテナレベルのcognito-idpクライアント（boto3のクライアントはスレッドセーフ）
+_cognito_clients = {}
+
+def get_cognito_client(master):
+  """
+  cognito-idpクライアントを取得（キャッシュ付き）
+  
+  settings.COGNITO_ENDPOINT_URL が設定されている場合は、そのエンドポイント
+  （wambda-admin.py cognito で起動するローカルCognitoサーバーなど）に接続します。
+  
+  Args:
+    master: Masterインスタンス
+    
+  Returns:
+    botocore.client.CognitoIdentityProvider: クライアント
+  """
+  endpoint_url = getattr(master.settings, 'COGNITO_ENDPOINT_URL', None)
+  key = (master.settings.REGION, endpoint_url)
+  client = _cognito_clients.get(key)
+  if client is None:
+    client = _cognito_clients[key] = boto3.client('cognito-idp', region_name=master.settings.REGION, endpoint_url=endpoint_url)
+  return client
+
+@dataclass(frozen=True)
+class CognitoConfig:
+  """
+  Cognito設定から導出した値（コンテナごとに一度だけ作成され、以降は変更されない）
+  
+  Attributes:
+    region: リージョン
+    user_pool_id: User Pool ID
+    client_id: アプリクライアントID
+    client_secret: アプリクライアントシークレット（ない場合はNone）
+    issuer: IDトークンのiss
+    jwks_url: JWKSのURL
+    audience: IDトークンのaud
+    jwk_client: 署名鍵をキャッシュするPyJWKClient
+  """
+  region: str
+  user_pool_id: str
+  client_id: str
+  client_secret: str
+  issuer: str
+  jwks_url: str
+  audience: str
+  jwk_client: object = field(repr=False, compare=False)
+  _secret_hashes: TTLCache = field(repr=False, compare=False)
+  
+  @classmethod
+  def from_settings(cls, master):
+    """SSMのCognito設定とsettingsから作成"""
+    from jwt import PyJWKClient
+    
+    cognito_settings = get_cognito_settings(master)
+    region = master.settings.REGION
+    base_url = getattr(master.settings, 'COGNITO_ISSUER_URL', None) \
+      or f'https://cognito-idp.{region}.amazonaws.com'
+    issuer = f'{base_url.rstrip("/")}/{cognito_settings["USER_POOL_ID"]}'
+    jwks_url = f'{issuer}/.well-known/jwks.json'
+    return cls(
+      region=region,
+      user_pool_id=cognito_settings['USER_POOL_ID'],
+      client_id=cognito_settings['CLIENT_ID'],
+      client_secret=cognito_settings.get('CLIENT_SECRET') or None,
+      issuer=issuer,
+      jwks_url=jwks_url,
+      audience=cognito_settings['CLIENT_ID'],
+      jwk_client=PyJWKClient(jwks_url, cache_keys=True),
+      _secret_hashes=TTLCache(maxsize=getattr(master.settings, 'COGNITO_SECRET_HASH_CACHE_SIZE', 1024))
+    )
+  
+  def secret_hash(self, username):
+    """
+    SECRET_HASHを取得（ユーザー名ごとにキャッシュ）
+    
+    Args:
+      username: ユーザー名
+      
+    Returns:
+      str: Base64エンコードされたHMAC-SHA256
+    """
+    secret_hash = self._secret_hashes.get(username)
+    if secret_hash is None:
+      dig = hmac.new(
+        self.client_secret.encode('utf-8'),
+        msg=(username + self.client_id).encode('utf-8'),
+        digestmod=hashlib.sha256
+      ).digest()
+      secret_hash = base64.b64encode(dig).decode()
+      self._secret_hashes.set(username, secret_hash)
+    return secret_hash
+
+# Lambdaコンテナレベルのキャッシュ
+_cognito_config = None
+
+def get_cognito_config(master):
+  """
+  CognitoConfigを取得（コンテナごとに一度だけ作成）
+  
+  Args:
+    master: Masterインスタンス
+    
+  Returns:
+    CognitoConfig: Cognito設定
+  """
+  global _cognito_config
+  
+  if _cognito_config is None:
+    _cognito_config = CognitoConfig.from_settings(master)
+  return _cognito_config
+
+def get_issuer(master):
+  """
+  IDトークンのissuer（JWKSの基底URL）を取得
+  
+  settings.COGNITO_ISSUER_URL が設定されている場合はそれを基底URLとして使用します。
+  
+  Args:
+    master: Masterインスタンス
+    
+  Returns:
+    str: 'https://cognito-idp.<region>.amazonaws.com/<user_pool_id>' など
+  """
+  return get_cognito_config(master).issuer
+
 
 def login(master, username, password):
   """
@@ -68,10 +205,9 @@ def login(master, username, password):
   if getattr(master.settings, 'NO_AUTH', False):
     return no_auth_login(master, username)
   
-  import boto3
   from botocore.exceptions import ClientError
   
-  client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+  client = get_cognito_client(master)
   
   try:
     # SECRET_HASHが必要な場合は計算
@@ -81,15 +217,15 @@ def login(master, username, password):
     }
     
     # Cognito設定を取得
-    cognito_settings = get_cognito_settings(master)
+    config = get_cognito_config(master)
     
     # CLIENT_SECRETが設定されている場合はSECRET_HASHを追加
-    if cognito_settings.get('CLIENT_SECRET'):
+    if config.client_secret:
       auth_params['SECRET_HASH'] = _calculate_secret_hash(master, username)
     
     response = client.admin_initiate_auth(
-      UserPoolId=cognito_settings['USER_POOL_ID'],
-      ClientId=cognito_settings['CLIENT_ID'],
+      UserPoolId=config.user_pool_id,
+      ClientId=config.client_id,
       AuthFlow='ADMIN_USER_PASSWORD_AUTH',
       AuthParameters=auth_params
     )
@@ -106,11 +242,13 @@ def login(master, username, password):
     master.request.username = master.request.decode_token.get('cognito:username')
     master.request.auth = True
     master.request.set_cookie = True
+    # セッション固定攻撃を防ぐため、ログイン時は常にセッションIDを変える
+    master.request.new_session = True
     
     return True
     
   except ClientError as e:
-    master.logger.exception(f"ログインエラー: {e}")
+    master.logger.exception("ログインエラー: %s", e)
     return False
 
 def signup(master, username, email, password):
@@ -137,10 +275,9 @@ def signup(master, username, email, password):
   if getattr(master.settings, 'NO_AUTH', False):
     return no_auth_login(master, username)
   
-  import boto3
   from botocore.exceptions import ClientError
   
-  client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+  client = get_cognito_client(master)
   
   try:
     # ユーザー属性
@@ -159,22 +296,22 @@ def signup(master, username, email, password):
     }
     
     # Cognito設定を取得
-    cognito_settings = get_cognito_settings(master)
+    config = get_cognito_config(master)
     
     # CLIENT_SECRETが設定されている場合はSECRET_HASHを追加
-    if cognito_settings.get('CLIENT_SECRET'):
+    if config.client_secret:
       signup_params['SecretHash'] = _calculate_secret_hash(master, username)
     
     response = client.sign_up(
-      ClientId=cognito_settings['CLIENT_ID'],
+      ClientId=config.client_id,
       **signup_params
     )
     
-    master.logger.info(f"サインアップ成功: UserSub={response.get('UserSub')}")
+    master.logger.info("サインアップ成功: UserSub=%s", response.get('UserSub'))
     return True
     
   except ClientError as e:
-    master.logger.exception(f"サインアップエラー: {e}")
+    master.logger.exception("サインアップエラー: %s", e)
     return False
 
 def verify(master, username, code):
@@ -191,13 +328,12 @@ def verify(master, username, code):
   """
   # NO_AUTHモードの場合、常に成功
   if getattr(master.settings, 'NO_AUTH', False):
-    master.logger.debug(f"NO_AUTHモード: ユーザー {username} の確認をスキップ")
+    master.logger.debug("NO_AUTHモード: ユーザー %s の確認をスキップ", username)
     return True
   
-  import boto3
   from botocore.exceptions import ClientError
   
-  client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+  client = get_cognito_client(master)
   
   try:
     # 確認パラメータ
@@ -207,22 +343,22 @@ def verify(master, username, code):
     }
     
     # Cognito設定を取得
-    cognito_settings = get_cognito_settings(master)
+    config = get_cognito_config(master)
     
     # CLIENT_SECRETが設定されている場合はSECRET_HASHを追加
-    if cognito_settings.get('CLIENT_SECRET'):
+    if config.client_secret:
       confirm_params['SecretHash'] = _calculate_secret_hash(master, username)
     
     response = client.confirm_sign_up(
-      ClientId=cognito_settings['CLIENT_ID'],
+      ClientId=config.client_id,
       **confirm_params
     )
     
-    master.logger.info(f"メールアドレス確認成功: ユーザー {username}")
+    master.logger.info("メールアドレス確認成功: ユーザー %s", username)
     return True
     
   except ClientError as e:
-    master.logger.exception(f"メールアドレス確認エラー: {e}")
+    master.logger.exception("メールアドレス確認エラー: %s", e)
     return False
 
 
@@ -257,6 +393,10 @@ def set_auth_by_cookie(master):
   
   id_token, refresh_token, access_token = tokens
   
+  # 署名付き認証Cookieが有効な場合はJWTの検証を省略
+  if _set_auth_by_signed_cookie(master, id_token, refresh_token, access_token):
+    return True
+  
   try:
     from jwt import ExpiredSignatureError, InvalidTokenError
     
@@ -283,6 +423,7 @@ def set_auth_by_cookie(master):
       refresh_token=refresh_token
     )
     master.request.auth = True
+    master.request.issue_signed_cookie = True
     return True
     
   except ExpiredSignatureError:
@@ -319,9 +460,20 @@ def add_set_cookie_to_header(master, response):
     # NO_AUTHモードの場合、簡易Cookie削除
     if getattr(master.settings, 'NO_AUTH', False):
       cookies = _generate_no_auth_clear_cookies()
+    elif sessions.is_enabled(master):
+      cookies = _generate_session_clear_cookies(master)
     else:
       cookies = _generate_clear_cookies()
   
+  # 署名付き認証Cookieの発行・削除
+  if _signed_cookie_enabled(master):
+    if master.request.clean_cookie and not master.request.set_cookie:
+      cookies = (cookies or []) + [_generate_signed_cookie_clear()]
+    elif master.request.auth and (master.request.set_cookie or master.request.issue_signed_cookie):
+      signed_cookie = _generate_signed_cookie(master)
+      if signed_cookie:
+        cookies = (cookies or []) + [signed_cookie]
+  
   if cookies is None:
     return response
   
@@ -353,13 +505,12 @@ def change_password(master, previous_password, new_password):
   
   # NO_AUTHモードの場合、常に成功
   if getattr(master.settings, 'NO_AUTH', False):
-    master.logger.debug(f"NO_AUTHモード: ユーザー {master.request.username} のパスワード変更をスキップ")
+    master.logger.debug("NO_AUTHモード: ユーザー %s のパスワード変更をスキップ", master.request.username)
     return True
   
-  import boto3
   from botocore.exceptions import ClientError
   
-  client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+  client = get_cognito_client(master)
   
   try:
     # パスワード変更パラメータ
@@ -374,7 +525,7 @@ def change_password(master, previous_password, new_password):
     
     response = client.change_password(**change_params)
     
-    master.logger.info(f"パスワード変更成功: ユーザー {master.request.username}")
+    master.logger.info("パスワード変更成功: ユーザー %s", master.request.username)
     return True
     
   except ClientError as e:
@@ -386,9 +537,9 @@ def change_password(master, previous_password, new_password):
     elif error_code == 'LimitExceededException':
       master.logger.error("パスワード変更の試行回数が制限を超えました")
     else:
-      master.logger.error(f"パスワード変更エラー: {error_code}")
+      master.logger.error("パスワード変更エラー: %s", error_code)
     
-    master.logger.exception(f"パスワード変更エラー: {e}")
+    master.logger.exception("パスワード変更エラー: %s", e)
     return False
 
 def forgot_password(master, username):
@@ -404,13 +555,12 @@ def forgot_password(master, username):
   """
   # NO_AUTHモードの場合、常に成功
   if getattr(master.settings, 'NO_AUTH', False):
-    master.logger.debug(f"NO_AUTHモード: ユーザー {username} のパスワードリセット確認コード送信をスキップ")
+    master.logger.debug("NO_AUTHモード: ユーザー %s のパスワードリセット確認コード送信をスキップ", username)
     return True
   
-  import boto3
   from botocore.exceptions import ClientError
   
-  client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+  client = get_cognito_client(master)
   
   try:
     # パスワードリセット確認コード送信パラメータ
@@ -419,32 +569,32 @@ def forgot_password(master, username):
     }
     
     # Cognito設定を取得
-    cognito_settings = get_cognito_settings(master)
+    config = get_cognito_config(master)
     
     # CLIENT_SECRETが設定されている場合はSECRET_HASHを追加
-    if cognito_settings.get('CLIENT_SECRET'):
+    if config.client_secret:
       forgot_params['SecretHash'] = _calculate_secret_hash(master, username)
     
     response = client.forgot_password(
-      ClientId=cognito_settings['CLIENT_ID'],
+      ClientId=config.client_id,
       **forgot_params
     )
     
-    master.logger.info(f"パスワードリセット確認コード送信成功: ユーザー {username}")
+    master.logger.info("パスワードリセット確認コード送信成功: ユーザー %s", username)
     return True
     
   except ClientError as e:
     error_code = e.response['Error']['Code']
     if error_code == 'UserNotFoundException':
-      master.logger.error(f"ユーザーが存在しません: {username}")
+      master.logger.error("ユーザーが存在しません: %s", username)
     elif error_code == 'InvalidParameterException':
       master.logger.error("無効なパラメータです")
     elif error_code == 'LimitExceededException':
       master.logger.error("パスワードリセットの試行回数が制限を超えました")
     else:
-      master.logger.error(f"パスワードリセット確認コード送信エラー: {error_code}")
+      master.logger.error("パスワードリセット確認コード送信エラー: %s", error_code)
     
-    master.logger.exception(f"パスワードリセット確認コード送信エラー: {e}")
+    master.logger.exception("パスワードリセット確認コード送信エラー: %s", e)
     return False
 
 def confirm_forgot_password(master, username, confirmation_code, new_password):
@@ -462,13 +612,12 @@ def confirm_forgot_password(master, username, confirmation_code, new_password):
   """
   # NO_AUTHモードの場合、常に成功
   if getattr(master.settings, 'NO_AUTH', False):
-    master.logger.debug(f"NO_AUTHモード: ユーザー {username} のパスワードリセット確認をスキップ")
+    master.logger.debug("NO_AUTHモード: ユーザー %s のパスワードリセット確認をスキップ", username)
     return True
   
-  import boto3
   from botocore.exceptions import ClientError
   
-  client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+  client = get_cognito_client(master)
   
   try:
     # パスワードリセット確認パラメータ
@@ -479,24 +628,24 @@ def confirm_forgot_password(master, username, confirmation_code, new_password):
     }
     
     # Cognito設定を取得
-    cognito_settings = get_cognito_settings(master)
+    config = get_cognito_config(master)
     
     # CLIENT_SECRETが設定されている場合はSECRET_HASHを追加
-    if cognito_settings.get('CLIENT_SECRET'):
+    if config.client_secret:
       confirm_params['SecretHash'] = _calculate_secret_hash(master, username)
     
     response = client.confirm_forgot_password(
-      ClientId=cognito_settings['CLIENT_ID'],
+      ClientId=config.client_id,
       **confirm_params
     )
     
-    master.logger.info(f"パスワードリセット確認成功: ユーザー {username}")
+    master.logger.info("パスワードリセット確認成功: ユーザー %s", username)
     return True
     
   except ClientError as e:
     error_code = e.response['Error']['Code']
     if error_code == 'UserNotFoundException':
-      master.logger.error(f"ユーザーが存在しません: {username}")
+      master.logger.error("ユーザーが存在しません: %s", username)
     elif error_code == 'CodeMismatchException':
       master.logger.error("確認コードが正しくありません")
     elif error_code == 'ExpiredCodeException':
@@ -506,9 +655,9 @@ def confirm_forgot_password(master, username, confirmation_code, new_password):
     elif error_code == 'LimitExceededException':
       master.logger.error("パスワードリセットの試行回数が制限を超えました")
     else:
-      master.logger.error(f"パスワードリセット確認エラー: {error_code}")
+      master.logger.error("パスワードリセット確認エラー: %s", error_code)
     
-    master.logger.exception(f"パスワードリセット確認エラー: {e}")
+    master.logger.exception("パスワードリセット確認エラー: %s", e)
     return False
 
 def sign_out(master):
@@ -528,8 +677,7 @@ def sign_out(master):
   if getattr(master.settings, 'NO_AUTH', False):
     _no_auth_sign_out(master)
   else:
-    import boto3
-    client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+    client = get_cognito_client(master)
     
     try:
       client.global_sign_out(AccessToken=master.request.access_token)
@@ -721,64 +869,104 @@ def no_auth_login(master, username):
 
 
 
+# 検証に失敗したトークンのネガティブキャッシュ（初回使用時に作成）
+_rejected_tokens = None
+
+def _get_rejected_tokens(master):
+  """ネガティブキャッシュを取得（AUTH_NEGATIVE_CACHE_TTLが0の場合はNone）"""
+  global _rejected_tokens
+  
+  ttl = getattr(master.settings, 'AUTH_NEGATIVE_CACHE_TTL', 60)
+  if not ttl:
+    return None
+  if _rejected_tokens is None:
+    _rejected_tokens = TTLCache(maxsize=getattr(master.settings, 'AUTH_NEGATIVE_CACHE_SIZE', 4096), ttl=ttl)
+  return _rejected_tokens
+
+def _reject_token(master, digest):
+  """トークンをネガティブキャッシュに登録してクッキーをクリア"""
+  rejected_tokens = _get_rejected_tokens(master)
+  if rejected_tokens is not None:
+    rejected_tokens.set(digest, True)
+  master.request.clean_cookie = True
+
+def get_negative_cache_stats():
+  """
+  ネガティブキャッシュの統計情報を取得
+  
+  Returns:
+    dict: TTLCache.stats()（hitsが検証を省略して拒否したトークンの数）
+  """
+  if _rejected_tokens is None:
+    return {"size": 0, "maxsize": 0, "hits": 0, "misses": 0, "evictions": 0}
+  return _rejected_tokens.stats()
+
 def _decode_id_token(master, id_token, verify=True):
   """IDトークンをデコード"""
   if verify:
-    from jwt import decode, PyJWKClient
-    from jwt.exceptions import PyJWKClientError, InvalidTokenError, ExpiredSignatureError
+    from jwt import decode
+    from jwt.exceptions import PyJWKClientError, PyJWKClientConnectionError, InvalidTokenError, ExpiredSignatureError
     import logging
     import json
     import base64
     
+    # 最近拒否したトークンは解析・署名検証・ログ出力をせずに拒否
+    digest = hashlib.sha256(id_token.encode('utf-8')).digest()
+    rejected_tokens = _get_rejected_tokens(master)
+    if rejected_tokens is not None and rejected_tokens.get(digest) is not None:
+      master.request.clean_cookie = True
+      return None
+    
+    # 設定の不備はトークンの問題ではないため、ネガティブキャッシュに入れずにそのまま送出する
+    config = get_cognito_config(master)
+    expected_issuer = config.issuer
+    
     # 事前チェック: トークンのissuerを確認（完全な検証前の早期チェック）
     try:
       # JWTヘッダーとペイロードを取得（署名検証なし）
       header, payload, signature = id_token.split('.')
       decoded_payload = json.loads(base64.urlsafe_b64decode(payload + '=='))
-      
-      # 期待されるissuerを生成
-      cognito_settings = get_cognito_settings(master)
-      expected_issuer = f'https://cognito-idp.{master.settings.REGION}.amazonaws.com/{cognito_settings["USER_POOL_ID"]}'
-      
-      # issuerが一致しない場合は早期リターン
-      if decoded_payload.get('iss') != expected_issuer:
-        logging.warning(f"Token issuer mismatch. Expected: {expected_issuer}, Got: {decoded_payload.get('iss')}")
-        master.request.clean_cookie = True
-        return None
-        
     except Exception as e:
-      logging.warning(f"Failed to pre-validate token: {e}")
+      logging.warning("Failed to pre-validate token: %s", e)
+      _reject_token(master, digest)
       return None
     
-    cognito_settings = get_cognito_settings(master)
-    jwk_client = PyJWKClient(
-      f'https://cognito-idp.{master.settings.REGION}.amazonaws.com/{cognito_settings["USER_POOL_ID"]}/.well-known/jwks.json'
-    )
+    # issuerが一致しない場合は早期リターン
+    if not isinstance(decoded_payload, dict) or decoded_payload.get('iss') != expected_issuer:
+      iss = decoded_payload.get('iss') if isinstance(decoded_payload, dict) else None
+      logging.warning("Token issuer mismatch. Expected: %s, Got: %s", expected_issuer, iss)
+      _reject_token(master, digest)
+      return None
     
     try:
-      signing_key = jwk_client.get_signing_key_from_jwt(id_token)
+      # 署名鍵はコンテナ内でキャッシュされ、未知のkidの場合のみJWKSを再取得する
+      signing_key = config.jwk_client.get_signing_key_from_jwt(id_token)
       return decode(
         id_token,
         signing_key.key,
         algorithms=['RS256'],
-        audience=cognito_settings['CLIENT_ID'],
-        issuer=f'https://cognito-idp.{master.settings.REGION}.amazonaws.com/{cognito_settings["USER_POOL_ID"]}'
+        audience=config.audience,
+        issuer=config.issuer
       )
+    except PyJWKClientConnectionError as e:
+      # JWKSの取得失敗は一時的な障害の可能性があるためネガティブキャッシュには入れない
+      logging.error("Failed to fetch JWKS: %s", e)
+      return None
     except PyJWKClientError as e:
-      logging.warning(f"JWT signing key not found (likely from different User Pool): {e}")
+      logging.warning("JWT signing key not found (likely from different User Pool): %s", e)
       # Mark for cookie clearing to force re-authentication
-      master.request.clean_cookie = True
+      _reject_token(master, digest)
       return None
     except ExpiredSignatureError as e:
-      logging.warning(f"Invalid or expired JWT token: {e}")
+      logging.warning("Invalid or expired JWT token: %s", e)
       # ExpiredSignatureErrorは呼び出し元でリフレッシュ処理を行うため再発生
       raise e
     except InvalidTokenError as e:
-      logging.warning(f"Invalid JWT token: {e}")
-      master.request.clean_cookie = True
+      logging.warning("Invalid JWT token: %s", e)
+      _reject_token(master, digest)
       return None
     except Exception as e:
-      logging.error(f"Unexpected error during JWT verification: {e}")
+      logging.error("Unexpected error during JWT verification: %s", e)
       return None
   else:
     from jwt import decode
@@ -789,15 +977,7 @@ def _calculate_secret_hash(master, username):
   if username is None:
     raise ValueError("ユーザー名がNoneです")
   
-  cognito_settings = get_cognito_settings(master)
-  message = username + cognito_settings['CLIENT_ID']
-  dig = hmac.new(
-    cognito_settings['CLIENT_SECRET'].encode('utf-8'),
-    msg=message.encode('utf-8'),
-    digestmod=hashlib.sha256
-  ).digest()
-  
-  return base64.b64encode(dig).decode()
+  return get_cognito_config(master).secret_hash(username)
 
 def _extract_tokens_from_cookie(master):
   """Cookieからトークンを抽出"""
@@ -805,6 +985,10 @@ def _extract_tokens_from_cookie(master):
   if not cookies:
     return None
   
+  # セッションモードの場合はセッションIDからトークンを取得
+  if sessions.is_enabled(master):
+    return _extract_tokens_from_session(master, cookies)
+  
   id_token = None
   refresh_token = None
   access_token = None
@@ -826,12 +1010,105 @@ def _extract_tokens_from_cookie(master):
   
   return None
 
+def _extract_tokens_from_session(master, cookies):
+  """署名付きセッションIDのCookieからセッションを取得してトークンを抽出"""
+  session_id = sessions.get_session_id_from_cookie(master, cookies)
+  if session_id is None:
+    return None
+  
+  # 署名が不正、またはセッションが存在しない場合はクッキーをクリア
+  session = sessions.load(master, session_id) if session_id else None
+  if session is None:
+    master.request.clean_cookie = True
+    return None
+  
+  master.request.session_id = session_id
+  return session['id_token'], session['refresh_token'], session['access_token']
+
+def _signed_cookie_enabled(master):
+  """署名付き認証Cookieが有効か（settings.AUTH_SIGNED_COOKIE_MAX_AGEが正の値）"""
+  return (getattr(master.settings, 'AUTH_SIGNED_COOKIE_MAX_AGE', 0) or 0) > 0 \
+    and not getattr(master.settings, 'NO_AUTH', False)
+
+def _token_digest(token):
+  """署名付き認証Cookieをトークンに紐づけるための短いダイジェスト"""
+  return signing.b64encode(hashlib.sha256(token.encode('utf-8')).digest()[:16])
+
+def _set_auth_by_signed_cookie(master, id_token, refresh_token, access_token):
+  """
+  署名付き認証Cookieを検証して認証情報を設定（HMACの検証のみでRS256の検証は行わない）
+  
+  Returns:
+    bool: Cookieが有効で認証情報を設定した場合True
+  """
+  if not _signed_cookie_enabled(master):
+    return False
+  
+  value = None
+  for cookie in master.event['headers'].get('Cookie', '').split(';'):
+    name, _, cookie_value = cookie.strip().partition('=')
+    if name == SIGNED_AUTH_COOKIE_NAME:
+      value = cookie_value
+      break
+  if not value:
+    return False
+  
+  payload = signing.loads(value, _signed_cookie_key(master))
+  # 期限切れ・改ざん、または別のIDトークンに対して発行されたものはJWTの検証に戻る
+  if payload is None or payload.get('t') != _token_digest(id_token):
+    return False
+  
+  master.request.decode_token = payload['c']
+  master.request.username = payload['c'].get('cognito:username')
+  master.request.set_token(
+    access_token=access_token,
+    id_token=id_token,
+    refresh_token=refresh_token
+  )
+  master.request.auth = True
+  return True
+
+def _signed_cookie_key(master):
+  """署名付き認証Cookieの署名鍵（セッションCookieなどとは別の派生鍵）"""
+  return signing.derive_key(signing.get_secret_key(master), SIGNED_AUTH_COOKIE_PURPOSE)
+
+def _generate_signed_cookie(master):
+  """
+  検証済みのIDトークンから署名付き認証Cookieを生成
+  
+  有効期限はAUTH_SIGNED_COOKIE_MAX_AGE秒後とIDトークンのexpのうち早い方です。
+  
+  Returns:
+    str: Set-Cookieヘッダーの値（IDトークンの期限が近い場合はNone）
+  """
+  claims = master.request.decode_token or {}
+  now = int(time.time())
+  expires_at = now + master.settings.AUTH_SIGNED_COOKIE_MAX_AGE
+  if 'exp' in claims:
+    expires_at = min(expires_at, int(claims['exp']))
+  if expires_at <= now:
+    return None
+  
+  names = getattr(master.settings, 'AUTH_SIGNED_COOKIE_CLAIMS', ('sub', 'email'))
+  payload = {
+    'c': {name: claims[name] for name in ('cognito:username', 'exp', *names) if name in claims},
+    't': _token_digest(master.request.id_token),
+    'exp': expires_at,
+  }
+  cookie = (f"{SIGNED_AUTH_COOKIE_NAME}={signing.dumps(payload, _signed_cookie_key(master))}; "
+            f"Path=/; Max-Age={expires_at - now}; HttpOnly; SameSite=Lax")
+  if not master.local:
+    cookie += "; Secure"
+  return cookie
+
+def _generate_signed_cookie_clear():
+  """署名付き認証Cookie削除用の期限切れCookieを生成"""
+  return f"{SIGNED_AUTH_COOKIE_NAME}=; Path=/; Max-Age=0; HttpOnly; SameSite=Lax"
+
 def _refresh_tokens(master, refresh_token, old_id_token):
   """リフレッシュトークンで新しいトークンを取得"""
   master.logger.debug("トークンリフレッシュを開始")
-  import boto3
-  
-  client = boto3.client('cognito-idp', region_name=master.settings.REGION)
+  client = get_cognito_client(master)
   
   try:
     # 古いIDトークンからユーザー名を取得（署名検証なし）
@@ -847,11 +1124,11 @@ def _refresh_tokens(master, refresh_token, old_id_token):
     secret_hash = _calculate_secret_hash(master, username)
     
     # Cognito設定を取得
-    cognito_settings = get_cognito_settings(master)
+    config = get_cognito_config(master)
     
     # トークンをリフレッシュ
     response = client.initiate_auth(
-      ClientId=cognito_settings['CLIENT_ID'],
+      ClientId=config.client_id,
       AuthFlow='REFRESH_TOKEN_AUTH',
       AuthParameters={
         'REFRESH_TOKEN': refresh_token,
@@ -859,15 +1136,17 @@ def _refresh_tokens(master, refresh_token, old_id_token):
       }
     )
     
-    # 新しいトークンを設定
+    # 新しいトークンを設定（リフレッシュトークンのローテーションが有効な場合は新しいものが返る）
     new_id_token = response['AuthenticationResult']['IdToken']
     new_access_token = response['AuthenticationResult']['AccessToken']
+    new_refresh_token = response['AuthenticationResult'].get('RefreshToken')
+    master.request.refresh_token_rotated = bool(new_refresh_token) and new_refresh_token != refresh_token
     
     master.request.set_cookie = True
     master.request.set_token(
       access_token=new_access_token,
       id_token=new_id_token,
-      refresh_token=refresh_token
+      refresh_token=new_refresh_token or refresh_token
     )
     
     # 新しいIDトークンをデコード
@@ -881,11 +1160,11 @@ def _refresh_tokens(master, refresh_token, old_id_token):
       return False
     
     master.request.auth = True
-    master.logger.info(f"トークンリフレッシュ成功: ユーザー {master.request.username}")
+    master.logger.info("トークンリフレッシュ成功: ユーザー %s", master.request.username)
     return True
     
   except Exception as e:
-    master.logger.error(f"トークンリフレッシュ失敗: {str(e)}")
+    master.logger.error("トークンリフレッシュ失敗: %s", e)
     master.logger.exception(e)
     master.request.auth = False
     # Refresh tokenが期限切れなどでリフレッシュに失敗した場合もクッキーをクリア
@@ -899,6 +1178,10 @@ def _validate_token_response(response):
 
 def _generate_auth_cookies(master):
   """認証Cookieを生成"""
+  # セッションモードの場合はトークンをセッションに保存し、セッションIDのみをCookieにする
+  if sessions.is_enabled(master):
+    return _generate_session_cookies(master)
+  
   cookie = SimpleCookie()
   cookies = []
   
@@ -941,6 +1224,52 @@ def _generate_clear_cookies():
     cookie['refresh_token'].OutputString()
   ]
 
+def _generate_session_cookies(master):
+  """トークンをセッションに保存してセッションIDのCookieを生成"""
+  if master.request.session_id and not master.request.new_session:
+    # リフレッシュ後のトークンで既存のセッションを更新
+    updated = sessions.update_tokens(
+      master,
+      master.request.session_id,
+      id_token=master.request.id_token,
+      access_token=master.request.access_token,
+      refresh_token=master.request.refresh_token if master.request.refresh_token_rotated else None
+    )
+    if not updated:
+      # 別のタブやコンテナでサインアウト済みの場合はCookieを削除する
+      master.logger.info("セッションが削除されているためCookieを削除します")
+      master.request.session_id = None
+      return [sessions.generate_clear_cookie(master)]
+    return [sessions.generate_cookie(master, master.request.session_id)]
+
+  # ログイン時は新しいセッションIDでセッションを作成し、以前のセッションは削除する
+  old_session_id = master.request.session_id
+  master.request.session_id = sessions.create(
+    master,
+    id_token=master.request.id_token,
+    access_token=master.request.access_token,
+    refresh_token=master.request.refresh_token
+  )
+  master.request.new_session = False
+  if old_session_id:
+    try:
+      sessions.delete(master, old_session_id)
+    except Exception as e:
+      # 削除に失敗しても新しいセッションは有効（以前のセッションはTTLで失効する）
+      master.logger.error("セッション削除エラー: %s", e)
+  return [sessions.generate_cookie(master, master.request.session_id)]
+
+def _generate_session_clear_cookies(master):
+  """セッションを削除してセッションIDのCookie削除用の期限切れCookieを生成"""
+  if master.request.session_id:
+    try:
+      sessions.delete(master, master.request.session_id)
+    except Exception as e:
+      # 削除に失敗してもCookieは削除する（セッションはTTLで失効する）
+      master.logger.error("セッション削除エラー: %s", e)
+    master.request.session_id = None
+  return [sessions.generate_clear_cookie(master)]
+
 def _generate_no_auth_clear_cookies():
   """NO_AUTHモード用のCookie削除用の期限切れCookieを生成"""
   expired_date = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%a, %d %b %Y %H:%M:%S GMT')
@@ -0,0 +1,422 @@
+"""
+WAMBDA Lambdaパッケージの分析
+
+sam build の成果物（.aws-sam/build/<FunctionName>）をトップレベルのパッケージごとに分け、
+サイズ・インポート時間・アプリからの到達可能性を調べます。
+コールドスタートはパッケージのサイズとインポートするモジュールの数に応じて長くなるため、
+アプリから一度もインポートされないパッケージ（moto などテスト用のものを含む）を除外する候補として示します。
+
+  report = analyze('.aws-sam/build/MainFunction', source_dir='Lambda')
+  print(format_report(report))
+
+到達可能性はソースコードの静的解析（import文と lazy_import('...')・import_module('...') の文字列）で判定します。
+"""
+import ast
+import compileall
+import json
+import os
+import py_compile
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# テスト・開発時にのみ使われることが多いパッケージ（本番のパッケージには不要）
+DEV_ONLY_PACKAGES = frozenset({
+  "moto", "responses", "werkzeug", "xmltodict", "pytest", "_pytest", "pluggy", "iniconfig",
+  "mock", "coverage", "faker", "freezegun", "py", "pip", "wheel",
+})
+
+# アプリから静的にはインポートされなくても、他のパッケージが実行時に使うことがあるため除外候補にしないパッケージ
+# （pkg_resources はエントリポイントや名前空間パッケージの解決で動的にインポートされる）
+RUNTIME_PACKAGES = frozenset({"setuptools", "pkg_resources", "_distutils_hack"})
+
+# スリム化で削除するディレクトリ名（Pythonパッケージでない場合のみ。
+# botocore.docs や numpy.testing のように、__init__.py のあるものは実行時にインポートされることがある）
+STRIP_DIRS = frozenset({"tests", "test", "docs", "doc", "examples"})
+
+# スリム化で削除するファイルの拡張子
+STRIP_SUFFIXES = (".pyi", ".md", ".rst", ".c", ".h", ".pyx", ".pxd")
+
+_IMPORT_CALL_PATTERN = re.compile(r"""(?:lazy_import|import_module|__import__)\(\s*['"]([A-Za-z_][\w.]*)['"]""")
+
+_IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class Package:
+  """
+  トップレベルのパッケージ（またはモジュール）
+
+  Attributes:
+    name: インポート名（'boto3'）
+    paths: 成果物内のパス（パッケージのディレクトリ・モジュール・dist-info）
+    distribution: 配布パッケージ名（dist-infoから取得、アプリのコードはNone）
+    size: バイト数
+    files: ファイル数
+    app: アプリのコードかどうか
+    reachable: アプリから（間接的に）インポートされるかどうか
+    import_ms: インポート時間（ミリ秒、計測した場合のみ）
+  """
+  def __init__(self, name, distribution=None, app=False):
+    self.name = name
+    self.paths = []
+    self.distribution = distribution
+    self.size = 0
+    self.files = 0
+    self.app = app
+    self.reachable = False
+    self.import_ms = None
+
+  @property
+  def dev_only(self):
+    names = {self.name.lower()}
+    if self.distribution:
+      names.add(self.distribution.lower())
+    return bool(names & DEV_ONLY_PACKAGES)
+
+  @property
+  def runtime(self):
+    names = {self.name.lower()}
+    if self.distribution:
+      names.add(self.distribution.lower())
+    return bool(names & RUNTIME_PACKAGES)
+
+  def to_dict(self):
+    return {
+      "name": self.name,
+      "distribution": self.distribution,
+      "size": self.size,
+      "files": self.files,
+      "app": self.app,
+      "reachable": self.reachable,
+      "dev_only": self.dev_only,
+      "import_ms": self.import_ms,
+    }
+
+
+def _tree_size(path):
+  if os.path.isfile(path):
+    return os.path.getsize(path), 1
+  size = files = 0
+  for dirpath, _, filenames in os.walk(path):
+    for filename in filenames:
+      try:
+        size += os.path.getsize(os.path.join(dirpath, filename))
+      except OSError:
+        continue
+      files += 1
+  return size, files
+
+
+def _module_name(entry):
+  """成果物のトップレベルのエントリからインポート名を取得（対象外はNone）"""
+  if entry.endswith((".dist-info", ".egg-info")) or entry.startswith(".") or entry == "__pycache__":
+    return None
+  if entry.endswith(".py"):
+    return entry[:-3]
+  if entry.endswith((".so", ".pyd")):
+    return entry.split(".", 1)[0]
+  return entry
+
+
+def _read_distributions(build_dir):
+  """dist-infoからトップレベル名 -> (配布パッケージ名, dist-infoのパス) を取得"""
+  owners = {}
+  for entry in os.listdir(build_dir):
+    if not entry.endswith(".dist-info"):
+      continue
+    dist_info = os.path.join(build_dir, entry)
+    distribution = entry[:-len(".dist-info")].rsplit("-", 1)[0]
+    names = set()
+    top_level = os.path.join(dist_info, "top_level.txt")
+    if os.path.isfile(top_level):
+      with open(top_level) as f:
+        names = {line.strip() for line in f if line.strip()}
+    if not names and os.path.isfile(os.path.join(dist_info, "RECORD")):
+      # top_level.txt がない場合はRECORDに記録されたファイルから判定
+      with open(os.path.join(dist_info, "RECORD")) as f:
+        for line in f:
+          first = line.split(",", 1)[0].split("/", 1)[0]
+          name = _module_name(first)
+          if name and name != ".." and not first.endswith(".pth"):
+            names.add(name)
+    for name in names:
+      owners[name] = (distribution, dist_info)
+  return owners
+
+
+def _iter_py_files(path):
+  if os.path.isfile(path):
+    if path.endswith(".py"):
+      yield path
+    return
+  for dirpath, dirnames, filenames in os.walk(path):
+    # slim() と同じく、パッケージでない（インポートされない）テストのディレクトリだけを除く
+    dirnames[:] = [
+      name for name in dirnames
+      if name != "__pycache__"
+      and not (name in ("tests", "test") and not os.path.isfile(os.path.join(dirpath, name, "__init__.py")))
+    ]
+    for filename in filenames:
+      if filename.endswith(".py"):
+        yield os.path.join(dirpath, filename)
+
+
+def imported_names(path):
+  """
+  ファイルまたはディレクトリ内の .py がインポートするトップレベル名を取得
+
+  import文に加え、lazy_import('boto3')・importlib.import_module('jinja2') のような文字列での指定も対象とします。
+  相対インポートは対象外です。
+  """
+  names = set()
+  for file_path in _iter_py_files(path):
+    try:
+      with open(file_path, "rb") as f:
+        source = f.read()
+      tree = ast.parse(source, file_path)
+    except (SyntaxError, ValueError, OSError):
+      continue
+    for node in ast.walk(tree):
+      if isinstance(node, ast.Import):
+        names.update(alias.name.split(".", 1)[0] for alias in node.names)
+      elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+        names.add(node.module.split(".", 1)[0])
+    names.update(match.split(".", 1)[0] for match in _IMPORT_CALL_PATTERN.findall(source.decode("utf-8", "replace")))
+  return names
+
+
+def measure_import_time(build_dir, name, python=None):
+  """
+  成果物をsys.pathの先頭にした新しいプロセスでインポート時間を計測（-X importtime の累積値）
+
+  Returns:
+    float: ミリ秒（インポートに失敗した場合はNone）
+  """
+  code = f"import sys; sys.path.insert(0, {build_dir!r}); import {name}"
+  result = subprocess.run(
+    [python or sys.executable, "-X", "importtime", "-c", code],
+    capture_output=True, text=True
+  )
+  if result.returncode != 0:
+    return None
+  for line in result.stderr.splitlines():
+    match = _IMPORTTIME_PATTERN.match(line)
+    if match and match[4] == name and len(match[3]) == 1:
+      return int(match[2]) / 1000
+  return None
+
+
+def analyze(build_dir, source_dir=None, entry_modules=None, import_time=False, max_workers=1):
+  """
+  Lambdaの成果物を分析
+
+  Args:
+    build_dir: sam build の成果物のディレクトリ
+    source_dir: アプリのソースディレクトリ（CodeUri）。ここにあるトップレベル名をアプリのコードとして扱う
+    entry_modules: 到達可能性の起点とするトップレベル名（省略時はアプリのコードすべて）
+    import_time: Trueの場合、各パッケージのインポート時間を計測する
+    max_workers: インポート時間の計測の並行数（並行に計測すると互いに干渉して値が大きくなる）
+
+  Returns:
+    dict: {'build_dir', 'total_size', 'packages': [Package, ...]}（サイズの大きい順）
+  """
+  build_dir = os.path.abspath(build_dir)
+  if not os.path.isdir(build_dir):
+    raise FileNotFoundError(f"成果物のディレクトリが見つかりません: {build_dir}")
+
+  owners = _read_distributions(build_dir)
+  app_names = None
+  if source_dir and os.path.isdir(source_dir):
+    app_names = {name for name in map(_module_name, os.listdir(source_dir)) if name}
+
+  packages = {}
+  for entry in sorted(os.listdir(build_dir)):
+    name = _module_name(entry)
+    if name is None:
+      continue
+    distribution = owners.get(name, (None, None))[0]
+    is_app = name in app_names if app_names is not None else distribution is None
+    package = packages.get(name)
+    if package is None:
+      package = packages[name] = Package(name, distribution, is_app)
+    package.paths.append(os.path.join(build_dir, entry))
+
+  # dist-infoのサイズは、それが提供するパッケージのうち最初のものに加算する
+  assigned = set()
+  for name, (distribution, dist_info) in sorted(owners.items()):
+    package = packages.get(name)
+    if package is not None and dist_info not in assigned:
+      package.paths.append(dist_info)
+      assigned.add(dist_info)
+
+  for package in packages.values():
+    for path in package.paths:
+      size, files = _tree_size(path)
+      package.size += size
+      package.files += files
+
+  # アプリのコードから幅優先でインポートをたどる
+  if entry_modules is None:
+    entry_modules = [name for name, package in packages.items() if package.app]
+  pending = [name for name in entry_modules if name in packages]
+  while pending:
+    name = pending.pop()
+    package = packages[name]
+    if package.reachable:
+      continue
+    package.reachable = True
+    for path in package.paths:
+      if path.endswith((".dist-info", ".egg-info")):
+        continue
+      for imported in imported_names(path):
+        if imported in packages and not packages[imported].reachable:
+          pending.append(imported)
+
+  if import_time:
+    targets = [package for package in packages.values() if not package.app]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+      for package, elapsed in zip(targets, executor.map(lambda p: measure_import_time(build_dir, p.name), targets)):
+        package.import_ms = elapsed
+
+  ordered = sorted(packages.values(), key=lambda p: (-p.size, p.name))
+  return {
+    "build_dir": build_dir,
+    "total_size": sum(p.size for p in ordered),
+    "packages": ordered,
+  }
+
+
+def suggest_exclusions(report):
+  """除外の候補（アプリから到達しないパッケージ）を取得"""
+  return [p for p in report["packages"] if not p.app and not p.runtime and not p.reachable]
+
+
+def dev_only_warnings(report):
+  """アプリからインポートされる開発用のパッケージ（除外するとインポートに失敗するため警告のみ）を取得"""
+  return [p for p in report["packages"] if not p.app and p.reachable and p.dev_only]
+
+
+def _format_size(size):
+  for unit in ("B", "KB", "MB"):
+    if size < 1024 or unit == "MB":
+      return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+    size /= 1024
+
+
+def format_report(report):
+  """分析結果を表形式の文字列にする"""
+  total = report["total_size"] or 1
+  rows = [("package", "distribution", "size", "share", "files", "import", "status")]
+  for p in report["packages"]:
+    if p.app:
+      status = "app"
+    elif p.dev_only:
+      status = "dev-only" + ("" if p.reachable else ", unused")
+    elif p.runtime and not p.reachable:
+      status = "unused, kept"
+    else:
+      status = "used" if p.reachable else "unused"
+    rows.append((
+      p.name, p.distribution or "-", _format_size(p.size), f"{p.size / total * 100:.1f}%",
+      str(p.files), f"{p.import_ms:.1f}ms" if p.import_ms is not None else "-", status,
+    ))
+  widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+  lines = [
+    "  ".join(cell.rjust(width) if i in (2, 3, 4, 5) else cell.ljust(width) for i, (cell, width) in enumerate(zip(row, widths))).rstrip()
+    for row in rows
+  ]
+  lines.append(f"total: {_format_size(report['total_size'])} in {report['build_dir']}")
+  excluded = suggest_exclusions(report)
+  if excluded:
+    saved = sum(p.size for p in excluded)
+    distributions = sorted({p.distribution or p.name for p in excluded})
+    lines.append("")
+    lines.append(f"Suggested exclusions ({_format_size(saved)}, {saved / total * 100:.1f}%): {', '.join(distributions)}")
+    lines.append("  Move them from requirements.txt to a dev requirements file, or build a slim artifact with --slim.")
+  warnings = dev_only_warnings(report)
+  if warnings:
+    lines.append("")
+    lines.append(f"Warning: dev-only packages imported by the app (not excluded): {', '.join(p.name for p in warnings)}")
+    lines.append("  Check that these imports are not reachable in production before removing them.")
+  return "\n".join(lines)
+
+
+def report_to_json(report):
+  return json.dumps({
+    "build_dir": report["build_dir"],
+    "total_size": report["total_size"],
+    "packages": [p.to_dict() for p in report["packages"]],
+    "suggested_exclusions": [p.name for p in suggest_exclusions(report)],
+    "dev_only_warnings": [p.name for p in dev_only_warnings(report)],
+  }, indent=2)
+
+
+def slim(report, output_dir, exclude=(), strip_dist_info=True, compile_pyc=True):
+  """
+  スリム化した成果物を作成
+
+  除外したパッケージ・パッケージ内のテストとドキュメント・dist-info を除いてコピーし、
+  .pyc を事前にコンパイルします（ハッシュで検証しない形式のため、zip展開でmtimeが変わっても再コンパイルされない）。
+  .pyc はこのコマンドを実行したPythonのバージョン用に生成されるため、Lambdaのランタイムと同じバージョンで実行してください。
+
+  Args:
+    report: analyze()の結果
+    output_dir: 出力ディレクトリ（存在する場合は置き換える）
+    exclude: 除外するパッケージ名（インポート名または配布パッケージ名）
+    strip_dist_info: Trueの場合、dist-infoを削除する（importlib.metadataを使うパッケージがある場合はFalse）
+    compile_pyc: Trueの場合、.pycを事前にコンパイルする
+
+  Returns:
+    int: 出力のバイト数
+  """
+  build_dir = report["build_dir"]
+  output_dir = os.path.abspath(output_dir)
+  if output_dir == build_dir or output_dir.startswith(build_dir + os.sep):
+    raise ValueError("出力ディレクトリには成果物の外のディレクトリを指定してください")
+  exclude = {name.lower() for name in exclude}
+  if os.path.exists(output_dir):
+    shutil.rmtree(output_dir)
+  os.makedirs(output_dir)
+
+  def ignore(directory, names):
+    ignored = set()
+    for name in names:
+      path = os.path.join(directory, name)
+      if os.path.isdir(path):
+        if (
+          name == "__pycache__"
+          or (name in STRIP_DIRS and not os.path.isfile(os.path.join(path, "__init__.py")))
+          or (strip_dist_info and name.endswith((".dist-info", ".egg-info")))
+        ):
+          ignored.add(name)
+      elif name.endswith(STRIP_SUFFIXES) or name.endswith(".pyc"):
+        ignored.add(name)
+    return ignored
+
+  excluded_paths = set()
+  for p in report["packages"]:
+    if p.name.lower() in exclude or (p.distribution and p.distribution.lower() in exclude):
+      excluded_paths.update(p.paths)
+
+  for entry in sorted(os.listdir(build_dir)):
+    source = os.path.join(build_dir, entry)
+    if source in excluded_paths or entry == "__pycache__":
+      continue
+    if strip_dist_info and entry.endswith((".dist-info", ".egg-info")):
+      continue
+    target = os.path.join(output_dir, entry)
+    if os.path.isdir(source):
+      # アプリのコードはそのままコピーする（テストなども含めて削除しない）
+      app = any(p.app and source in p.paths for p in report["packages"])
+      shutil.copytree(source, target, ignore=None if app else ignore, symlinks=True)
+    else:
+      shutil.copy2(source, target)
+
+  if compile_pyc:
+    compileall.compile_dir(
+      output_dir, quiet=1, workers=0,
+      invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH
+    )
+  return _tree_size(output_dir)[0]
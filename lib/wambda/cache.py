@@ -0,0 +1,95 @@
+"""
+WAMBDA キャッシュ
+
+Lambdaコンテナ内でウォームスタート間に保持される、TTL付きLRUキャッシュを提供します。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+  """
+  スレッドセーフなTTL付きLRUキャッシュ
+
+  Attributes:
+    hits: ヒット数
+    misses: ミス数（期限切れを含む）
+    evictions: 容量超過による追い出し数
+  """
+  def __init__(self, maxsize=1024, ttl=None):
+    """
+    Args:
+      maxsize: 最大件数（超えた場合は最も古く使われたものから追い出す）
+      ttl: 有効期限の秒数（Noneの場合は無期限）
+    """
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self._data = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key, default=None):
+    """キーの値を取得（存在しないか期限切れの場合はdefault）"""
+    with self._lock:
+      entry = self._data.get(key, MISSING)
+      if entry is not MISSING:
+        value, expires_at = entry
+        if expires_at is None or expires_at > time.monotonic():
+          self._data.move_to_end(key)
+          self.hits += 1
+          return value
+        del self._data[key]
+      self.misses += 1
+      return default
+
+  def set(self, key, value, ttl=MISSING):
+    """
+    キーに値を設定
+
+    Args:
+      key: キー
+      value: 値
+      ttl: この項目の有効期限の秒数（省略時はキャッシュのttl）
+    """
+    ttl = self.ttl if ttl is MISSING else ttl
+    expires_at = time.monotonic() + ttl if ttl is not None else None
+    with self._lock:
+      self._data[key] = (value, expires_at)
+      self._data.move_to_end(key)
+      while len(self._data) > self.maxsize:
+        self._data.popitem(last=False)
+        self.evictions += 1
+
+  def pop(self, key, default=None):
+    """キーを削除して値を返す"""
+    with self._lock:
+      entry = self._data.pop(key, MISSING)
+    return default if entry is MISSING else entry[0]
+
+  def clear(self):
+    """すべてのキーを削除"""
+    with self._lock:
+      self._data.clear()
+
+  def __contains__(self, key):
+    with self._lock:
+      entry = self._data.get(key, MISSING)
+    return entry is not MISSING and (entry[1] is None or entry[1] > time.monotonic())
+
+  def __len__(self):
+    return len(self._data)
+
+  def stats(self):
+    """統計情報を取得"""
+    return {
+      "size": len(self._data),
+      "maxsize": self.maxsize,
+      "hits": self.hits,
+      "misses": self.misses,
+      "evictions": self.evictions,
+    }
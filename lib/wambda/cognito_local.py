@@ -0,0 +1,364 @@
+"""
+WAMBDA ローカルCognitoサーバー
+
+認証処理（login・_refresh_tokens・_decode_id_tokenなど）をオフラインで
+結合テスト・負荷テストするための、Cognito User Poolの簡易エミュレーターです。
+
+- RS256で署名したID・アクセス・リフレッシュトークンを発行
+- `/<user_pool_id>/.well-known/jwks.json` でJWKSを配信（PyJWKClientで取得可能）
+- cognito-idp の主要なAPI（AWS JSON 1.1）を実装
+- 応答の遅延を注入可能
+
+  wambda-admin.py cognito --pool-id ap-northeast-1_local --client-id local --user alice:Passw0rd!
+
+  # settings.py
+  COGNITO_ENDPOINT_URL = 'http://localhost:9229'
+  COGNITO_ISSUER_URL = 'http://localhost:9229'
+
+ユーザーやトークンはメモリ上にのみ保持され、サーバーを停止すると消えます。
+"""
+import base64
+import hashlib
+import hmac
+import http.server
+import json
+import random
+import secrets
+import threading
+import time
+import uuid
+
+TARGET_PREFIX = "AWSCognitoIdentityProviderService."
+
+
+class CognitoError(Exception):
+  """Cognitoのエラーレスポンス（__typeとmessage）"""
+  def __init__(self, error_type, message, status=400):
+    super().__init__(message)
+    self.error_type = error_type
+    self.message = message
+    self.status = status
+
+
+class UserPool:
+  """
+  メモリ上のUser Pool
+
+  Attributes:
+    pool_id: User Pool ID
+    client_id: アプリクライアントID
+    client_secret: アプリクライアントシークレット（Noneの場合はSECRET_HASHを検証しない）
+    issuer: トークンのiss（issuer_url + '/' + pool_id）
+  """
+  def __init__(self, pool_id, client_id, client_secret=None, issuer_url="http://localhost:9229",
+               token_ttl=3600, confirmation_code="123456"):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    self.pool_id = pool_id
+    self.client_id = client_id
+    self.client_secret = client_secret
+    self.issuer = f"{issuer_url.rstrip('/')}/{pool_id}"
+    self.token_ttl = token_ttl
+    self.confirmation_code = confirmation_code
+    self.users = {}
+    self.refresh_tokens = {}
+    self.revoked_access_tokens = set()
+    self._lock = threading.Lock()
+    self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    self._kid = uuid.uuid4().hex
+
+  def add_user(self, username, password, email=None, confirmed=True):
+    """ユーザーを追加"""
+    with self._lock:
+      self.users[username] = {
+        "password": password,
+        "email": email or f"{username}@example.com",
+        "sub": str(uuid.uuid4()),
+        "confirmed": confirmed,
+      }
+
+  def jwks(self):
+    """JWKSの辞書を取得"""
+    from jwt.algorithms import RSAAlgorithm
+    jwk = json.loads(RSAAlgorithm.to_jwk(self._private_key.public_key()))
+    jwk.update({"kid": self._kid, "alg": "RS256", "use": "sig"})
+    return {"keys": [jwk]}
+
+  # トークン
+
+  def _encode(self, claims):
+    import jwt
+    return jwt.encode(claims, self._private_key, algorithm="RS256", headers={"kid": self._kid})
+
+  def _issue_tokens(self, username, refresh_token=None):
+    user = self.users[username]
+    now = int(time.time())
+    common = {"sub": user["sub"], "iss": self.issuer, "auth_time": now, "iat": now, "exp": now + self.token_ttl}
+    id_token = self._encode(dict(
+      common, aud=self.client_id, token_use="id", email=user["email"], email_verified=True,
+      **{"cognito:username": username}
+    ))
+    access_token = self._encode(dict(
+      common, client_id=self.client_id, token_use="access", username=username,
+      scope="aws.cognito.signin.user.admin", jti=str(uuid.uuid4())
+    ))
+    result = {
+      "IdToken": id_token,
+      "AccessToken": access_token,
+      "ExpiresIn": self.token_ttl,
+      "TokenType": "Bearer",
+    }
+    if refresh_token is None:
+      refresh_token = secrets.token_urlsafe(48)
+      with self._lock:
+        self.refresh_tokens[refresh_token] = username
+      result["RefreshToken"] = refresh_token
+    return {"AuthenticationResult": result, "ChallengeParameters": {}}
+
+  def _username_from_access_token(self, access_token):
+    import jwt
+    try:
+      claims = jwt.decode(access_token, self._private_key.public_key(), algorithms=["RS256"], issuer=self.issuer)
+    except jwt.InvalidTokenError:
+      raise CognitoError("NotAuthorizedException", "Invalid Access Token")
+    if claims.get("jti") in self.revoked_access_tokens:
+      raise CognitoError("NotAuthorizedException", "Access Token has been revoked")
+    return claims["username"]
+
+  # 検証
+
+  def _check_client(self, client_id):
+    if client_id != self.client_id:
+      raise CognitoError("ResourceNotFoundException", f"User pool client {client_id} does not exist.")
+
+  def _check_secret_hash(self, username, secret_hash):
+    if self.client_secret is None:
+      return
+    expected = base64.b64encode(hmac.new(
+      self.client_secret.encode("utf-8"),
+      msg=(username + self.client_id).encode("utf-8"),
+      digestmod=hashlib.sha256
+    ).digest()).decode()
+    if not secret_hash or not hmac.compare_digest(secret_hash, expected):
+      raise CognitoError("NotAuthorizedException", f"Client {self.client_id} is configured with secret but SECRET_HASH was not received or is invalid")
+
+  def _get_user(self, username):
+    user = self.users.get(username)
+    if user is None:
+      raise CognitoError("UserNotFoundException", "User does not exist.")
+    return user
+
+  def _password_auth(self, params):
+    username = params.get("USERNAME")
+    user = self.users.get(username)
+    if user is None or user["password"] != params.get("PASSWORD"):
+      raise CognitoError("NotAuthorizedException", "Incorrect username or password.")
+    if not user["confirmed"]:
+      raise CognitoError("UserNotConfirmedException", "User is not confirmed.")
+    self._check_secret_hash(username, params.get("SECRET_HASH"))
+    return self._issue_tokens(username)
+
+  def _refresh_auth(self, params):
+    refresh_token = params.get("REFRESH_TOKEN")
+    username = self.refresh_tokens.get(refresh_token)
+    if username is None:
+      raise CognitoError("NotAuthorizedException", "Invalid Refresh Token")
+    self._check_secret_hash(username, params.get("SECRET_HASH"))
+    return self._issue_tokens(username, refresh_token=refresh_token)
+
+  def _auth(self, body, password_flows):
+    self._check_client(body.get("ClientId"))
+    flow = body.get("AuthFlow")
+    params = body.get("AuthParameters") or {}
+    if flow in password_flows:
+      return self._password_auth(params)
+    if flow in ("REFRESH_TOKEN_AUTH", "REFRESH_TOKEN"):
+      return self._refresh_auth(params)
+    raise CognitoError("InvalidParameterException", f"Unsupported AuthFlow: {flow}")
+
+  # API（メソッド名はX-Amz-Targetの操作名）
+
+  def InitiateAuth(self, body):
+    return self._auth(body, ("USER_PASSWORD_AUTH",))
+
+  def AdminInitiateAuth(self, body):
+    if body.get("UserPoolId") != self.pool_id:
+      raise CognitoError("ResourceNotFoundException", f"User pool {body.get('UserPoolId')} does not exist.")
+    return self._auth(body, ("ADMIN_USER_PASSWORD_AUTH", "ADMIN_NO_SRP_AUTH"))
+
+  def GlobalSignOut(self, body):
+    import jwt
+    username = self._username_from_access_token(body.get("AccessToken"))
+    with self._lock:
+      self.revoked_access_tokens.add(jwt.decode(body["AccessToken"], options={"verify_signature": False})["jti"])
+      for token in [token for token, owner in self.refresh_tokens.items() if owner == username]:
+        del self.refresh_tokens[token]
+    return {}
+
+  def GetUser(self, body):
+    username = self._username_from_access_token(body.get("AccessToken"))
+    user = self._get_user(username)
+    return {
+      "Username": username,
+      "UserAttributes": [
+        {"Name": "sub", "Value": user["sub"]},
+        {"Name": "email", "Value": user["email"]},
+      ],
+    }
+
+  def SignUp(self, body):
+    self._check_client(body.get("ClientId"))
+    username = body.get("Username")
+    if username in self.users:
+      raise CognitoError("UsernameExistsException", "User already exists")
+    self._check_secret_hash(username, body.get("SecretHash"))
+    attributes = {attr["Name"]: attr["Value"] for attr in body.get("UserAttributes") or []}
+    self.add_user(username, body.get("Password"), email=attributes.get("email"), confirmed=False)
+    return {"UserConfirmed": False, "UserSub": self.users[username]["sub"]}
+
+  def ConfirmSignUp(self, body):
+    self._check_client(body.get("ClientId"))
+    user = self._get_user(body.get("Username"))
+    self._check_secret_hash(body.get("Username"), body.get("SecretHash"))
+    if body.get("ConfirmationCode") != self.confirmation_code:
+      raise CognitoError("CodeMismatchException", "Invalid verification code provided, please try again.")
+    user["confirmed"] = True
+    return {}
+
+  def ChangePassword(self, body):
+    user = self._get_user(self._username_from_access_token(body.get("AccessToken")))
+    if "PreviousPassword" in body and body["PreviousPassword"] != user["password"]:
+      raise CognitoError("NotAuthorizedException", "Incorrect username or password.")
+    user["password"] = body.get("ProposedPassword")
+    return {}
+
+  def ForgotPassword(self, body):
+    self._check_client(body.get("ClientId"))
+    user = self._get_user(body.get("Username"))
+    self._check_secret_hash(body.get("Username"), body.get("SecretHash"))
+    return {"CodeDeliveryDetails": {"Destination": user["email"], "DeliveryMedium": "EMAIL", "AttributeName": "email"}}
+
+  def ConfirmForgotPassword(self, body):
+    self._check_client(body.get("ClientId"))
+    user = self._get_user(body.get("Username"))
+    self._check_secret_hash(body.get("Username"), body.get("SecretHash"))
+    if body.get("ConfirmationCode") != self.confirmation_code:
+      raise CognitoError("CodeMismatchException", "Invalid verification code provided, please try again.")
+    user["password"] = body.get("Password")
+    return {}
+
+  def dispatch(self, operation, body):
+    """
+    操作を実行
+
+    Args:
+      operation: 操作名（'InitiateAuth'など）
+      body: リクエストボディの辞書
+
+    Returns:
+      dict: レスポンスボディ
+
+    Raises:
+      CognitoError: Cognitoのエラー
+    """
+    method = getattr(self, operation, None) if operation[:1].isupper() else None
+    if method is None:
+      raise CognitoError("UnknownOperationException", f"Unsupported operation: {operation}")
+    return method(body)
+
+
+def make_handler_class(pool, latency=0.0, jitter=0.0, quiet=False):
+  """
+  UserPoolを提供するリクエストハンドラーのクラスを作成
+
+  Args:
+    pool: UserPoolインスタンス
+    latency: 各リクエストに加える遅延（秒）
+    jitter: 遅延に加える0〜jitter秒のランダムな揺らぎ
+    quiet: リクエストごとのログを出力しない
+  """
+  jwks_paths = {f"/{pool.pool_id}/.well-known/jwks.json", "/.well-known/jwks.json"}
+
+  class CognitoHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _delay(self):
+      if latency or jitter:
+        time.sleep(latency + random.uniform(0, jitter))
+
+    def _send_json(self, status, payload, content_type="application/x-amz-json-1.1"):
+      body = json.dumps(payload).encode("utf-8")
+      self.send_response(status)
+      self.send_header("Content-Type", content_type)
+      self.send_header("Content-Length", str(len(body)))
+      self.send_header("x-amzn-RequestId", str(uuid.uuid4()))
+      self.end_headers()
+      self.wfile.write(body)
+
+    def do_GET(self):
+      self._delay()
+      if self.path.split("?", 1)[0] in jwks_paths:
+        self._send_json(200, pool.jwks(), content_type="application/json")
+      else:
+        self._send_json(404, {"message": "Not Found"}, content_type="application/json")
+
+    def do_POST(self):
+      length = int(self.headers.get("Content-Length") or 0)
+      raw = self.rfile.read(length) if length else b"{}"
+      self._delay()
+      target = self.headers.get("X-Amz-Target", "")
+      if not target.startswith(TARGET_PREFIX):
+        self._send_json(400, {"__type": "UnknownOperationException", "message": f"Unknown target: {target}"})
+        return
+      try:
+        result = pool.dispatch(target[len(TARGET_PREFIX):], json.loads(raw or b"{}"))
+      except CognitoError as e:
+        self._send_json(e.status, {"__type": e.error_type, "message": e.message})
+      except ValueError as e:
+        self._send_json(400, {"__type": "SerializationException", "message": str(e)})
+      else:
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+      if not quiet:
+        super().log_message(format, *args)
+
+  return CognitoHandler
+
+
+def run_cognito_server(pool_id, client_id, client_secret=None, port=9229, users=(), issuer_url=None,
+                       token_ttl=3600, latency=0.0, jitter=0.0, quiet=False):
+  """
+  ローカルCognitoサーバーを起動
+
+  Args:
+    pool_id: User Pool ID
+    client_id: アプリクライアントID
+    client_secret: アプリクライアントシークレット
+    port: ポート番号
+    users: (username, password, email) のタプルのリスト
+    issuer_url: トークンのissの基底URL（省略時は http://localhost:<port>）
+    token_ttl: ID・アクセストークンの有効期限（秒）
+    latency: 各リクエストに加える遅延（秒）
+    jitter: 遅延に加えるランダムな揺らぎの最大値（秒）
+    quiet: リクエストごとのログを出力しない
+  """
+  pool = UserPool(
+    pool_id, client_id, client_secret,
+    issuer_url=issuer_url or f"http://localhost:{port}",
+    token_ttl=token_ttl
+  )
+  for username, password, email in users:
+    pool.add_user(username, password, email=email)
+
+  handler_class = make_handler_class(pool, latency=latency, jitter=jitter, quiet=quiet)
+  with http.server.ThreadingHTTPServer(("", port), handler_class) as httpd:
+    httpd.daemon_threads = True
+    print(f"Local Cognito server running on port {port}")
+    print(f"  - User pool: {pool_id} (client: {client_id})")
+    print(f"  - Issuer: {pool.issuer}")
+    print(f"  - JWKS: {pool.issuer}/.well-known/jwks.json")
+    print(f"  - Confirmation code: {pool.confirmation_code}")
+    if latency or jitter:
+      print(f"  - Latency: {latency * 1000:.0f} ms (+ up to {jitter * 1000:.0f} ms)")
+    httpd.serve_forever()
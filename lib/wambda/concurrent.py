@@ -0,0 +1,145 @@
+"""
+WAMBDA 並行実行ヘルパー
+
+互いに依存しないブロッキング呼び出し（boto3、HTTPなど）を、
+ウォームスタート間で再利用される共有スレッドプール上で並行実行します。
+
+  profile, orders = master.gather(
+    lambda: users_table.get_item(Key={'id': user_id}),
+    functools.partial(orders_table.query, KeyConditionExpression=...),
+  )
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION, ALL_COMPLETED
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class GatherTimeout(TimeoutError):
+  """gatherで指定時間内に完了しなかった呼び出しがある場合に発生する例外"""
+  def __init__(self, pending, timeout):
+    super().__init__(f"{len(pending)} 件の呼び出しが {timeout} 秒以内に完了しませんでした: {pending}")
+    self.pending = pending
+    self.timeout = timeout
+
+
+class GatherResults(list):
+  """
+  gatherの戻り値（呼び出し順の結果リスト）
+
+  Attributes:
+    timings: 各呼び出しの所要時間（秒、呼び出し順）
+    elapsed: gather全体の所要時間（秒）
+  """
+  def __init__(self, results, timings, elapsed):
+    super().__init__(results)
+    self.timings = timings
+    self.elapsed = elapsed
+
+
+def default_max_workers(settings=None):
+  """
+  スレッドプールのサイズを決定
+
+  settings.CONCURRENT_MAX_WORKERS があればそれを使用し、
+  なければLambdaのメモリ割り当てから算出します（128MBあたり1、最小4、最大32）。
+  """
+  max_workers = getattr(settings, 'CONCURRENT_MAX_WORKERS', None)
+  if max_workers:
+    return max_workers
+  memory_size = int(os.getenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "128"))
+  return min(max(memory_size // 128, 4), 32)
+
+
+def get_executor(settings=None):
+  """
+  プロセス共有のスレッドプールを取得（コンテナごとに一度だけ作成）
+
+  Args:
+    settings: プロジェクト設定モジュール（初回作成時のみ参照）
+  """
+  global _executor
+  if _executor is None:
+    with _executor_lock:
+      if _executor is None:
+        _executor = ThreadPoolExecutor(
+          max_workers=default_max_workers(settings),
+          thread_name_prefix="wambda"
+        )
+  return _executor
+
+
+def _call_name(call):
+  func = getattr(call, "func", call)
+  return getattr(func, "__qualname__", repr(func))
+
+
+def _timed(call):
+  start = time.perf_counter()
+  try:
+    return call(), time.perf_counter() - start
+  except BaseException as e:
+    e.wambda_elapsed = time.perf_counter() - start
+    raise
+
+
+def gather(*calls, timeout=None, return_exceptions=False, settings=None):
+  """
+  複数の呼び出しを共有スレッドプールで並行実行し、すべての結果を待つ
+
+  呼び出しは別スレッドで実行されるため、引数を固定する場合は
+  lambdaまたはfunctools.partialで包んで渡してください。
+
+  Args:
+    *calls: 引数なしで呼び出せる関数
+    timeout: 全体のタイムアウト秒数（Noneの場合は無制限）
+    return_exceptions: Trueの場合、例外を送出せずに結果リストに入れて返す
+    settings: プロジェクト設定モジュール（スレッドプール作成時のみ参照）
+
+  Returns:
+    GatherResults: 呼び出し順の結果リスト（timings, elapsed属性付き）
+
+  Raises:
+    GatherTimeout: timeout内に完了しなかった呼び出しがある場合
+    Exception: 呼び出しが送出した例外（return_exceptions=Falseの場合、最初に失敗したもの）
+  """
+  start = time.perf_counter()
+  if not calls:
+    return GatherResults([], [], 0.0)
+
+  executor = get_executor(settings)
+  futures = [executor.submit(_timed, call) for call in calls]
+  done, not_done = wait(
+    futures,
+    timeout=timeout,
+    return_when=ALL_COMPLETED if return_exceptions else FIRST_EXCEPTION
+  )
+
+  if not return_exceptions:
+    # 失敗した呼び出しがあれば、残りをキャンセルして呼び出し順で最初の例外を送出
+    failed = [future for future in futures if future in done and future.exception() is not None]
+    if failed:
+      for future in not_done:
+        future.cancel()
+      raise failed[0].exception()
+
+  if not_done:
+    for future in not_done:
+      future.cancel()
+    raise GatherTimeout([_call_name(calls[i]) for i, f in enumerate(futures) if f in not_done], timeout)
+
+  results = []
+  timings = []
+  for future in futures:
+    error = future.exception()
+    if error is not None:
+      results.append(error)
+      timings.append(getattr(error, "wambda_elapsed", None))
+    else:
+      result, elapsed = future.result()
+      results.append(result)
+      timings.append(elapsed)
+  return GatherResults(results, timings, time.perf_counter() - start)
@@ -0,0 +1,185 @@
+"""
+WAMBDA CloudWatch Logs の取得
+
+filter_log_events をnextTokenで最後までページングするジェネレーターと、
+時間範囲を分割して並行に取得するジェネレーター、新しいログを追いかける follow を提供します。
+いずれもイベントを取得した順に返すため、全体をメモリに溜めずに出力できます。
+
+  client = boto3.client('logs')
+  for event in iter_log_events(client, '/aws/lambda/my-function', start_ms, end_ms, filter_pattern='ERROR'):
+    print(event['message'])
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 並行取得で各時間範囲が先読みするページ数（メモリ使用量の上限）
+PREFETCH_PAGES = 4
+
+# follow が再取得で遡る時間（遅れて取り込まれたイベントを拾うため）
+FOLLOW_OVERLAP_MS = 30_000
+
+_DONE = object()
+
+
+def iter_pages(client, log_group, start_ms, end_ms=None, filter_pattern=None, log_stream_names=None, page_size=None):
+  """
+  filter_log_events の結果をページごとに返すジェネレーター
+
+  Args:
+    client: CloudWatch Logsクライアント
+    log_group: ロググループ名
+    start_ms: 開始時刻（エポックミリ秒）
+    end_ms: 終了時刻（エポックミリ秒、省略時は現在まで）
+    filter_pattern: CloudWatch Logsのフィルターパターン（サーバー側で絞り込む）
+    log_stream_names: 対象のログストリーム名のリスト
+    page_size: 1回のリクエストで取得する最大件数
+
+  Yields:
+    list: イベントのリスト（空のページは返さない）
+  """
+  params = {"logGroupName": log_group, "startTime": start_ms}
+  if end_ms is not None:
+    params["endTime"] = end_ms
+  if filter_pattern:
+    params["filterPattern"] = filter_pattern
+  if log_stream_names:
+    params["logStreamNames"] = list(log_stream_names)
+  if page_size:
+    params["limit"] = page_size
+  while True:
+    response = client.filter_log_events(**params)
+    events = response.get("events", [])
+    if events:
+      yield events
+    next_token = response.get("nextToken")
+    # 最後のページでは同じトークンが返ることがある
+    if not next_token or next_token == params.get("nextToken"):
+      return
+    params["nextToken"] = next_token
+
+
+def iter_log_events(client, log_group, start_ms, end_ms=None, filter_pattern=None, log_stream_names=None,
+                    limit=None, page_size=None):
+  """
+  ログイベントを1件ずつ返すジェネレーター（nextTokenで最後までページング）
+
+  Args:
+    limit: 取得する最大件数（省略時は無制限）
+    その他の引数は iter_pages() と同じ
+
+  Yields:
+    dict: イベント（timestamp, message, logStreamName, eventId）
+  """
+  count = 0
+  for page in iter_pages(client, log_group, start_ms, end_ms, filter_pattern, log_stream_names, page_size):
+    for event in page:
+      yield event
+      count += 1
+      if limit is not None and count >= limit:
+        return
+
+
+def split_time_range(start_ms, end_ms, slices):
+  """時間範囲を重ならない slices 個の範囲に分割（filter_log_eventsのendTimeは範囲に含まれる）"""
+  slices = max(1, min(slices, end_ms - start_ms + 1))
+  step = (end_ms - start_ms + 1) / slices
+  bounds = [start_ms + int(step * i) for i in range(slices)] + [end_ms + 1]
+  return [(bounds[i], bounds[i + 1] - 1) for i in range(slices) if bounds[i] < bounds[i + 1]]
+
+
+def iter_log_events_parallel(client, log_group, start_ms, end_ms, slices=4, filter_pattern=None,
+                             log_stream_names=None, limit=None, page_size=None):
+  """
+  時間範囲を分割して並行に取得し、範囲の古い順にイベントを返すジェネレーター
+
+  各範囲は最大 PREFETCH_PAGES ページまで先読みするため、メモリ使用量は範囲数に比例する程度に抑えられます。
+  先頭の範囲を出力している間に、後ろの範囲の取得が進みます。
+
+  Args:
+    slices: 分割数（並行数）
+    その他の引数は iter_log_events() と同じ
+
+  Yields:
+    dict: イベント
+  """
+  ranges = split_time_range(start_ms, end_ms, slices)
+  if len(ranges) == 1:
+    yield from iter_log_events(client, log_group, start_ms, end_ms, filter_pattern, log_stream_names, limit, page_size)
+    return
+
+  stop = threading.Event()
+  queues = [queue.Queue(maxsize=PREFETCH_PAGES) for _ in ranges]
+
+  def put(q, item):
+    # 消費側が途中でやめた場合に先読みスレッドが止まるよう、タイムアウト付きで待つ
+    while not stop.is_set():
+      try:
+        q.put(item, timeout=0.1)
+        return True
+      except queue.Full:
+        continue
+    return False
+
+  def fetch(q, range_start, range_end):
+    try:
+      for page in iter_pages(client, log_group, range_start, range_end, filter_pattern, log_stream_names, page_size):
+        if not put(q, page):
+          return
+      put(q, _DONE)
+    except Exception as e:
+      put(q, e)
+
+  count = 0
+  with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="wambda-logs") as executor:
+    for q, (range_start, range_end) in zip(queues, ranges):
+      executor.submit(fetch, q, range_start, range_end)
+    try:
+      for q in queues:
+        while True:
+          item = q.get()
+          if item is _DONE:
+            break
+          if isinstance(item, Exception):
+            raise item
+          for event in item:
+            yield event
+            count += 1
+            if limit is not None and count >= limit:
+              return
+    finally:
+      stop.set()
+
+
+def follow(client, log_group, start_ms, filter_pattern=None, log_stream_names=None, interval=2.0, sleep=time.sleep,
+           overlap_ms=FOLLOW_OVERLAP_MS):
+  """
+  新しいログイベントを追いかけて返すジェネレーター（tail -f）
+
+  CloudWatch Logsはイベントを時刻順に取り込むとは限らないため、最後に取得したイベントの時刻より
+  overlap_ms 前から定期的に再取得し、eventIdで重複を除きます。
+  重複判定のeventIdは再取得の範囲内のものだけを保持します。
+
+  Args:
+    start_ms: 開始時刻（エポックミリ秒）
+    interval: ポーリング間隔（秒）
+    overlap_ms: 再取得で遡る時間（ミリ秒、遅れて取り込まれたイベントを拾う範囲）
+
+  Yields:
+    dict: イベント
+  """
+  newest = start_ms
+  seen = {}
+  while True:
+    since = max(start_ms, newest - overlap_ms)
+    for event in iter_log_events(client, log_group, since, None, filter_pattern, log_stream_names):
+      if event["eventId"] in seen:
+        continue
+      seen[event["eventId"]] = event["timestamp"]
+      newest = max(newest, event["timestamp"])
+      yield event
+    # 次の再取得の範囲より古いイベントは再び返されないので忘れる
+    cutoff = max(start_ms, newest - overlap_ms)
+    seen = {event_id: timestamp for event_id, timestamp in seen.items() if timestamp >= cutoff}
+    sleep(interval)
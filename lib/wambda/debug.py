@@ -5,18 +5,32 @@ import sys
 import os
 import json
 import argparse
+import base64
+import time
+import urllib.parse
+import uuid
 
 
-def create_test_event(path="/", method="GET", body=None, headers=None, query_params=None):
+def create_test_event(path="/", method="GET", body=None, headers=None, query_params=None,
+                      multi_value_headers=None, multi_value_query_params=None, cookies=None,
+                      is_base64_encoded=False, request_id=None, source_ip="127.0.0.1"):
   """
   テスト用のLambdaイベントオブジェクトを生成
   
+  API Gatewayのプロキシ統合（REST API）と同じ形式のイベントを生成します。
+  
   Args:
     path: リクエストパス
     method: HTTPメソッド
     body: リクエストボディ
     headers: リクエストヘッダー
     query_params: クエリパラメータ
+    multi_value_headers: 複数値ヘッダー（{名前: [値, ...]}、省略時はheadersから生成）
+    multi_value_query_params: 複数値クエリパラメータ（省略時はquery_paramsから生成）
+    cookies: Cookieの辞書（Cookieヘッダーとして追加）
+    is_base64_encoded: bodyがBase64エンコードされているか
+    request_id: リクエストID（省略時は自動生成）
+    source_ip: 送信元IPアドレス
   
   Returns:
     dict: Lambdaイベント形式の辞書
@@ -26,21 +40,167 @@ def create_test_event(path="/", method="GET", body=None, headers=None, query_par
       'Content-Type': 'application/json',
       'User-Agent': 'hads-debug/1.0'
     }
+  else:
+    headers = dict(headers)
+  
+  if cookies:
+    cookie_header = "; ".join(f"{key}={value}" for key, value in cookies.items())
+    if headers.get('Cookie'):
+      cookie_header = f"{headers['Cookie']}; {cookie_header}"
+    headers['Cookie'] = cookie_header
+  
+  if multi_value_headers is None:
+    multi_value_headers = {key: [value] for key, value in headers.items()}
+  
+  if multi_value_query_params is None and query_params:
+    multi_value_query_params = {key: [value] for key, value in query_params.items()}
   
   event = {
+    "resource": "/{proxy+}",
     "path": path,
+    "httpMethod": method,
     "requestContext": {
-      "httpMethod": method
+      "httpMethod": method,
+      "path": path,
+      "requestId": request_id or str(uuid.uuid4()),
+      "requestTimeEpoch": int(time.time() * 1000),
+      "identity": {
+        "sourceIp": source_ip,
+        "userAgent": headers.get('User-Agent')
+      }
     },
     "body": body,
+    "isBase64Encoded": is_base64_encoded,
     "headers": headers,
+    "multiValueHeaders": multi_value_headers,
     "queryStringParameters": query_params,
+    "multiValueQueryStringParameters": multi_value_query_params,
     "pathParameters": None
   }
   
   return event
 
 
+# Base64エンコードせずに文字列として渡すContent-Type
+_TEXT_CONTENT_TYPES = (
+  'text/', 'application/json', 'application/x-www-form-urlencoded',
+  'application/xml', 'application/javascript'
+)
+
+
+def create_event_from_http(method, raw_path, header_items, body=None, source_ip="127.0.0.1", request_id=None):
+  """
+  HTTPリクエストからAPI Gatewayプロキシ形式のLambdaイベントを生成
+  
+  Args:
+    method: HTTPメソッド
+    raw_path: クエリ文字列を含むリクエストパス（例: '/users?page=1'）
+    header_items: (名前, 値) のリスト（同名ヘッダーの重複可、headersでは結合される）
+    body: リクエストボディ（bytes）
+    source_ip: 送信元IPアドレス
+    request_id: リクエストID
+  
+  Returns:
+    dict: Lambdaイベント形式の辞書
+  """
+  parsed = urllib.parse.urlsplit(raw_path)
+  
+  multi_value_headers = {}
+  for name, value in header_items:
+    multi_value_headers.setdefault(name, []).append(value)
+  # 同名のヘッダーは結合する（Cookieは '; '、それ以外は ', '。HTTPの仕様上、同じ意味になる）
+  headers = {
+    name: ('; ' if name.lower() == 'cookie' else ', ').join(values)
+    for name, values in multi_value_headers.items()
+  }
+  
+  query_params = None
+  multi_value_query_params = None
+  if parsed.query:
+    multi_value_query_params = urllib.parse.parse_qs(parsed.query, keep_blank_values=True)
+    query_params = {key: values[-1] for key, values in multi_value_query_params.items()}
+  
+  is_base64_encoded = False
+  if body:
+    content_type = next((value for name, value in headers.items() if name.lower() == 'content-type'), '')
+    is_text = not content_type or content_type.startswith(_TEXT_CONTENT_TYPES)
+    if is_text:
+      try:
+        body = body.decode('utf-8')
+      except UnicodeDecodeError:
+        is_text = False
+    if not is_text:
+      body = base64.b64encode(body).decode('ascii')
+      is_base64_encoded = True
+  else:
+    body = None
+  
+  return create_test_event(
+    path=urllib.parse.unquote(parsed.path) or "/",
+    method=method,
+    body=body,
+    headers=headers,
+    query_params=query_params,
+    multi_value_headers=multi_value_headers,
+    multi_value_query_params=multi_value_query_params,
+    is_base64_encoded=is_base64_encoded,
+    request_id=request_id,
+    source_ip=source_ip
+  )
+
+
+def response_to_http(response):
+  """
+  Lambdaのレスポンス辞書をHTTPのステータス・ヘッダー・ボディに変換
+  
+  Args:
+    response: lambda_handlerの戻り値
+  
+  Returns:
+    tuple: (ステータスコード, [(名前, 値), ...], ボディのbytes)
+  """
+  status = int(response.get('statusCode', 200))
+  
+  header_items = []
+  multi_value_headers = response.get('multiValueHeaders') or {}
+  lower_multi_names = {name.lower() for name in multi_value_headers}
+  for name, value in (response.get('headers') or {}).items():
+    # 同名のmultiValueHeadersがある場合はそちらを優先（API Gatewayと同じ挙動）
+    if name.lower() not in lower_multi_names:
+      header_items.append((name, str(value)))
+  for name, values in multi_value_headers.items():
+    for value in values:
+      header_items.append((name, str(value)))
+  
+  body = response.get('body')
+  if body is None:
+    body = b""
+  elif response.get('isBase64Encoded'):
+    body = base64.b64decode(body)
+  elif isinstance(body, str):
+    body = body.encode('utf-8')
+  
+  return status, header_items, body
+
+
+class LambdaContext:
+  """
+  ローカル実行用のLambdaコンテキストオブジェクト
+  """
+  def __init__(self, function_name="wambda-local", memory_limit_in_mb=128, timeout=30, request_id=None):
+    self.function_name = function_name
+    self.function_version = "$LATEST"
+    self.invoked_function_arn = f"arn:aws:lambda:local:000000000000:function:{function_name}"
+    self.memory_limit_in_mb = memory_limit_in_mb
+    self.aws_request_id = request_id or str(uuid.uuid4())
+    self.log_group_name = f"/aws/lambda/{function_name}"
+    self.log_stream_name = "local"
+    self._deadline = time.monotonic() + timeout
+  
+  def get_remaining_time_in_millis(self):
+    return max(int((self._deadline - time.monotonic()) * 1000), 0)
+
+
 def run_lambda_handler(lambda_handler_func, path="/", method="GET", body=None, headers=None, query_params=None, verbose=True):
   """
   lambda_handlerを直接実行してテスト
@@ -0,0 +1,547 @@
+"""
+WAMBDA DynamoDB ヘルパー
+
+テーブルリソースの再利用、バッチ読み書き（チャンク分割・未処理分の再試行）、
+ページを遅延取得するquery/scanイテレータ、並列セグメントスキャン、
+ProjectionExpressionの生成を提供します。
+
+  from wambda import dynamodb
+
+  users = dynamodb.batch_get('users', [{'id': '1'}, {'id': '2'}], projection=dynamodb.projection('id', 'name'))
+  for order in dynamodb.query('orders', KeyConditionExpression=Key('user_id').eq('1')):
+    ...
+"""
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+
+# 並列スキャンの1回あたりのスレッド数の上限と、次のページを待つ秒数の既定値
+MAX_SCAN_WORKERS = 8
+SCAN_PAGE_TIMEOUT = 60
+
+# boto3のリソースはスレッドセーフではないため、スレッドごとに保持する
+_local = threading.local()
+
+
+class BatchRetryExhausted(Exception):
+  """バッチ操作の未処理分が再試行回数内に処理しきれなかった場合に発生する例外"""
+  def __init__(self, unprocessed):
+    super().__init__(f"未処理の項目が残っています: {len(unprocessed)} 件")
+    self.unprocessed = unprocessed
+
+
+def _default_region():
+  return os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION")
+
+
+def get_resource(region_name=None):
+  """
+  DynamoDBリソースを取得（スレッド・リージョンごとにキャッシュ）
+
+  Args:
+    region_name: リージョン（省略時は環境変数AWS_REGION）
+  """
+  region_name = region_name or _default_region()
+  resources = getattr(_local, "resources", None)
+  if resources is None:
+    resources = _local.resources = {}
+  resource = resources.get(region_name)
+  if resource is None:
+    import boto3
+    resource = resources[region_name] = boto3.resource("dynamodb", region_name=region_name)
+  return resource
+
+
+def get_table(table_name, region_name=None):
+  """
+  DynamoDBテーブルを取得（スレッド・リージョンごとにキャッシュ）
+
+  Args:
+    table_name: テーブル名
+    region_name: リージョン
+  """
+  region_name = region_name or _default_region()
+  tables = getattr(_local, "tables", None)
+  if tables is None:
+    tables = _local.tables = {}
+  key = (table_name, region_name)
+  table = tables.get(key)
+  if table is None:
+    table = tables[key] = get_resource(region_name).Table(table_name)
+  return table
+
+
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|(\[\d+\])")
+
+
+def projection(*paths):
+  """
+  ProjectionExpressionとExpressionAttributeNamesを生成
+
+  予約語やネストした属性（'address.city', 'tags[0]'）も安全に指定できます。
+
+  Args:
+    *paths: 取得する属性のパス
+
+  Returns:
+    dict: query/scan/get_item/batch_getにそのまま渡せる引数
+
+  例:
+    projection('id', 'name', 'address.city')
+    # {'ProjectionExpression': '#p0, #p1, #p2.#p3',
+    #  'ExpressionAttributeNames': {'#p0': 'id', '#p1': 'name', '#p2': 'address', '#p3': 'city'}}
+  """
+  names = {}
+  placeholders = {}
+  expressions = []
+  for path in paths:
+    parts = []
+    for name, index in _PATH_TOKEN.findall(path):
+      if index:
+        parts.append(index)
+        continue
+      placeholder = placeholders.get(name)
+      if placeholder is None:
+        placeholder = placeholders[name] = f"#p{len(placeholders)}"
+        names[placeholder] = name
+      parts.append("." + placeholder if parts else placeholder)
+    expressions.append("".join(parts))
+  return {
+    "ProjectionExpression": ", ".join(expressions),
+    "ExpressionAttributeNames": names,
+  }
+
+
+def _chunks(items, size):
+  for i in range(0, len(items), size):
+    yield items[i:i + size]
+
+
+def _backoff(attempt, base=0.05, cap=2.0):
+  """指数バックオフ（フルジッター）"""
+  time.sleep(random.uniform(0, min(cap, base * (2 ** attempt))))
+
+
+def _dedupe_keys(keys):
+  """同一バッチ内の重複キーはエラーになるため除去"""
+  seen = set()
+  unique = []
+  for key in keys:
+    marker = tuple(sorted((name, repr(value)) for name, value in key.items()))
+    if marker not in seen:
+      seen.add(marker)
+      unique.append(key)
+  return unique
+
+
+def batch_get(table_name, keys, projection=None, consistent_read=False, region_name=None, max_retries=8):
+  """
+  複数のキーの項目をまとめて取得
+
+  100件ずつに分割してBatchGetItemを呼び出し、UnprocessedKeysは指数バックオフで再試行します。
+
+  Args:
+    table_name: テーブル名
+    keys: キーの辞書のリスト
+    projection: projection()の戻り値（取得する属性の指定）
+    consistent_read: 強い整合性で読み込むか
+    region_name: リージョン
+    max_retries: 未処理分の最大再試行回数
+
+  Returns:
+    list: 取得した項目（順序は保証されません。存在しないキーは含まれません）
+
+  Raises:
+    BatchRetryExhausted: 再試行しても未処理のキーが残った場合
+  """
+  resource = get_resource(region_name)
+  items = []
+  for chunk in _chunks(_dedupe_keys(list(keys)), BATCH_GET_LIMIT):
+    request = {"Keys": chunk, "ConsistentRead": consistent_read}
+    if projection:
+      request.update(projection)
+    request_items = {table_name: request}
+    attempt = 0
+    while request_items:
+      response = resource.batch_get_item(RequestItems=request_items)
+      items.extend(response.get("Responses", {}).get(table_name, []))
+      request_items = response.get("UnprocessedKeys") or {}
+      if request_items:
+        if attempt >= max_retries:
+          raise BatchRetryExhausted(request_items[table_name]["Keys"])
+        _backoff(attempt)
+        attempt += 1
+  return items
+
+
+def batch_write(table_name, put_items=(), delete_keys=(), region_name=None, max_retries=8):
+  """
+  複数の項目をまとめて書き込み・削除
+
+  25件ずつに分割してBatchWriteItemを呼び出し、UnprocessedItemsは指数バックオフで再試行します。
+
+  Args:
+    table_name: テーブル名
+    put_items: 書き込む項目のリスト
+    delete_keys: 削除するキーのリスト
+    region_name: リージョン
+    max_retries: 未処理分の最大再試行回数
+
+  Raises:
+    BatchRetryExhausted: 再試行しても未処理の項目が残った場合
+  """
+  resource = get_resource(region_name)
+  requests = [{"PutRequest": {"Item": item}} for item in put_items]
+  requests += [{"DeleteRequest": {"Key": key}} for key in delete_keys]
+  for chunk in _chunks(requests, BATCH_WRITE_LIMIT):
+    request_items = {table_name: chunk}
+    attempt = 0
+    while request_items:
+      response = resource.batch_write_item(RequestItems=request_items)
+      request_items = response.get("UnprocessedItems") or {}
+      if request_items:
+        if attempt >= max_retries:
+          raise BatchRetryExhausted(request_items[table_name])
+        _backoff(attempt)
+        attempt += 1
+
+
+def _iter_pages(method, kwargs):
+  """LastEvaluatedKeyをたどってページを1つずつ取得するジェネレータ"""
+  kwargs = dict(kwargs)
+  while True:
+    page = method(**kwargs)
+    yield page
+    last_key = page.get("LastEvaluatedKey")
+    if not last_key:
+      return
+    kwargs["ExclusiveStartKey"] = last_key
+
+
+def query_pages(table_name, region_name=None, **kwargs):
+  """
+  queryの結果をページ単位で遅延取得するジェネレータ
+
+  Args:
+    table_name: テーブル名
+    region_name: リージョン
+    **kwargs: Table.queryの引数
+  """
+  return _iter_pages(get_table(table_name, region_name).query, kwargs)
+
+
+def query(table_name, region_name=None, **kwargs):
+  """
+  queryの結果を項目単位で遅延取得するジェネレータ
+
+  次のページは前のページの項目を読み終えたときに初めて取得されます。
+
+  Args:
+    table_name: テーブル名
+    region_name: リージョン
+    **kwargs: Table.queryの引数
+  """
+  for page in query_pages(table_name, region_name, **kwargs):
+    yield from page.get("Items", [])
+
+
+def scan_pages(table_name, region_name=None, **kwargs):
+  """
+  scanの結果をページ単位で遅延取得するジェネレータ
+
+  Args:
+    table_name: テーブル名
+    region_name: リージョン
+    **kwargs: Table.scanの引数
+  """
+  return _iter_pages(get_table(table_name, region_name).scan, kwargs)
+
+
+def scan(table_name, segments=1, region_name=None, page_timeout=SCAN_PAGE_TIMEOUT, **kwargs):
+  """
+  scanの結果を項目単位で遅延取得するジェネレータ
+
+  segmentsが2以上の場合は並列セグメントスキャンを行い、
+  このスキャン専用のスレッドプール（最大 MAX_SCAN_WORKERS スレッド）上で各セグメントを同時に読み進めます
+  （項目の順序は保証されません）。共有スレッドプールを使わないため、master.gather の中から呼んでも
+  セグメントの実行が待たされることはありません。
+
+  Args:
+    table_name: テーブル名
+    segments: 並列スキャンのセグメント数
+    region_name: リージョン
+    page_timeout: 並列スキャンで次のページを待つ最大秒数（超えた場合はTimeoutError）
+    **kwargs: Table.scanの引数
+  """
+  if segments <= 1:
+    for page in scan_pages(table_name, region_name, **kwargs):
+      yield from page.get("Items", [])
+    return
+  yield from _parallel_scan(table_name, segments, region_name, page_timeout, kwargs)
+
+
+_SEGMENT_DONE = object()
+
+
+def _parallel_scan(table_name, segments, region_name, page_timeout, kwargs):
+  from concurrent.futures import ThreadPoolExecutor
+
+  # 消費より先に読みすぎないよう、キューの大きさでバックプレッシャーをかける
+  pages = queue.Queue(maxsize=segments * 2)
+  stop = threading.Event()
+
+  def put(value):
+    while not stop.is_set():
+      try:
+        pages.put(value, timeout=0.1)
+        return True
+      except queue.Full:
+        continue
+    return False
+
+  def scan_segment(segment):
+    try:
+      for page in scan_pages(table_name, region_name, Segment=segment, TotalSegments=segments, **kwargs):
+        if not put(page.get("Items", [])):
+          return
+    except Exception as e:
+      put(e)
+    finally:
+      put(_SEGMENT_DONE)
+
+  # 共有プールのスレッドがすべてgatherの呼び出しで埋まっていても進むよう、専用のプールで実行する
+  executor = ThreadPoolExecutor(max_workers=min(segments, MAX_SCAN_WORKERS), thread_name_prefix="wambda-scan")
+  futures = [executor.submit(scan_segment, segment) for segment in range(segments)]
+  remaining = segments
+  try:
+    while remaining:
+      try:
+        value = pages.get(timeout=page_timeout)
+      except queue.Empty:
+        raise TimeoutError(f"並列スキャンで {page_timeout} 秒以内に次のページを取得できませんでした: {table_name}") from None
+      if value is _SEGMENT_DONE:
+        remaining -= 1
+      elif isinstance(value, Exception):
+        raise value
+      else:
+        yield from value
+  finally:
+    stop.set()
+    for future in futures:
+      future.cancel()
+    executor.shutdown(wait=False)
+
+
+# 読み込みキャッシュ
+
+# テーブルごとのコンテナスコープのキャッシュ（settings.DYNAMODB_CACHEで有効化）
+_container_caches = {}
+_container_caches_lock = threading.Lock()
+
+
+def _key_marker(key):
+  return tuple(sorted((name, repr(value)) for name, value in key.items()))
+
+
+def _get_container_cache(master, table_name):
+  """settings.DYNAMODB_CACHEに設定されたテーブルのキャッシュを取得（未設定ならNone）"""
+  cache = _container_caches.get(table_name)
+  if cache is not None:
+    return cache
+  config = (getattr(master.settings, 'DYNAMODB_CACHE', None) or {}).get(table_name)
+  if config is None:
+    return None
+  from wambda.cache import TTLCache
+  with _container_caches_lock:
+    cache = _container_caches.get(table_name)
+    if cache is None:
+      cache = _container_caches[table_name] = TTLCache(
+        maxsize=config.get('maxsize', 1024),
+        ttl=config.get('ttl', 60)
+      )
+  return cache
+
+
+def _get_identity_map(master):
+  """リクエストスコープのキャッシュ（Masterインスタンスに保持され、リクエスト終了とともに破棄）"""
+  identity_map = getattr(master, '_dynamodb_identity_map', None)
+  if identity_map is None:
+    identity_map = master._dynamodb_identity_map = {}
+  return identity_map
+
+
+def _get_request_stats(master):
+  """リクエストスコープのキャッシュの統計情報（Masterインスタンスに保持）"""
+  stats = getattr(master, '_dynamodb_stats', None)
+  if stats is None:
+    stats = master._dynamodb_stats = {"hits": 0, "misses": 0}
+  return stats
+
+
+def get_item(master, table_name, key, projection=None, consistent_read=False, region_name=None):
+  """
+  キャッシュを経由して項目を1件取得
+
+  1. リクエストスコープ: 同じリクエスト内での同じキーの読み込みはGetItemを1回だけ実行します
+  2. コンテナスコープ: settings.DYNAMODB_CACHE に設定されたテーブルはTTL付きLRUで
+     ウォームスタート間も保持します
+
+    DYNAMODB_CACHE = {
+      'config': {'ttl': 300, 'maxsize': 256},
+    }
+
+  存在しない項目（None）もキャッシュされます。consistent_read=Trueの場合は
+  どちらのキャッシュも参照せずにGetItemを実行します（結果はリクエストスコープのキャッシュに保持）。
+  返される項目は他の呼び出しと共有されるため、変更しないでください。
+
+  Args:
+    master: Masterインスタンス
+    table_name: テーブル名
+    key: キーの辞書
+    projection: projection()の戻り値
+    consistent_read: 強い整合性で読み込むか
+    region_name: リージョン（省略時はsettings.REGION）
+
+  Returns:
+    dict: 項目（存在しない場合はNone）
+  """
+  marker = (table_name, _key_marker(key))
+  variant = projection["ProjectionExpression"] if projection else None
+
+  variants = _get_identity_map(master).setdefault(marker, {})
+  stats = _get_request_stats(master)
+  # 強い整合性の読み込みは、同じリクエスト内の結果整合性の読み込みの結果を返さない
+  if not consistent_read and variant in variants:
+    stats["hits"] += 1
+    return variants[variant]
+  stats["misses"] += 1
+
+  container_cache = None if consistent_read else _get_container_cache(master, table_name)
+  cached = {}
+  if container_cache is not None:
+    cached = container_cache.get(marker, {})
+    if variant in cached:
+      variants[variant] = cached[variant]
+      return cached[variant]
+
+  kwargs = {"Key": key, "ConsistentRead": consistent_read}
+  if projection:
+    kwargs.update(projection)
+  region_name = region_name or getattr(master.settings, 'REGION', None)
+  item = get_table(table_name, region_name).get_item(**kwargs).get("Item")
+
+  variants[variant] = item
+  if container_cache is not None:
+    # 取得する属性の指定ごとに保持する（既存の辞書は他スレッドが参照しうるため複製）
+    cached = dict(cached)
+    cached[variant] = item
+    container_cache.set(marker, cached)
+  return item
+
+
+def invalidate(master, table_name, key):
+  """
+  項目をリクエストスコープ・コンテナスコープの両方のキャッシュから削除
+
+  Args:
+    master: Masterインスタンス
+    table_name: テーブル名
+    key: キーの辞書
+  """
+  marker = (table_name, _key_marker(key))
+  _get_identity_map(master).pop(marker, None)
+  container_cache = _container_caches.get(table_name)
+  if container_cache is not None:
+    container_cache.pop(marker)
+
+
+def invalidate_table(master, table_name):
+  """
+  テーブルの項目をリクエストスコープ・コンテナスコープの両方のキャッシュからすべて削除
+
+  Args:
+    master: Masterインスタンス
+    table_name: テーブル名
+  """
+  identity_map = _get_identity_map(master)
+  for marker in [marker for marker in identity_map if marker[0] == table_name]:
+    del identity_map[marker]
+  container_cache = _container_caches.get(table_name)
+  if container_cache is not None:
+    container_cache.clear()
+
+
+def put_item(master, table_name, item, region_name=None, **kwargs):
+  """
+  項目を書き込み、キャッシュを無効化
+
+  項目のどの属性がキーかはテーブルの定義（DescribeTable）なしには分からないため、
+  書き込みに成功した場合はそのテーブルのキャッシュをすべて無効化します。
+
+  Args:
+    master: Masterインスタンス
+    table_name: テーブル名
+    item: 項目
+    region_name: リージョン（省略時はsettings.REGION）
+    **kwargs: Table.put_itemの追加引数（ConditionExpressionなど）
+  """
+  table = get_table(table_name, region_name or getattr(master.settings, 'REGION', None))
+  response = table.put_item(Item=item, **kwargs)
+  invalidate_table(master, table_name)
+  return response
+
+
+def update_item(master, table_name, key, region_name=None, **kwargs):
+  """
+  項目を更新し、キャッシュを無効化
+
+  Args:
+    master: Masterインスタンス
+    table_name: テーブル名
+    key: キーの辞書
+    region_name: リージョン（省略時はsettings.REGION）
+    **kwargs: Table.update_itemの引数（UpdateExpressionなど）
+  """
+  table = get_table(table_name, region_name or getattr(master.settings, 'REGION', None))
+  response = table.update_item(Key=key, **kwargs)
+  invalidate(master, table_name, key)
+  return response
+
+
+def delete_item(master, table_name, key, region_name=None, **kwargs):
+  """
+  項目を削除し、キャッシュを無効化
+
+  Args:
+    master: Masterインスタンス
+    table_name: テーブル名
+    key: キーの辞書
+    region_name: リージョン（省略時はsettings.REGION）
+    **kwargs: Table.delete_itemの追加引数
+  """
+  table = get_table(table_name, region_name or getattr(master.settings, 'REGION', None))
+  response = table.delete_item(Key=key, **kwargs)
+  invalidate(master, table_name, key)
+  return response
+
+
+def cache_stats(master=None):
+  """
+  読み込みキャッシュの統計情報を取得
+
+  Args:
+    master: Masterインスタンス（指定した場合はそのリクエストのキャッシュの統計情報を含める）
+
+  Returns:
+    dict: {'request': {'hits', 'misses'}（masterを指定した場合のみ）, 'container': {テーブル名: TTLCache.stats()}}
+  """
+  stats = {"container": {name: cache.stats() for name, cache in _container_caches.items()}}
+  if master is not None:
+    stats["request"] = dict(_get_request_stats(master))
+  return stats
@@ -2,7 +2,15 @@ import urllib.parse
 import importlib
 import os
 import json
-import logging
+import time
+
+def _isawaitable(obj):
+  """inspectはインポートに時間がかかるため、非同期ビューが使われたときにのみ読み込む"""
+  import inspect
+  return inspect.isawaitable(obj)
+
+# Request.jsonが未解析であることを示す値（ボディが空の場合のNoneと区別する）
+_NOT_PARSED = object()
 
 class Master:
   """
@@ -17,6 +25,7 @@ class Master:
         context: AWS Lambdaコンテキストオブジェクト
     """
     from wambda.urls import Router
+    self.start_time = time.perf_counter()
     self.event = event
     self.context = context
     self.settings = importlib.import_module('project.settings') 
@@ -43,22 +52,26 @@ class Master:
         raise ValueError("AWS_SAM_LOCALは'true'または'false'である必要があります")
         
   def _set_logger(self):
-    """ロガーを設定します。"""
-    self.logger = logging.getLogger()
-    
-    # settings.pyからログレベルを取得（未定義の場合はINFOをデフォルト）
-    log_level_str = getattr(self.settings, 'LOG_LEVEL', 'INFO').upper()
-    
-    # ログレベル文字列を対応する定数に変換
-    log_level_map = {
-        'DEBUG': logging.DEBUG,
-        'INFO': logging.INFO,
-        'WARNING': logging.WARNING,
-        'ERROR': logging.ERROR
-    }
-    
-    log_level = log_level_map.get(log_level_str, logging.INFO)
-    self.logger.setLevel(log_level)
+    """
+    ロガーを設定します。
+
+    ロガー自体の設定はコンテナごとに一度だけ行い、
+    リクエストごとにはリクエストIDとルートのみを更新します。
+    """
+    from wambda import log
+    self.logger = log.configure(self.settings)
+    log.begin_request(
+      request_id=self._get_request_id(),
+      route=self.request.path,
+      debug_sample_rate=getattr(self.settings, 'LOG_DEBUG_SAMPLE_RATE', 0.0)
+    )
+
+  def _get_request_id(self):
+    """LambdaコンテキストまたはイベントからリクエストIDを取得します。"""
+    request_id = getattr(self.context, 'aws_request_id', None)
+    if request_id is None:
+      request_id = (self.event.get('requestContext') or {}).get('requestId')
+    return request_id
 
   def _set_use_mock(self):
     """モックを使用するかどうかを判定します。"""
@@ -94,41 +107,221 @@ class Master:
         from wambda.views import url_not_matched_view
         return url_not_matched_view, {}
 
+  def call_view(self, view, kwargs=None):
+    """
+    ビュー関数を実行します。
+
+    `async def` で定義されたビュー（またはコルーチンを返すビュー）は、
+    ウォームスタート間で再利用されるイベントループ上で実行されます。
+
+    Args:
+        view: ビュー関数
+        kwargs: パスパラメータ
+
+    Returns:
+        レスポンス辞書
+    """
+    response = view(self, **(kwargs or {}))
+    # 通常のビューはdictを返すため、inspectの読み込みと判定を省略
+    if not isinstance(response, dict) and _isawaitable(response):
+      from wambda import aio
+      response = aio.run(response)
+    if getattr(self.settings, 'LOG_REQUEST_TIMING', False):
+      self._log_timing(view, response)
+    return response
+
+  def _log_timing(self, view, response):
+    """
+    リクエストのタイミング行を出力します（wambda-admin.py log --stats で集計）。
+
+    durationはMasterの作成からビューが返るまでの時間です。
+    LOG_LEVELにかかわらず出力されるよう、INFOに固定した 'wambda.timing' ロガーを使います。
+    """
+    import logging
+    from wambda.log import TIMING_LOGGER_NAME
+    status = response.get('statusCode') if isinstance(response, dict) else None
+    logging.getLogger(TIMING_LOGGER_NAME).info(
+      "wambda-timing view=%s.%s method=%s status=%s duration_ms=%.2f",
+      getattr(view, '__module__', None), getattr(view, '__qualname__', type(view).__name__),
+      self.request.method, status, (time.perf_counter() - self.start_time) * 1000
+    )
+
+  def gather(self, *calls, timeout=None, return_exceptions=False):
+    """
+    互いに依存しないブロッキング呼び出しを共有スレッドプールで並行実行します。
+
+    timeoutを省略した場合はsettings.CONCURRENT_TIMEOUTを使用し、
+    Lambdaの残り実行時間を超えないように制限します。
+
+    Args:
+        *calls: 引数なしで呼び出せる関数（lambdaやfunctools.partial）
+        timeout: タイムアウト秒数
+        return_exceptions: Trueの場合、例外を結果リストに入れて返す
+
+    Returns:
+        GatherResults: 呼び出し順の結果リスト（timings, elapsed属性付き）
+    """
+    from wambda.concurrent import gather
+    from wambda.log import lazy
+    if timeout is None:
+      timeout = getattr(self.settings, 'CONCURRENT_TIMEOUT', None)
+    get_remaining_time = getattr(self.context, 'get_remaining_time_in_millis', None)
+    if get_remaining_time is not None:
+      # Lambdaのタイムアウト前にレスポンスを返せるよう0.5秒の余裕を残す
+      remaining = max(get_remaining_time() / 1000 - 0.5, 0.1)
+      timeout = remaining if timeout is None else min(timeout, remaining)
+    results = gather(*calls, timeout=timeout, return_exceptions=return_exceptions, settings=self.settings)
+    self.logger.debug("gather: %d calls in %.1f ms (each: %s)", len(results), results.elapsed * 1000,
+                      lazy(lambda: [round(t * 1000, 1) if t is not None else None for t in results.timings]))
+    return results
+
 class MultiDict:
-  """WTFormsと互換性のあるシンプルなMultiDictクラス"""
-  def __init__(self, data=None):
-    self._data = {}
-    if data:
-      for key, value_list in data.items():
-        self._data[key] = value_list
-
-  def getlist(self, key):
-    """指定されたキーの値をリストで取得"""
-    return self._data.get(key, [])
-
-  def get(self, key, default=None):
-    """指定されたキーの最初の値を取得"""
-    values = self.getlist(key)
-    return values[0] if values else default
+  """
+  WTForms・WerkzeugのMultiDictと互換性のある読み取り専用のMultiDictクラス
+
+  キー -> 値のリストの辞書（parse_qsの結果など）をコピーせずに保持します。
+  loaderを指定した場合は、最初にアクセスされたときにloader()を呼んで辞書を作成します。
+  """
+  __slots__ = ('_data', '_loader')
+
+  def __init__(self, data=None, loader=None):
+    """
+    Args:
+      data: キー -> 値のリストの辞書（コピーせずに使用）
+      loader: 辞書を返す関数（dataを省略した場合に、最初のアクセス時に一度だけ呼ばれる）
+    """
+    if data is None and loader is None:
+      data = {}
+    self._data = data
+    self._loader = loader
+
+  def _get_data(self):
+    data = self._data
+    if data is None:
+      data = self._data = self._loader()
+      self._loader = None
+    return data
+
+  def getlist(self, key, type=None):
+    """
+    指定されたキーの値をリストで取得
+
+    Args:
+      key: キー
+      type: 値の変換関数（ValueErrorになった値は除外）
+    """
+    # 読み込み済みの場合はメソッド呼び出しを省く（WTFormsはフィールドごとにgetlistを呼ぶ）
+    data = self._data
+    if data is None:
+      data = self._get_data()
+    values = data.get(key)
+    if not values:
+      return []
+    if type is None:
+      # 呼び出し元の変更が解析結果に影響しないようコピーを返す
+      return list(values)
+    result = []
+    for value in values:
+      try:
+        result.append(type(value))
+      except ValueError:
+        pass
+    return result
+
+  def get(self, key, default=None, type=None):
+    """
+    指定されたキーの最初の値を取得
+
+    Args:
+      key: キー
+      default: キーがない場合（またはtypeで変換できない場合）の値
+      type: 値の変換関数
+    """
+    data = self._data
+    if data is None:
+      data = self._get_data()
+    values = data.get(key)
+    if not values:
+      return default
+    if type is None:
+      return values[0]
+    try:
+      return type(values[0])
+    except ValueError:
+      return default
 
   def __getitem__(self, key):
     """指定されたキーの最初の値を取得"""
-    values = self.getlist(key)
+    data = self._data
+    if data is None:
+      data = self._get_data()
+    values = data.get(key)
     if not values:
       raise KeyError(key)
     return values[0]
 
   def __contains__(self, key):
     """キーが存在するかチェック"""
-    return key in self._data
+    data = self._data
+    if data is None:
+      data = self._get_data()
+    return key in data
+
+  def __iter__(self):
+    return iter(self._get_data())
+
+  def __len__(self):
+    return len(self._get_data())
 
   def keys(self):
     """すべてのキーを取得"""
-    return self._data.keys()
+    return self._get_data().keys()
+
+  def values(self):
+    """各キーの最初の値を返すイテレーター"""
+    for values in self._get_data().values():
+      if values:
+        yield values[0]
+
+  def items(self, multi=False):
+    """
+    (キー, 値) を返すイテレーター
 
-  def items(self):
-    """すべてのアイテムを取得（最初の値のみ）"""
-    return [(key, self.get(key)) for key in self._data.keys()]
+    Args:
+      multi: Trueの場合はすべての値を、Falseの場合は各キーの最初の値のみを返す
+    """
+    for key, values in self._get_data().items():
+      if multi:
+        for value in values:
+          yield key, value
+      elif values:
+        yield key, values[0]
+
+  def lists(self):
+    """(キー, 値のリスト) を返すイテレーター"""
+    for key, values in self._get_data().items():
+      yield key, list(values)
+
+  def listvalues(self):
+    """値のリストを返すイテレーター"""
+    for values in self._get_data().values():
+      yield list(values)
+
+  def to_dict(self, flat=True):
+    """
+    通常の辞書に変換
+
+    Args:
+      flat: Trueの場合は キー -> 最初の値、Falseの場合は キー -> 値のリスト
+    """
+    if flat:
+      return dict(self.items())
+    return dict(self.lists())
+
+  def __repr__(self):
+    if self._data is None:
+      return f"{type(self).__name__}(<not loaded>)"
+    return f"{type(self).__name__}({list(self.items(multi=True))!r})"
 
 class Request:
   """
@@ -155,7 +348,23 @@ class Request:
     self.id_token = None
     self.refresh_token = None
     self.decode_token = None
+    self.session_id = None
+    # ログインで新しいセッションを作成する（既存のセッションIDは使い回さない）
+    self.new_session = False
+    # トークンのリフレッシュでCognitoが新しいリフレッシュトークンを返した場合
+    self.refresh_token_rotated = False
+    self.issue_signed_cookie = False
     self.body = event.get('body', None)
+    self.is_base64_encoded = bool(event.get('isBase64Encoded'))
+    # ヘッダー名は大文字・小文字を区別しないため小文字で保持
+    self.headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    self._body_bytes = None
+    self._form_data = None
+    self._files = None
+    self._parsed_body = None
+    self._json = _NOT_PARSED
+    # wambda.schema.validate_json で検証済みのJSONボディ
+    self.validated_data = None
 
   def set_token(self, access_token, id_token, refresh_token):
     """認証トークンを設定します。"""
@@ -163,17 +372,106 @@ class Request:
     self.id_token = id_token
     self.refresh_token = refresh_token
 
+  @property
+  def content_type(self):
+    """Content-Typeヘッダーの値（パラメータを含む）"""
+    return self.headers.get('content-type', '')
+
+  def get_body_bytes(self):
+    """
+    リクエストボディをmemoryviewで取得します。
+
+    isBase64Encodedのボディは一度だけデコードされ、以降は同じバッファを返します。
+    """
+    if self._body_bytes is None:
+      if not self.body:
+        data = b''
+      elif self.is_base64_encoded:
+        import base64
+        data = base64.b64decode(self.body)
+      elif isinstance(self.body, bytes):
+        data = self.body
+      else:
+        data = self.body.encode('utf-8')
+      self._body_bytes = memoryview(data)
+    return self._body_bytes
+
+  @property
+  def json(self):
+    """
+    リクエストボディをJSONとして解析した値（リクエスト内でキャッシュ、ボディが空の場合はNone）
+
+    Raises:
+        ValueError: JSONの形式が正しくない場合（json.JSONDecodeError）
+    """
+    if self._json is _NOT_PARSED:
+      if not self.body:
+        self._json = None
+      elif self.is_base64_encoded:
+        # json.loadsはbytesの文字コード（UTF-8/16/32）を判定できる
+        self._json = json.loads(self.get_body_bytes().tobytes())
+      else:
+        self._json = json.loads(self.body)
+    return self._json
+
   def get_form_data(self):
-    """リクエストボディを解析してフォームデータを取得します。"""
-    if self.method == 'POST':
-      parsed_body = urllib.parse.parse_qs(self.body)
-      if parsed_body:
-        # WTFormsと互換性のあるMultiDictを作成
-        return MultiDict(parsed_body)
+    """
+    リクエストボディを解析してフォームデータを取得します。
+
+    application/x-www-form-urlencoded と multipart/form-data に対応し、
+    multipart/form-data のファイルはUploadedFileとして同じMultiDictに含まれます（WTFormsのFileFieldで使用可能）。
+    application/x-www-form-urlencoded のボディは最初に値へアクセスしたときに解析されます。
+    multipart/form-data は形式の誤りをここで検出できるよう、この呼び出しで解析されます。
+    結果はリクエスト内でキャッシュされます。
+
+    Returns:
+        MultiDict: フィールド名 -> 値のリスト
+
+    Raises:
+        ValueError: リクエストメソッドがPOST・PUT・PATCHでない場合
+        wambda.multipart.MultipartError: multipart/form-data の形式が正しくない場合（ValueErrorのサブクラス）
+    """
+    if self.method not in ('POST', 'PUT', 'PATCH'):
+      raise ValueError("リクエストメソッドがPOST・PUT・PATCHではありません")
+    if self._form_data is None:
+      if self.content_type.lower().startswith('multipart/form-data'):
+        # 解析エラーがフォームの検証中（Form(formdata)や.get()）に発生しないよう、ここで解析する
+        fields, files = self._parse_body()
+        self._files = MultiDict(files)
+        self._form_data = MultiDict(fields)
       else:
-        return MultiDict()
-    else:
-      raise ValueError("リクエストメソッドがPOSTではありません")
+        # ボディは最初にフィールドへアクセスしたときに解析する
+        self._form_data = MultiDict(loader=lambda: self._parse_body()[0])
+        self._files = MultiDict(loader=lambda: self._parse_body()[1])
+    return self._form_data
+
+  def _parse_body(self):
+    """ボディを一度だけ解析し、(フィールド, ファイル) の辞書を返します。"""
+    if self._parsed_body is None:
+      if self.content_type.lower().startswith('multipart/form-data'):
+        from wambda import multipart
+        fields, files = multipart.parse(self.get_body_bytes(), self.content_type)
+        # ファイルもフォームデータと同じMultiDictで参照できるようにする
+        for name, uploaded in files.items():
+          fields.setdefault(name, []).extend(uploaded)
+      else:
+        if self.is_base64_encoded:
+          body = str(self.get_body_bytes(), 'utf-8', 'replace')
+        else:
+          body = self.body or ''
+        fields, files = urllib.parse.parse_qs(body), {}
+      self._parsed_body = (fields, files)
+    return self._parsed_body
+
+  def get_files(self):
+    """
+    multipart/form-data でアップロードされたファイルを取得します。
+
+    Returns:
+        MultiDict: フィールド名 -> UploadedFileのリスト
+    """
+    self.get_form_data()
+    return self._files
 
 
 
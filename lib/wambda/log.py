@@ -0,0 +1,200 @@
+"""
+WAMBDA 構造化ログ
+
+1行1レコードのJSONでログを出力するためのフォーマッタとフィルタを提供します。
+メッセージの整形はレコードが実際に出力される時点まで遅延され、
+大きなペイロードは切り詰められます。
+"""
+import json
+import logging
+import random
+import threading
+import time
+
+# ログ設定はLambdaコンテナごとに一度だけ行う
+_configured = False
+_configure_lock = threading.Lock()
+
+# リクエスト単位のコンテキスト（スレッドごとに保持）
+_context = threading.local()
+
+DEFAULT_MAX_LENGTH = 2048
+
+# master.logger の名前
+APP_LOGGER_NAME = "app"
+
+# LOG_REQUEST_TIMING のタイミング行のロガー（LOG_LEVELにかかわらずINFOで出力する）
+TIMING_LOGGER_NAME = "wambda.timing"
+
+# DEBUGのサンプリング時にDEBUGレベルにするロガー（botocore・urllib3などはルートのレベルのまま）
+DEFAULT_DEBUG_LOGGERS = ("wambda", APP_LOGGER_NAME)
+
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()) | {"message", "asctime"}
+
+
+def truncate(text, max_length=DEFAULT_MAX_LENGTH):
+  """
+  文字列を指定の長さで切り詰める
+
+  Args:
+    text: 対象の文字列
+    max_length: 最大文字数（Noneまたは0以下の場合は切り詰めない）
+
+  Returns:
+    str: 切り詰め後の文字列
+  """
+  if max_length is None or max_length <= 0 or len(text) <= max_length:
+    return text
+  return f"{text[:max_length]}...(truncated {len(text) - max_length} chars)"
+
+
+class lazy:
+  """
+  ログ引数の文字列化を出力時まで遅延させるラッパー
+
+  `logger.info("レスポンス: %s", lazy(response))` のように使用すると、
+  INFOが無効な場合はresponseの文字列化が一切行われません。
+  """
+  __slots__ = ("obj", "max_length")
+
+  def __init__(self, obj, max_length=DEFAULT_MAX_LENGTH):
+    self.obj = obj
+    self.max_length = max_length
+
+  def __str__(self):
+    obj = self.obj() if callable(self.obj) else self.obj
+    if isinstance(obj, (dict, list)):
+      text = json.dumps(obj, ensure_ascii=False, default=str)
+    else:
+      text = str(obj)
+    return truncate(text, self.max_length)
+
+  __repr__ = __str__
+
+
+def begin_request(request_id=None, route=None, debug_sample_rate=0.0):
+  """
+  リクエストの開始時にログコンテキストを設定
+
+  Args:
+    request_id: リクエストID（context.aws_request_idなど）
+    route: リクエストパス
+    debug_sample_rate: このリクエストでDEBUGログを出力する確率（0.0〜1.0）
+  """
+  _context.request_id = request_id
+  _context.route = route
+  _context.debug_sampled = debug_sample_rate > 0 and random.random() < debug_sample_rate
+
+
+def get_request_id():
+  """現在のリクエストIDを取得"""
+  return getattr(_context, "request_id", None)
+
+
+class RequestContextFilter(logging.Filter):
+  """
+  レコードにリクエストID・ルートを付与し、DEBUGログをサンプリングするフィルタ
+
+  サンプリング対象外のリクエストのDEBUGレコードは整形前に破棄されます。
+  """
+  def __init__(self, sample_debug=False):
+    super().__init__()
+    self.sample_debug = sample_debug
+
+  def filter(self, record):
+    if self.sample_debug and record.levelno == logging.DEBUG and not getattr(_context, "debug_sampled", False):
+      return False
+    record.request_id = getattr(_context, "request_id", None)
+    record.route = getattr(_context, "route", None)
+    return True
+
+
+class JsonFormatter(logging.Formatter):
+  """
+  ログレコードを1行のJSONに整形するフォーマッタ
+  """
+  def __init__(self, max_length=DEFAULT_MAX_LENGTH):
+    super().__init__()
+    self.max_length = max_length
+
+  def format(self, record):
+    data = {
+      "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+      "level": record.levelname,
+      "logger": record.name,
+      "request_id": getattr(record, "request_id", None),
+      "route": getattr(record, "route", None),
+      "message": truncate(record.getMessage(), self.max_length),
+    }
+    # extra= で渡された値を追加
+    for key, value in record.__dict__.items():
+      if key not in _RESERVED_ATTRS and key not in data:
+        data[key] = value
+    if record.exc_info:
+      data["exception"] = self.formatException(record.exc_info)
+    if record.stack_info:
+      data["stack"] = self.formatStack(record.stack_info)
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def configure(settings):
+  """
+  settings.pyの値に従ってルートロガーを設定（コンテナごとに一度だけ実行）
+
+  参照する設定:
+    LOG_LEVEL: ログレベル（デフォルト: INFO）
+    LOG_FORMAT: 'json' または 'text'（デフォルト: json）
+    LOG_MAX_LENGTH: メッセージの最大文字数（デフォルト: 2048）
+    LOG_DEBUG_SAMPLE_RATE: DEBUGログを出力するリクエストの割合（デフォルト: 0.0）
+    LOG_DEBUG_LOGGERS: サンプリング時にDEBUGレベルにするロガー名（デフォルト: ('wambda', 'app')）
+
+  ルートロガーは常にLOG_LEVELのままにし、サンプリング時もDEBUGにするのは LOG_DEBUG_LOGGERS のロガーだけです。
+  botocoreやurllib3などのライブラリがリクエストごとにDEBUGレコードを作成し、フィルタで破棄されることはありません。
+  タイミング行のロガー（'wambda.timing'）はLOG_LEVELがWARNINGなどでも出力されるよう、INFOに固定します。
+
+  Args:
+    settings: プロジェクト設定モジュール
+
+  Returns:
+    logging.Logger: アプリケーションのロガー（'app'、ルートロガーのハンドラーに伝播する）
+  """
+  global _configured
+  app_logger = logging.getLogger(APP_LOGGER_NAME)
+  if _configured:
+    return app_logger
+
+  with _configure_lock:
+    if _configured:
+      return app_logger
+    root = logging.getLogger()
+
+    log_level_map = {
+      'DEBUG': logging.DEBUG,
+      'INFO': logging.INFO,
+      'WARNING': logging.WARNING,
+      'ERROR': logging.ERROR
+    }
+    log_level = log_level_map.get(getattr(settings, 'LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    sample_rate = getattr(settings, 'LOG_DEBUG_SAMPLE_RATE', 0.0)
+    sample_debug = log_level > logging.DEBUG and sample_rate > 0
+
+    root.setLevel(log_level)
+    # 出力するかどうかは LOG_REQUEST_TIMING で決まるため、LOG_LEVELでは抑制しない
+    logging.getLogger(TIMING_LOGGER_NAME).setLevel(logging.INFO)
+    if sample_debug:
+      # 対象のロガーだけDEBUGレコードを生成し、フィルタで間引く
+      for name in getattr(settings, 'LOG_DEBUG_LOGGERS', DEFAULT_DEBUG_LOGGERS):
+        logging.getLogger(name).setLevel(logging.DEBUG)
+
+    if not root.handlers:
+      root.addHandler(logging.StreamHandler())
+
+    log_format = getattr(settings, 'LOG_FORMAT', 'json')
+    max_length = getattr(settings, 'LOG_MAX_LENGTH', DEFAULT_MAX_LENGTH)
+    for handler in root.handlers:
+      handler.addFilter(RequestContextFilter(sample_debug))
+      if log_format == 'json':
+        handler.setFormatter(JsonFormatter(max_length))
+
+    _configured = True
+  return app_logger
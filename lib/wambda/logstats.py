@@ -0,0 +1,330 @@
+"""
+WAMBDA Lambdaログのレイテンシ集計
+
+Lambdaが出力する REPORT 行と、wambda のリクエストごとのタイミング行（settings.LOG_REQUEST_TIMING）を
+1行ずつ読み込み、ルート（ビュー）ごとにパーセンタイル・コールドスタート率・メモリの余裕を集計します。
+
+  REPORT RequestId: 8f5c...	Duration: 12.34 ms	Billed Duration: 13 ms	Memory Size: 128 MB	Max Memory Used: 70 MB	Init Duration: 250.01 ms
+  {"request_id": "8f5c...", "message": "wambda-timing view=app.views.detail method=GET status=200 duration_ms=10.52", ...}
+
+Lambdaのログ形式をJSON（LoggingConfig の LogFormat: JSON）にした場合の platform.report レコードと
+"requestId" キーにも対応します。
+
+パーセンタイルは対数バケットのヒストグラム（相対誤差約1%）で求めるため、
+行数が数百万になってもメモリ使用量はルート数に比例する程度で一定です。
+"""
+import csv
+import io
+import json
+import math
+import re
+from collections import OrderedDict
+
+REPORT_PATTERN = re.compile(
+  r"REPORT RequestId: (?P<request_id>[0-9a-fA-F-]+)\s+"
+  r"Duration: (?P<duration>[\d.]+) ms\s+"
+  r"Billed Duration: (?P<billed>[\d.]+) ms\s+"
+  r"Memory Size: (?P<memory_size>\d+) MB\s+"
+  r"Max Memory Used: (?P<memory_used>\d+) MB"
+  r"(?:\s+Init Duration: (?P<init>[\d.]+) ms)?"
+)
+
+TIMING_PATTERN = re.compile(
+  r"wambda-timing view=(?P<view>\S+) method=(?P<method>\S+) status=(?P<status>\S+) duration_ms=(?P<duration>[\d.]+)"
+)
+
+# JSON形式（LOG_FORMAT = 'json' の "request_id"、LambdaのJSONログ形式の "requestId"）と、
+# Lambdaランタイムのテキスト形式（[INFO]\t時刻\tリクエストID\tメッセージ）
+REQUEST_ID_PATTERN = re.compile(
+  r'"(?:request_id|requestId)":\s*"(?P<json>[0-9a-fA-F-]+)"|\t(?P<text>[0-9a-fA-F]{8}-[0-9a-fA-F-]{27})\t'
+)
+
+# LambdaのJSONログ形式でのREPORT行に相当するレコードの種類
+PLATFORM_REPORT_TYPE = "platform.report"
+
+# REPORT行より先に出力されたタイミング行を、REPORT行と対応付けるまで保持する最大件数
+MAX_PENDING = 10000
+
+UNKNOWN_ROUTE = "(unknown)"
+ALL_ROUTES = "(all)"
+
+# ヒストグラムのバケットの幅（1バケットあたり2%）
+_BUCKET_BASE = 1.02
+_LOG_BASE = math.log(_BUCKET_BASE)
+
+
+class Histogram:
+  """
+  対数バケットのヒストグラム
+
+  値は (1.02 ** i) の境界で区切られたバケットに数えられ、パーセンタイルはバケットの中央値で近似します。
+  """
+  __slots__ = ("buckets", "count", "total", "min", "max")
+
+  def __init__(self):
+    self.buckets = {}
+    self.count = 0
+    self.total = 0.0
+    self.min = None
+    self.max = None
+
+  def add(self, value):
+    index = int(math.log(value) / _LOG_BASE) if value > 0 else -1 << 30
+    self.buckets[index] = self.buckets.get(index, 0) + 1
+    self.count += 1
+    self.total += value
+    if self.min is None or value < self.min:
+      self.min = value
+    if self.max is None or value > self.max:
+      self.max = value
+
+  @property
+  def mean(self):
+    return self.total / self.count if self.count else None
+
+  def percentile(self, p):
+    """
+    パーセンタイルを取得
+
+    Args:
+      p: 0〜100
+
+    Returns:
+      float: 近似値（値がない場合はNone）
+    """
+    if not self.count:
+      return None
+    rank = max(1, math.ceil(self.count * p / 100))
+    seen = 0
+    for index in sorted(self.buckets):
+      seen += self.buckets[index]
+      if seen >= rank:
+        if index == -1 << 30:
+          return 0.0
+        value = _BUCKET_BASE ** (index + 0.5)
+        # 近似値が実際の最小値・最大値を超えないようにする
+        return min(max(value, self.min), self.max)
+    return self.max
+
+
+class RouteStats:
+  """ルートごとの集計値"""
+  __slots__ = ("duration", "billed", "init", "handler", "memory_used_max", "memory_size", "min_headroom", "statuses")
+
+  def __init__(self):
+    self.duration = Histogram()
+    self.billed = 0.0
+    self.init = Histogram()
+    self.handler = Histogram()
+    self.memory_used_max = 0
+    self.memory_size = 0
+    self.min_headroom = None
+    self.statuses = {}
+
+  def add_report(self, report):
+    self.duration.add(report["duration"])
+    self.billed += report["billed"]
+    if report["init"] is not None:
+      self.init.add(report["init"])
+    self.memory_used_max = max(self.memory_used_max, report["memory_used"])
+    self.memory_size = max(self.memory_size, report["memory_size"])
+    headroom = report["memory_size"] - report["memory_used"]
+    if self.min_headroom is None or headroom < self.min_headroom:
+      self.min_headroom = headroom
+
+  def add_timing(self, timing):
+    self.handler.add(timing["duration"])
+    status = timing["status"]
+    self.statuses[status] = self.statuses.get(status, 0) + 1
+
+  def to_dict(self, route):
+    count = self.duration.count
+
+    def rounded(value):
+      return round(value, 2) if value is not None else None
+
+    return {
+      "route": route,
+      "invocations": count,
+      "p50_ms": rounded(self.duration.percentile(50)),
+      "p90_ms": rounded(self.duration.percentile(90)),
+      "p99_ms": rounded(self.duration.percentile(99)),
+      "max_ms": rounded(self.duration.max),
+      "mean_ms": rounded(self.duration.mean),
+      "billed_ms": round(self.billed, 2),
+      "cold_starts": self.init.count,
+      "cold_start_rate": round(self.init.count / count, 4) if count else None,
+      "init_p50_ms": rounded(self.init.percentile(50)),
+      "init_max_ms": rounded(self.init.max),
+      "handler_p50_ms": rounded(self.handler.percentile(50)),
+      "handler_p99_ms": rounded(self.handler.percentile(99)),
+      "memory_size_mb": self.memory_size or None,
+      "max_memory_used_mb": self.memory_used_max or None,
+      "min_headroom_mb": self.min_headroom,
+      "min_headroom_rate": round(self.min_headroom / self.memory_size, 4) if self.memory_size else None,
+      "statuses": dict(sorted(self.statuses.items())),
+    }
+
+
+def _parse_platform_report(message):
+  """LambdaのJSONログ形式の platform.report レコードを解析"""
+  try:
+    data = json.loads(message)
+  except ValueError:
+    return None
+  if not isinstance(data, dict) or data.get("type") != PLATFORM_REPORT_TYPE:
+    return None
+  record = data.get("record") or {}
+  metrics = record.get("metrics") or {}
+  try:
+    return {
+      "request_id": record["requestId"],
+      "duration": float(metrics["durationMs"]),
+      "billed": float(metrics["billedDurationMs"]),
+      "memory_size": int(metrics["memorySizeMB"]),
+      "memory_used": int(metrics["maxMemoryUsedMB"]),
+      "init": float(metrics["initDurationMs"]) if metrics.get("initDurationMs") is not None else None,
+    }
+  except (KeyError, TypeError, ValueError):
+    return None
+
+
+def parse_report(message):
+  """REPORT行（またはJSONログ形式の platform.report レコード）を解析（該当しない場合はNone）"""
+  if PLATFORM_REPORT_TYPE in message:
+    return _parse_platform_report(message)
+  match = REPORT_PATTERN.search(message)
+  if match is None:
+    return None
+  return {
+    "request_id": match["request_id"],
+    "duration": float(match["duration"]),
+    "billed": float(match["billed"]),
+    "memory_size": int(match["memory_size"]),
+    "memory_used": int(match["memory_used"]),
+    "init": float(match["init"]) if match["init"] else None,
+  }
+
+
+def parse_timing(message):
+  """wambdaのタイミング行を解析（タイミング行でない場合はNone）"""
+  match = TIMING_PATTERN.search(message)
+  if match is None:
+    return None
+  request_id = REQUEST_ID_PATTERN.search(message)
+  return {
+    "request_id": (request_id["json"] or request_id["text"]) if request_id else None,
+    "view": match["view"],
+    "method": match["method"],
+    "status": match["status"],
+    "duration": float(match["duration"]),
+  }
+
+
+class LatencyStats:
+  """
+  ログ行を逐次集計するクラス
+
+    stats = LatencyStats()
+    for line in lines:
+      stats.add_line(line)
+    print(stats.format_table())
+
+  Args:
+    by_method: Trueの場合、ルートを 'GET app.views.detail' のようにメソッドごとに分ける
+  """
+  def __init__(self, by_method=False):
+    self.by_method = by_method
+    self.routes = {}
+    self.total = RouteStats()
+    self.lines = 0
+    self._pending = OrderedDict()
+
+  def _route(self, route):
+    stats = self.routes.get(route)
+    if stats is None:
+      stats = self.routes[route] = RouteStats()
+    return stats
+
+  def add_line(self, message):
+    """ログ行（イベントのメッセージ）を1行集計"""
+    self.lines += 1
+    if "REPORT RequestId" in message or PLATFORM_REPORT_TYPE in message:
+      report = parse_report(message)
+      if report is not None:
+        route = self._pending.pop(report["request_id"], UNKNOWN_ROUTE)
+        self._route(route).add_report(report)
+        self.total.add_report(report)
+      return
+    if "wambda-timing" in message:
+      timing = parse_timing(message)
+      if timing is None:
+        return
+      route = f'{timing["method"]} {timing["view"]}' if self.by_method else timing["view"]
+      self._route(route).add_timing(timing)
+      self.total.add_timing(timing)
+      if timing["request_id"]:
+        self._pending[timing["request_id"]] = route
+        # REPORT行が見つからないリクエストで保持する件数が増え続けないようにする
+        if len(self._pending) > MAX_PENDING:
+          self._pending.popitem(last=False)
+
+  def rows(self):
+    """集計結果の行（全体、続いて呼び出し回数の多い順のルート）"""
+    rows = [self.total.to_dict(ALL_ROUTES)]
+    routes = sorted(self.routes.items(), key=lambda item: (-item[1].duration.count, -item[1].handler.count, item[0]))
+    rows.extend(stats.to_dict(route) for route, stats in routes)
+    return rows
+
+  def to_json(self):
+    return json.dumps({"lines": self.lines, "routes": self.rows()}, ensure_ascii=False, indent=2)
+
+  def to_csv(self):
+    output = io.StringIO()
+    rows = self.rows()
+    writer = csv.DictWriter(output, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    for row in rows:
+      row = dict(row)
+      row["statuses"] = " ".join(f"{status}:{count}" for status, count in row["statuses"].items())
+      writer.writerow(row)
+    return output.getvalue()
+
+  def format_table(self):
+    columns = (
+      ("route", "route", "<"),
+      ("invocations", "n", ">"),
+      ("p50_ms", "p50", ">"),
+      ("p90_ms", "p90", ">"),
+      ("p99_ms", "p99", ">"),
+      ("max_ms", "max", ">"),
+      ("cold_start_rate", "cold%", ">"),
+      ("init_p50_ms", "init p50", ">"),
+      ("max_memory_used_mb", "mem max", ">"),
+      ("min_headroom_rate", "headroom", ">"),
+    )
+    table = [[title for _, title, _ in columns]]
+    for row in self.rows():
+      cells = []
+      for key, _, _ in columns:
+        value = row[key]
+        if value is None:
+          cells.append("-")
+        elif key.endswith("_rate"):
+          cells.append(f"{value * 100:.1f}%")
+        elif key == "max_memory_used_mb":
+          cells.append(f"{value}/{row['memory_size_mb']}MB")
+        elif isinstance(value, float):
+          cells.append(f"{value:.1f}")
+        else:
+          cells.append(str(value))
+      table.append(cells)
+    widths = [max(len(cells[i]) for cells in table) for i in range(len(columns))]
+    lines = []
+    for cells in table:
+      lines.append("  ".join(
+        cell.ljust(width) if align == "<" else cell.rjust(width)
+        for cell, width, (_, _, align) in zip(cells, widths, columns)
+      ).rstrip())
+    lines.append(f"({self.lines} lines; durations in ms; route {UNKNOWN_ROUTE} = REPORT lines without a wambda-timing line)")
+    return "\n".join(lines)
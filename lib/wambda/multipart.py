@@ -0,0 +1,242 @@
+"""
+WAMBDA multipart/form-data パーサー
+
+API Gatewayから渡されたボディ（Base64デコード済みのbytes）を、パートごとにmemoryviewで切り出して解析します。
+ファイルのパートはコピーせずに保持し、一定サイズを超えるものは /tmp の一時ファイルに書き出します。
+
+  fields, files = parse(master.request.get_body_bytes(), content_type)
+  fields  # {'title': ['...']}
+  files   # {'attachment': [UploadedFile, ...]}
+"""
+import io
+import os
+import shutil
+import tempfile
+import urllib.parse
+
+# これより大きいファイルのパートは /tmp に書き出す
+DEFAULT_SPOOL_SIZE = 1024 * 1024
+
+# パート数の上限（巨大なリクエストで大量のオブジェクトを作らない）
+DEFAULT_MAX_PARTS = 1000
+
+
+class MultipartError(ValueError):
+  """multipart/form-data の形式が正しくない場合に発生する例外"""
+  pass
+
+
+def parse_options_header(value):
+  """
+  Content-Type・Content-Disposition のようなヘッダーを値とパラメータに分割
+
+  Args:
+    value: 'form-data; name="file"; filename="a.png"'
+
+  Returns:
+    (str, dict): ('form-data', {'name': 'file', 'filename': 'a.png'})
+  """
+  value = value or ""
+  main, _, rest = value.partition(";")
+  params = {}
+  while rest:
+    rest = rest.lstrip()
+    key, eq, rest = rest.partition("=")
+    key = key.strip().lower()
+    if not eq:
+      break
+    if rest.startswith('"'):
+      # 引用符で囲まれた値（\" のエスケープを含む）
+      chars = []
+      i = 1
+      while i < len(rest):
+        char = rest[i]
+        if char == "\\" and i + 1 < len(rest):
+          chars.append(rest[i + 1])
+          i += 2
+          continue
+        if char == '"':
+          break
+        chars.append(char)
+        i += 1
+      param_value = "".join(chars)
+      rest = rest[i + 1:].partition(";")[2]
+    else:
+      param_value, _, rest = rest.partition(";")
+      param_value = param_value.strip()
+    if key.endswith("*"):
+      # RFC 5987（filename*=UTF-8''%E3%81%82.txt）
+      charset, _, encoded = param_value.partition("'")
+      _, _, encoded = encoded.partition("'")
+      key = key[:-1]
+      param_value = urllib.parse.unquote(encoded, encoding=charset or "utf-8", errors="replace")
+    elif key in params:
+      continue
+    params[key] = param_value
+  return main.strip().lower(), params
+
+
+class UploadedFile:
+  """
+  アップロードされたファイル（WTFormsのFileFieldのdataとして使用できる）
+
+  Attributes:
+    name: フォームのフィールド名
+    filename: クライアントから送られたファイル名（パスは除去しない）
+    content_type: パートのContent-Type
+    headers: パートのヘッダー（小文字のキー）
+    size: バイト数
+  """
+  def __init__(self, name, filename, content_type, headers, data=None, file=None, size=0):
+    self.name = name
+    self.filename = filename
+    self.content_type = content_type
+    self.headers = headers
+    self.size = size
+    self._data = data
+    self._file = file
+
+  @property
+  def stream(self):
+    """ファイルオブジェクト（/tmp に書き出したもの、またはメモリ上のデータ）"""
+    if self._file is None:
+      self._file = io.BytesIO(self._data)
+    return self._file
+
+  @property
+  def in_memory(self):
+    """メモリ上に保持しているかどうか（Falseの場合は /tmp の一時ファイル）"""
+    return self._data is not None
+
+  def getbuffer(self):
+    """メモリ上のデータをコピーせずにmemoryviewで取得（/tmpに書き出したものはNone）"""
+    return self._data
+
+  def read(self, size=-1):
+    if self._data is not None and self._file is None and size < 0:
+      return bytes(self._data)
+    return self.stream.read(size)
+
+  def seek(self, offset, whence=0):
+    return self.stream.seek(offset, whence)
+
+  def save(self, destination, buffer_size=64 * 1024):
+    """
+    ファイルに保存
+
+    Args:
+      destination: 保存先のパス、または書き込み可能なファイルオブジェクト
+    """
+    if isinstance(destination, (str, os.PathLike)):
+      with open(destination, "wb") as f:
+        self.save(f, buffer_size)
+      return
+    if self._data is not None:
+      destination.write(self._data)
+      return
+    self._file.seek(0)
+    shutil.copyfileobj(self._file, destination, buffer_size)
+
+  def close(self):
+    if self._file is not None:
+      self._file.close()
+
+  def __bool__(self):
+    return bool(self.filename)
+
+  def __repr__(self):
+    return f"<UploadedFile {self.name!r}: {self.filename!r} ({self.content_type}, {self.size} bytes)>"
+
+
+def _parse_part_headers(raw):
+  headers = {}
+  for line in raw.decode("utf-8", "replace").split("\r\n"):
+    key, sep, value = line.partition(":")
+    if sep:
+      headers[key.strip().lower()] = value.strip()
+  return headers
+
+
+def parse(body, content_type, charset="utf-8", spool_size=DEFAULT_SPOOL_SIZE, max_parts=DEFAULT_MAX_PARTS, tmp_dir=None):
+  """
+  multipart/form-data のボディを解析
+
+  Args:
+    body: ボディ（bytes または memoryview）
+    content_type: Content-Typeヘッダーの値（boundaryを含む）
+    charset: テキストフィールドの文字コード
+    spool_size: これより大きいファイルのパートは一時ファイルに書き出す（Noneの場合は書き出さない）
+    max_parts: パート数の上限
+    tmp_dir: 一時ファイルのディレクトリ（省略時は tempfile のデフォルト、Lambdaでは /tmp）
+
+  Returns:
+    (dict, dict): (フィールド名 -> [str], フィールド名 -> [UploadedFile])
+
+  Raises:
+    MultipartError: 形式が正しくない場合
+  """
+  _, params = parse_options_header(content_type)
+  boundary = params.get("boundary")
+  if not boundary:
+    raise MultipartError("Content-Typeにboundaryがありません")
+  view = body if isinstance(body, memoryview) else memoryview(body)
+  # bytes.findで区切りを探し、パートはmemoryviewのスライスで切り出す（コピーしない）
+  data = view.obj if isinstance(view.obj, bytes) and len(view.obj) == len(view) else bytes(view)
+  delimiter = b"--" + boundary.encode("latin-1")
+
+  start = data.find(delimiter)
+  if start < 0:
+    raise MultipartError("boundaryが見つかりません")
+  position = start + len(delimiter)
+
+  fields = {}
+  files = {}
+  parts = 0
+  while True:
+    if data.startswith(b"--", position):
+      # 終端の区切り
+      break
+    if not data.startswith(b"\r\n", position):
+      raise MultipartError("boundaryの後に改行がありません")
+    header_start = position + 2
+    header_end = data.find(b"\r\n\r\n", header_start)
+    if header_end < 0:
+      raise MultipartError("パートのヘッダーが終了していません")
+    next_delimiter = data.find(b"\r\n" + delimiter, header_end)
+    if next_delimiter < 0:
+      raise MultipartError("終端のboundaryが見つかりません")
+    parts += 1
+    if max_parts is not None and parts > max_parts:
+      raise MultipartError(f"パート数が上限（{max_parts}）を超えています")
+
+    headers = _parse_part_headers(data[header_start:header_end])
+    payload = view[header_end + 4:next_delimiter]
+    position = next_delimiter + 2 + len(delimiter)
+
+    disposition, disposition_params = parse_options_header(headers.get("content-disposition"))
+    name = disposition_params.get("name")
+    if disposition != "form-data" or name is None:
+      continue
+
+    if "filename" in disposition_params:
+      size = len(payload)
+      file = None
+      if spool_size is not None and size > spool_size:
+        file = tempfile.TemporaryFile(dir=tmp_dir)
+        file.write(payload)
+        file.seek(0)
+        payload = None
+      files.setdefault(name, []).append(UploadedFile(
+        name,
+        disposition_params["filename"],
+        headers.get("content-type", "application/octet-stream"),
+        headers,
+        data=payload,
+        file=file,
+        size=size
+      ))
+    else:
+      _, type_params = parse_options_header(headers.get("content-type"))
+      fields.setdefault(name, []).append(str(payload, type_params.get("charset", charset), "replace"))
+
+  return fields, files
@@ -0,0 +1,273 @@
+"""
+WAMBDA 静的ファイルのS3デプロイ
+
+ローカルのファイルを、S3に保存したデプロイマニフェスト（キー -> コンテンツハッシュ）と比較し、
+変更のあったファイルだけをスレッドプールで並行にアップロードします。
+`aws s3 sync` のようにバケットの一覧を取得しないため、ファイル数が多くてもリクエストは
+マニフェストの取得・変更ファイルのアップロード・マニフェストの保存だけで済みます。
+
+  wambda-admin.py deploy-static -d staticfiles -b my-bucket --prefix static
+
+Content-Type・Content-Encoding（.gz/.br）・Cache-Control（ハッシュ付きのファイル名はimmutable）は
+ファイルごとに設定されます。
+
+マニフェストは公開されるプレフィックスの外（.wambda/deploy-manifests/<prefix>/manifest.json）に保存されます。
+必要な権限は s3:GetObject・s3:PutObject（delete=Trueの場合は s3:DeleteObject）と、
+マニフェストがまだない場合の判定のための s3:ListBucket です（ない場合、S3はNoSuchKeyではなく
+AccessDeniedを返すため、デプロイはエラーになります）。
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from wambda._lazy import lazy_import
+from wambda.staticfiles import HASH_LENGTH, MANIFEST_NAME
+
+boto3 = lazy_import('boto3')
+
+# 配信されるプレフィックスの外に保存する
+DEPLOY_MANIFEST_PREFIX = ".wambda/deploy-manifests/"
+DEPLOY_MANIFEST_NAME = "manifest.json"
+DEPLOY_MANIFEST_VERSION = 1
+
+# collectstatic が付けたハッシュ付きのファイル名（app.3f2a1b9c0d12.css）
+HASHED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{%d}\.[^./]+(\.gz|\.br)?$" % HASH_LENGTH)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+# これ以上のサイズのファイルはマルチパートでアップロードする
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_ENCODINGS = {".gz": "gzip", ".br": "br"}
+
+
+def object_headers(name, cache_control=DEFAULT_CACHE_CONTROL):
+  """
+  ファイルに設定するContent-Type・Content-Encoding・Cache-Controlを決定
+
+  事前圧縮ファイル（app.css.gz）には元のファイルのContent-Typeと、Content-Encodingを設定します。
+
+  Args:
+    name: ファイル名（相対パス）
+    cache_control: ハッシュ付きでないファイルのCache-Control
+
+  Returns:
+    dict: put_object/upload_fileのExtraArgs
+  """
+  base, ext = os.path.splitext(name)
+  encoding = _CONTENT_ENCODINGS.get(ext)
+  if encoding is None:
+    base = name
+  content_type = mimetypes.guess_type(base)[0] or "application/octet-stream"
+  if content_type.startswith("text/") or content_type in ("application/javascript", "application/json", "image/svg+xml"):
+    content_type += "; charset=utf-8"
+  headers = {
+    "ContentType": content_type,
+    "CacheControl": IMMUTABLE_CACHE_CONTROL if HASHED_NAME_PATTERN.search(name) else cache_control,
+  }
+  if encoding:
+    headers["ContentEncoding"] = encoding
+  return headers
+
+
+def _file_digest(path):
+  sha = hashlib.sha256()
+  with open(path, "rb") as f:
+    while True:
+      chunk = f.read(HASH_CHUNK_SIZE)
+      if not chunk:
+        break
+      sha.update(chunk)
+  return sha.hexdigest()
+
+
+def _iter_files(source_dir, exclude):
+  root = os.path.abspath(source_dir)
+  for dirpath, dirnames, filenames in os.walk(root):
+    dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+    for filename in sorted(filenames):
+      if filename.startswith(".") or filename in exclude:
+        continue
+      path = os.path.join(dirpath, filename)
+      yield os.path.relpath(path, root).replace(os.sep, "/"), path
+
+
+def _object_key(prefix, name):
+  prefix = prefix.strip("/")
+  return f"{prefix}/{name}" if prefix else name
+
+
+def deploy_manifest_key(prefix):
+  """
+  プレフィックスに対応するデプロイマニフェストのキーを取得
+
+  Args:
+    prefix: 静的ファイルのオブジェクトキーのプレフィックス
+
+  Returns:
+    str: '.wambda/deploy-manifests/static/manifest.json' など
+  """
+  return DEPLOY_MANIFEST_PREFIX + _object_key(prefix, DEPLOY_MANIFEST_NAME)
+
+
+class DeployResult:
+  """
+  deploy()の結果
+
+  Attributes:
+    uploaded: アップロードしたファイル名のリスト
+    unchanged: 変更がなくスキップしたファイル名のリスト
+    deleted: 削除したファイル名のリスト
+    uploaded_bytes: アップロードしたバイト数
+    elapsed: 所要時間（秒）
+  """
+  def __init__(self, uploaded, unchanged, deleted, uploaded_bytes, elapsed):
+    self.uploaded = uploaded
+    self.unchanged = unchanged
+    self.deleted = deleted
+    self.uploaded_bytes = uploaded_bytes
+    self.elapsed = elapsed
+
+  def __str__(self):
+    return (
+      f"{len(self.uploaded)} uploaded ({self.uploaded_bytes / 1024:.1f} KiB), "
+      f"{len(self.unchanged)} unchanged, {len(self.deleted)} deleted in {self.elapsed:.2f}s"
+    )
+
+
+def _get_manifest(client, bucket, key):
+  """マニフェストを取得（存在しない場合はNone）"""
+  from botocore.exceptions import ClientError
+  try:
+    response = client.get_object(Bucket=bucket, Key=key)
+  except ClientError as e:
+    # AccessDeniedなどはマニフェストなしとして扱わない（全ファイルを再送し、delete=Trueの判定も誤るため）
+    if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+      return None
+    raise
+  return json.loads(response["Body"].read())
+
+
+def read_deploy_manifest(client, bucket, prefix, manifest_key=None):
+  """
+  S3からデプロイマニフェストを取得（存在しない場合は空）
+
+  Args:
+    client: S3クライアント
+    bucket: S3バケット名
+    prefix: 静的ファイルのオブジェクトキーのプレフィックス
+    manifest_key: マニフェストのキー（省略時はdeploy_manifest_key(prefix)）
+
+  Returns:
+    dict: ファイル名 -> {'hash', 'size'}
+  """
+  manifest = _get_manifest(client, bucket, manifest_key or deploy_manifest_key(prefix))
+  if manifest is None or manifest.get("version") != DEPLOY_MANIFEST_VERSION:
+    return {}
+  return manifest.get("files", {})
+
+
+def deploy(source_dir, bucket, prefix="static", client=None, max_workers=16, cache_control=DEFAULT_CACHE_CONTROL,
+           delete=False, dry_run=False, force=False, on_upload=None, manifest_key=None):
+  """
+  静的ファイルをS3にデプロイ（変更のあったファイルのみ）
+
+  Args:
+    source_dir: アップロードするディレクトリ（collectstaticの出力ディレクトリなど）
+    bucket: S3バケット名
+    prefix: オブジェクトキーのプレフィックス
+    client: S3クライアント（省略時はboto3のデフォルトセッションから作成）
+    max_workers: ハッシュ計算・アップロードの並行数
+    cache_control: ハッシュ付きでないファイルのCache-Control
+    delete: Trueの場合、ローカルから削除されたファイルをS3からも削除する
+    dry_run: Trueの場合、アップロード・削除を行わずに差分だけを返す
+    force: Trueの場合、マニフェストを無視してすべてのファイルをアップロードする
+    on_upload: ファイルごとのアップロード完了時に呼ばれる関数 (name, size)
+    manifest_key: デプロイマニフェストのキー（省略時はdeploy_manifest_key(prefix)、配信されないキーにする）
+
+  Returns:
+    DeployResult
+  """
+  start = time.perf_counter()
+  if not os.path.isdir(source_dir):
+    raise FileNotFoundError(f"ディレクトリが見つかりません: {source_dir}")
+  if client is None:
+    client = boto3.client("s3")
+
+  # collectstaticのマニフェストはLambdaのパッケージに含めるものなのでアップロードしない
+  files = list(_iter_files(source_dir, exclude={MANIFEST_NAME}))
+  manifest_key = manifest_key or deploy_manifest_key(prefix)
+  previous = read_deploy_manifest(client, bucket, prefix, manifest_key)
+  # forceの場合もマニフェストは読み、削除の判定に使う
+  compare = {} if force else previous
+
+  from boto3.s3.transfer import TransferConfig
+  transfer_config = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=MULTIPART_CHUNK_SIZE,
+    # ファイル単位で並行に処理するため、1ファイル内の並行数は抑える
+    max_concurrency=4,
+  )
+
+  def sync_file(name, path):
+    size = os.path.getsize(path)
+    digest = _file_digest(path)
+    entry = {"hash": digest, "size": size}
+    if compare.get(name) == entry:
+      return name, entry, False
+    if not dry_run:
+      client.upload_file(
+        path, bucket, _object_key(prefix, name),
+        ExtraArgs=object_headers(name, cache_control),
+        Config=transfer_config
+      )
+      if on_upload is not None:
+        on_upload(name, size)
+    return name, entry, True
+
+  current = {}
+  uploaded = []
+  unchanged = []
+  uploaded_bytes = 0
+  with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    for name, entry, changed in executor.map(lambda item: sync_file(*item), files):
+      current[name] = entry
+      if changed:
+        uploaded.append(name)
+        uploaded_bytes += entry["size"]
+      else:
+        unchanged.append(name)
+
+  deleted = sorted(set(previous) - set(current))
+  if not dry_run:
+    if delete:
+      # delete_objectsは1回のリクエストで最大1000件
+      for i in range(0, len(deleted), 1000):
+        client.delete_objects(
+          Bucket=bucket,
+          Delete={"Objects": [{"Key": _object_key(prefix, name)} for name in deleted[i:i + 1000]], "Quiet": True}
+        )
+    else:
+      # 削除しない場合は、S3に残っているファイルとしてマニフェストに残す
+      for name in deleted:
+        current[name] = previous[name]
+      deleted = []
+    # マニフェストはすべてのアップロードが成功した後に保存する
+    client.put_object(
+      Bucket=bucket,
+      Key=manifest_key,
+      Body=json.dumps({"version": DEPLOY_MANIFEST_VERSION, "files": current}, sort_keys=True).encode(),
+      ContentType="application/json",
+      CacheControl="no-cache"
+    )
+  elif not delete:
+    deleted = []
+  return DeployResult(uploaded, unchanged, deleted, uploaded_bytes, time.perf_counter() - start)
@@ -0,0 +1,419 @@
+"""
+WAMBDA JSONスキーマ検証
+
+APIのJSONボディを宣言的なスキーマで検証します。スキーマは作成時に一度だけ検証関数（クロージャ）に
+コンパイルされるため、リクエストごとにはスキーマの解釈が発生しません。エラーは 'items[2].price' の
+ようなパス付きで、すべてまとめて返されます。
+
+  from wambda.schema import Schema, String, Integer, List, validate_json
+
+  ORDER = Schema({
+    "customer": {"name": String(max_length=100), "email": String(pattern=r"^[^@]+@[^@]+$")},
+    "items": List({"sku": String(), "quantity": Integer(minimum=1)}, min_items=1),
+    "note": String(required=False, default=""),
+  })
+
+  @validate_json(ORDER)
+  def create_order(master):
+    order = master.request.validated_data   # 検証・補完済みの辞書
+    ...
+
+検証に失敗したリクエストはビューを呼ばずに400を返します。
+"""
+import copy
+import functools
+import math
+import re
+
+_MISSING = object()
+
+
+class SchemaError(ValueError):
+  """
+  検証に失敗した場合に発生する例外
+
+  Attributes:
+    errors: [{'path': 'items[2].price', 'message': '...'}] のリスト（ルートのパスは ''）
+  """
+  def __init__(self, errors):
+    self.errors = errors
+    super().__init__("; ".join(f"{error['path'] or '(root)'}: {error['message']}" for error in errors))
+
+
+class _Invalid(Exception):
+  """コンパイル済みの検証関数の内部で使う例外（errorsは [メッセージ, 逆順のパス] のリスト）"""
+  def __init__(self, errors):
+    super().__init__()
+    self.errors = errors
+
+
+def _fail(message):
+  raise _Invalid([[message, []]])
+
+
+# そのまま共有しても安全なdefaultの型
+_IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None), frozenset)
+
+
+def _default_factory(default):
+  """defaultを、検証のたびに新しい値を返す形にする（リストや辞書が検証結果の間で共有されないように）"""
+  if default is _MISSING or callable(default) or type(default) in _IMMUTABLE_TYPES:
+    return default
+  return functools.partial(copy.deepcopy, default)
+
+
+def _format_path(reversed_parts):
+  path = ""
+  for part in reversed(reversed_parts):
+    if isinstance(part, int):
+      path += f"[{part}]"
+    else:
+      path += f".{part}" if path else part
+  return path
+
+
+class Field:
+  """
+  スキーマのフィールドの基底クラス
+
+  Args:
+    required: Objectのキーとして必須かどうか
+    nullable: nullを許可するかどうか
+    default: キーがない場合の値（呼び出し可能な場合は呼び出した結果、リストや辞書は毎回コピーされる。指定するとrequiredは不要）
+    validators: 追加の検証関数のリスト（値を受け取り、不正な場合はValueErrorを送出）
+  """
+  def __init__(self, required=True, nullable=False, default=_MISSING, validators=()):
+    self.required = required
+    self.nullable = nullable
+    self.default = default
+    self.validators = tuple(validators)
+
+  def compile(self):
+    """検証関数 (value) -> 検証済みの値 を作成"""
+    check = self._compile()
+    nullable = self.nullable
+    validators = self.validators
+    if not nullable and not validators:
+      return check
+
+    def validate(value):
+      if value is None and nullable:
+        return None
+      value = check(value)
+      for validator in validators:
+        try:
+          validator(value)
+        except ValueError as e:
+          _fail(str(e))
+      return value
+    return validate
+
+  def _compile(self):
+    raise NotImplementedError
+
+
+class Any(Field):
+  """任意の値（検証しない）"""
+  def _compile(self):
+    return lambda value: value
+
+
+class String(Field):
+  """
+  文字列
+
+  Args:
+    min_length: 最小文字数
+    max_length: 最大文字数
+    pattern: 正規表現（re.searchで一致を確認）
+    choices: 許可する値のリスト
+    strip: Trueの場合は前後の空白を除去してから検証する
+  """
+  def __init__(self, min_length=None, max_length=None, pattern=None, choices=None, strip=False, **kwargs):
+    super().__init__(**kwargs)
+    self.min_length = min_length
+    self.max_length = max_length
+    self.pattern = pattern
+    self.choices = choices
+    self.strip = strip
+
+  def _compile(self):
+    min_length = self.min_length
+    max_length = self.max_length
+    search = re.compile(self.pattern).search if self.pattern else None
+    choices = frozenset(self.choices) if self.choices is not None else None
+    strip = self.strip
+
+    def validate(value):
+      if type(value) is not str:
+        _fail("文字列である必要があります")
+      if strip:
+        value = value.strip()
+      if min_length is not None and len(value) < min_length:
+        _fail("値が空です" if min_length == 1 else f"{min_length}文字以上である必要があります")
+      if max_length is not None and len(value) > max_length:
+        _fail(f"{max_length}文字以下である必要があります")
+      if search is not None and search(value) is None:
+        _fail("形式が正しくありません")
+      if choices is not None and value not in choices:
+        _fail("許可されていない値です")
+      return value
+    return validate
+
+
+class Number(Field):
+  """
+  数値（整数または小数、真偽値・NaN・Infinityは除く）
+
+  Args:
+    minimum: 最小値
+    maximum: 最大値
+  """
+  types = (int, float)
+  message = "数値である必要があります"
+
+  def __init__(self, minimum=None, maximum=None, **kwargs):
+    super().__init__(**kwargs)
+    self.minimum = minimum
+    self.maximum = maximum
+
+  def _compile(self):
+    types = self.types
+    message = self.message
+    minimum = self.minimum
+    maximum = self.maximum
+
+    def validate(value):
+      # bool は int のサブクラスのため、typeで厳密に判定する
+      if type(value) not in types:
+        _fail(message)
+      # json.loadsはNaN・Infinityを受け付けるため、有限の値か確認する
+      if type(value) is float and not math.isfinite(value):
+        _fail("有限の数値である必要があります")
+      if minimum is not None and value < minimum:
+        _fail(f"{minimum}以上である必要があります")
+      if maximum is not None and value > maximum:
+        _fail(f"{maximum}以下である必要があります")
+      return value
+    return validate
+
+
+class Integer(Number):
+  """整数（真偽値は除く）"""
+  types = (int,)
+  message = "整数である必要があります"
+
+
+class Boolean(Field):
+  """真偽値"""
+  def _compile(self):
+    def validate(value):
+      if type(value) is not bool:
+        _fail("真偽値である必要があります")
+      return value
+    return validate
+
+
+class List(Field):
+  """
+  配列
+
+  Args:
+    item: 要素のスキーマ（Fieldまたは辞書）
+    min_items: 最小要素数
+    max_items: 最大要素数
+  """
+  def __init__(self, item=None, min_items=None, max_items=None, **kwargs):
+    super().__init__(**kwargs)
+    self.item = item if item is not None else Any()
+    self.min_items = min_items
+    self.max_items = max_items
+
+  def _compile(self):
+    check = compile_field(self.item)
+    min_items = self.min_items
+    max_items = self.max_items
+
+    def validate(value):
+      if type(value) is not list:
+        _fail("配列である必要があります")
+      if min_items is not None and len(value) < min_items:
+        _fail(f"{min_items}件以上である必要があります")
+      if max_items is not None and len(value) > max_items:
+        _fail(f"{max_items}件以下である必要があります")
+      result = []
+      errors = None
+      for index, item in enumerate(value):
+        try:
+          result.append(check(item))
+        except _Invalid as e:
+          for error in e.errors:
+            error[1].append(index)
+          if errors is None:
+            errors = e.errors
+          else:
+            errors.extend(e.errors)
+      if errors is not None:
+        raise _Invalid(errors)
+      return result
+    return validate
+
+
+class Object(Field):
+  """
+  オブジェクト
+
+  Args:
+    fields: キー -> スキーマ（Fieldまたは辞書）の辞書
+    extra: スキーマにないキーの扱い（'forbid': エラー、'ignore': 除去、'allow': そのまま残す）
+  """
+  def __init__(self, fields, extra="forbid", **kwargs):
+    super().__init__(**kwargs)
+    if extra not in ("forbid", "ignore", "allow"):
+      raise ValueError(f"extraは'forbid'・'ignore'・'allow'のいずれかである必要があります: {extra}")
+    self.fields = fields
+    self.extra = extra
+
+  def _compile(self):
+    compiled = tuple(
+      (name, compile_field(field), getattr(field, "required", True), _default_factory(getattr(field, "default", _MISSING)))
+      for name, field in self.fields.items()
+    )
+    known = frozenset(self.fields)
+    extra = self.extra
+
+    def validate(value):
+      if type(value) is not dict:
+        _fail("オブジェクトである必要があります")
+      result = {}
+      errors = None
+      present = 0
+      for name, check, required, default in compiled:
+        item = value.get(name, _MISSING)
+        if item is _MISSING:
+          if default is not _MISSING:
+            result[name] = default() if callable(default) else default
+          elif required:
+            if errors is None:
+              errors = []
+            errors.append(["必須です", [name]])
+          continue
+        present += 1
+        try:
+          result[name] = check(item)
+        except _Invalid as e:
+          for error in e.errors:
+            error[1].append(name)
+          if errors is None:
+            errors = e.errors
+          else:
+            errors.extend(e.errors)
+      # 既知のキーの数と一致すれば、不明なキーを探す必要はない
+      if present < len(value) and extra != "ignore":
+        for name in value:
+          if name in known:
+            continue
+          if extra == "allow":
+            result[name] = value[name]
+          else:
+            if errors is None:
+              errors = []
+            errors.append(["不明なフィールドです", [name]])
+      if errors is not None:
+        raise _Invalid(errors)
+      return result
+    return validate
+
+
+def compile_field(field):
+  """
+  スキーマ（Field、辞書、またはSchema）を検証関数にコンパイル
+
+  辞書は Object(辞書) として扱います。
+  """
+  if isinstance(field, Schema):
+    return field._validate
+  if isinstance(field, dict):
+    field = Object(field)
+  return field.compile()
+
+
+class Schema:
+  """
+  コンパイル済みのスキーマ
+
+  モジュールレベルで作成しておくと、コンパイルはコンテナごとに一度だけ行われます。
+
+  Args:
+    definition: ルートのスキーマ（Fieldまたは辞書）
+    extra: definitionが辞書の場合の、スキーマにないキーの扱い（Objectを参照）
+  """
+  def __init__(self, definition, extra="forbid"):
+    if isinstance(definition, dict):
+      definition = Object(definition, extra=extra)
+    self.definition = definition
+    self._validate = compile_field(definition)
+
+  def validate(self, data):
+    """
+    データを検証
+
+    Returns:
+      検証済みの値（defaultの補完、strip、extra='ignore'のキーの除去を反映した新しい値）
+
+    Raises:
+      SchemaError: 検証に失敗した場合
+    """
+    try:
+      return self._validate(data)
+    except _Invalid as e:
+      raise SchemaError([{"path": _format_path(path), "message": message} for message, path in e.errors]) from None
+
+  def errors(self, data):
+    """
+    データを検証してエラーのリストを取得
+
+    Returns:
+      list: [{'path', 'message'}]（正しい場合は空）
+    """
+    try:
+      self.validate(data)
+    except SchemaError as e:
+      return e.errors
+    return []
+
+
+def validate_json(schema, code=400):
+  """
+  リクエストのJSONボディをスキーマで検証するビューのデコレータ
+
+  検証済みの値は master.request.validated_data に設定されます。
+  JSONの形式が正しくない場合やスキーマに一致しない場合は、ビューを呼ばずに次のJSONを返します。
+
+    {"error": "入力内容が正しくありません", "errors": [{"path": "items[0].quantity", "message": "1以上である必要があります"}]}
+
+  Args:
+    schema: Schema、またはSchemaに渡す定義（辞書・Field）
+    code: エラー時のHTTPステータスコード
+
+  Returns:
+    デコレータ
+  """
+  if not isinstance(schema, Schema):
+    schema = Schema(schema)
+
+  def decorator(func):
+    @functools.wraps(func)
+    def wrapper(master, **kwargs):
+      from wambda.shortcuts import json_response
+      try:
+        data = master.request.json
+      except ValueError:
+        return json_response(master, {"error": "JSONの形式が正しくありません"}, code)
+      try:
+        master.request.validated_data = schema.validate(data)
+      except SchemaError as e:
+        return json_response(master, {"error": "入力内容が正しくありません", "errors": e.errors}, code)
+      return func(master, **kwargs)
+    return wrapper
+  return decorator
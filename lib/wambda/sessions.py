@@ -0,0 +1,219 @@
+"""
+WAMBDA サーバーサイドセッション
+
+settings.SESSION_MODE = 'dynamodb' の場合、Cognitoのトークンを
+DynamoDBのセッションテーブルに保存し、ブラウザには署名付きのセッションIDだけを渡します。
+3つのJWTをCookieで往復させる場合に比べ、リクエストサイズとCookieの解析コストが小さくなります。
+
+  # settings.py
+  SESSION_MODE = 'dynamodb'
+  SESSION_TABLE = 'sessions'      # パーティションキー: session_id (S)、TTL属性: expires_at
+  SESSION_TTL = 30 * 24 * 60 * 60  # 秒（リフレッシュトークンの有効期限に合わせる）
+
+取得したセッションはコンテナ内で SESSION_CACHE_TTL 秒（デフォルト60秒）キャッシュされます。
+サインアウトでセッションを削除しても、他のウォームコンテナのキャッシュに残っている間は
+そのコンテナでセッションが有効なままになるため、許容できる時間に合わせて設定してください。
+"""
+import secrets
+import threading
+import time
+
+from wambda import signing
+
+SESSION_COOKIE_NAME = 'session_id'
+
+# セッションIDのCookieの署名に使う派生鍵の用途
+SESSION_COOKIE_PURPOSE = 'session'
+
+# セッションのコンテナスコープキャッシュ（初回使用時に作成）
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def is_enabled(master):
+  """セッションモードが有効か"""
+  return getattr(master.settings, 'SESSION_MODE', 'cookie') == 'dynamodb'
+
+
+def _get_cache(master):
+  global _cache
+  if _cache is None:
+    from wambda.cache import TTLCache
+    with _cache_lock:
+      if _cache is None:
+        _cache = TTLCache(
+          maxsize=getattr(master.settings, 'SESSION_CACHE_SIZE', 1024),
+          ttl=getattr(master.settings, 'SESSION_CACHE_TTL', 60)
+        )
+  return _cache
+
+
+def _get_table(master):
+  from wambda.dynamodb import get_table
+  return get_table(master.settings.SESSION_TABLE, master.settings.REGION)
+
+
+def _cookie_name(master):
+  return getattr(master.settings, 'SESSION_COOKIE_NAME', SESSION_COOKIE_NAME)
+
+
+def create(master, id_token, access_token, refresh_token):
+  """
+  セッションを作成
+
+  Args:
+    master: Masterインスタンス
+    id_token: IDトークン
+    access_token: アクセストークン
+    refresh_token: リフレッシュトークン
+
+  Returns:
+    str: セッションID
+  """
+  session_id = secrets.token_urlsafe(32)
+  session = {
+    'session_id': session_id,
+    'username': master.request.username,
+    'id_token': id_token,
+    'access_token': access_token,
+    'refresh_token': refresh_token,
+    'expires_at': int(time.time()) + getattr(master.settings, 'SESSION_TTL', 30 * 24 * 60 * 60),
+  }
+  _get_table(master).put_item(Item=session)
+  _get_cache(master).set(session_id, session)
+  return session_id
+
+
+def load(master, session_id):
+  """
+  セッションを取得（ウォームコンテナのキャッシュを優先）
+
+  Args:
+    master: Masterインスタンス
+    session_id: セッションID
+
+  Returns:
+    dict: セッション（存在しないか期限切れの場合はNone）
+  """
+  cache = _get_cache(master)
+  session = cache.get(session_id)
+  if session is None:
+    session = _get_table(master).get_item(Key={'session_id': session_id}).get('Item')
+    if session is None:
+      return None
+    cache.set(session_id, session)
+
+  # DynamoDBのTTLによる削除は即時ではないため、有効期限はここで確認する
+  # （有効期限やトークンのない不完全な項目も無効なセッションとして扱う）
+  expires_at = session.get('expires_at')
+  if expires_at is None or 'refresh_token' not in session or int(expires_at) <= time.time():
+    cache.pop(session_id)
+    return None
+  return session
+
+
+def update_tokens(master, session_id, id_token, access_token, refresh_token=None):
+  """
+  リフレッシュ後のトークンでセッションを更新
+
+  トークンのリフレッシュ専用です。ログイン時はセッションIDを変えるため、create() で新しいセッションを作成してください。
+  同時に（別のタブやコンテナで）サインアウトされてセッションが削除されていた場合は、
+  項目を作り直さずにFalseを返します。
+
+  Args:
+    master: Masterインスタンス
+    session_id: セッションID
+    id_token: 新しいIDトークン
+    access_token: 新しいアクセストークン
+    refresh_token: 新しいリフレッシュトークン（Cognitoがローテーションして返した場合のみ）
+
+  Returns:
+    bool: 更新した場合はTrue、セッションが存在しない場合はFalse
+  """
+  table = _get_table(master)
+  update_expression = 'SET id_token = :id_token, access_token = :access_token'
+  values = {':id_token': id_token, ':access_token': access_token}
+  if refresh_token:
+    update_expression += ', refresh_token = :refresh_token'
+    values[':refresh_token'] = refresh_token
+  try:
+    response = table.update_item(
+      Key={'session_id': session_id},
+      UpdateExpression=update_expression,
+      ConditionExpression='attribute_exists(session_id)',
+      ExpressionAttributeValues=values,
+      ReturnValues='ALL_NEW'
+    )
+  except table.meta.client.exceptions.ConditionalCheckFailedException:
+    _get_cache(master).pop(session_id)
+    return False
+  _get_cache(master).set(session_id, response['Attributes'])
+  return True
+
+
+def delete(master, session_id):
+  """
+  セッションを削除
+
+  Args:
+    master: Masterインスタンス
+    session_id: セッションID
+  """
+  _get_cache(master).pop(session_id)
+  _get_table(master).delete_item(Key={'session_id': session_id})
+
+
+def get_session_id_from_cookie(master, cookies):
+  """
+  Cookieから署名付きセッションIDを取り出して検証
+
+  Args:
+    master: Masterインスタンス
+    cookies: Cookieヘッダーの値
+
+  Returns:
+    str: セッションID（Cookieがない場合はNone、署名が不正な場合はFalse）
+  """
+  name = _cookie_name(master)
+  for cookie in cookies.split(';'):
+    key, _, value = cookie.strip().partition('=')
+    if key == name:
+      return signing.unsign(value, _cookie_key(master)) or False
+  return None
+
+
+def _cookie_key(master):
+  """セッションIDのCookieの署名鍵（認証Cookieなどとは別の派生鍵）"""
+  return signing.derive_key(signing.get_secret_key(master), SESSION_COOKIE_PURPOSE)
+
+
+def generate_cookie(master, session_id):
+  """
+  セッションIDのCookieを生成
+
+  Args:
+    master: Masterインスタンス
+    session_id: セッションID
+
+  Returns:
+    str: Set-Cookieヘッダーの値
+  """
+  value = signing.sign(session_id, _cookie_key(master))
+  max_age = getattr(master.settings, 'SESSION_TTL', 30 * 24 * 60 * 60)
+  cookie = f"{_cookie_name(master)}={value}; Path=/; Max-Age={max_age}; HttpOnly; SameSite=Lax"
+  if not master.local:
+    cookie += "; Secure"
+  return cookie
+
+
+def generate_clear_cookie(master):
+  """
+  セッションIDのCookie削除用の期限切れCookieを生成
+
+  Args:
+    master: Masterインスタンス
+
+  Returns:
+    str: Set-Cookieヘッダーの値
+  """
+  return f"{_cookie_name(master)}=; Path=/; Max-Age=0; HttpOnly; SameSite=Lax"
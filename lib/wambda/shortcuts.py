@@ -50,6 +50,10 @@ def static(master, file_path):
     """
     静的ファイルのURLを生成する
     
+    settings.STATIC_MANIFEST が設定されている場合は、collectstatic が生成した
+    マニフェストからハッシュ付きのファイル名（css/app.3f2a1b9c0d12.css）を返します。
+    マニフェストにないファイルは元のパスのまま返します。
+    
     Args:
         master: Masterインスタンス
         file_path: 静的ファイルのパス
@@ -57,6 +61,12 @@ def static(master, file_path):
     Returns:
         静的ファイルの完全なURLパス
     """
+    manifest_path = getattr(master.settings, "STATIC_MANIFEST", None)
+    if manifest_path:
+        from wambda.staticfiles import load_manifest
+        # マニフェストはコンテナごとに一度だけ読み込まれる
+        file_path = load_manifest(manifest_path).get(file_path.lstrip("/"), file_path)
+    
     # 静的ファイルのベースURLを取得
     static_url = _normalize_path(master.settings.STATIC_URL)
     
@@ -130,6 +140,30 @@ def gen_response(master, body, content_type="text/html; charset=UTF-8", code=200
     
     return response
 
+# Lambdaコンテナレベルのキャッシュ（テンプレートディレクトリごと）
+_jinja_envs = {}
+
+def get_jinja_env(settings):
+    """
+    Jinja2環境を取得（テンプレートディレクトリごとに一度だけ作成）
+    
+    Args:
+        settings: プロジェクト設定モジュール
+        
+    Returns:
+        jinja2.Environment
+    """
+    env = _jinja_envs.get(settings.TEMPLATE_DIR)
+    if env is None:
+        import jinja2
+        env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(settings.TEMPLATE_DIR),
+        )
+        # テンプレート内で使用可能なグローバル関数を登録
+        _register_template_globals(env)
+        _jinja_envs[settings.TEMPLATE_DIR] = env
+    return env
+
 def render(master, template_file, context={}, content_type="text/html; charset=UTF-8", code=200):
     """
     Jinja2テンプレートをレンダリングしてHTMLレスポンスを生成
@@ -144,15 +178,8 @@ def render(master, template_file, context={}, content_type="text/html; charset=U
     Returns:
         レンダリングされたHTMLレスポンス
     """
-    import jinja2
-    
-    # Jinja2環境の設定
-    env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(master.settings.TEMPLATE_DIR),
-    )
-    
-    # テンプレート内で使用可能なグローバル関数を登録
-    _register_template_globals(env)
+    # Jinja2環境はコンテナ内で再利用され、コンパイル済みのテンプレートもキャッシュされる
+    env = get_jinja_env(master.settings)
     
     # テンプレートの取得とレンダリング
     template = env.get_template(template_file)
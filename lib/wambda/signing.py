@@ -0,0 +1,166 @@
+"""
+WAMBDA 署名ヘルパー
+
+Cookieなどクライアントに渡す値をHMAC-SHA256で署名・検証します。
+署名鍵はSSMから取得したCognito設定（コンテナレベルでキャッシュ）またはsettingsから決定します。
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+# Lambdaコンテナレベルのキャッシュ
+_secret_key_cache = None
+
+
+def get_secret_key(master):
+  """
+  署名鍵を取得（キャッシュ付き）
+
+  次の順に探します。
+    1. COGNITO_SSM_PARAMS に指定した 'SECRET_KEY'（SSMから取得）
+    2. settings.SECRET_KEY
+    3. Cognitoの 'CLIENT_SECRET' から導出した鍵
+
+  Args:
+    master: Masterインスタンス
+
+  Returns:
+    bytes: 署名鍵
+
+  Raises:
+    ValueError: いずれも設定されていない場合
+  """
+  global _secret_key_cache
+
+  if _secret_key_cache is not None:
+    return _secret_key_cache
+
+  from wambda.authenticate import get_cognito_settings
+  cognito_settings = get_cognito_settings(master)
+
+  secret = cognito_settings.get('SECRET_KEY') or getattr(master.settings, 'SECRET_KEY', None)
+  if secret:
+    key = secret.encode('utf-8')
+  elif cognito_settings.get('CLIENT_SECRET'):
+    # クライアントシークレットそのものではなく、用途を固定した派生鍵を使う
+    key = hmac.new(cognito_settings['CLIENT_SECRET'].encode('utf-8'), b'wambda.signing', hashlib.sha256).digest()
+  else:
+    raise ValueError("署名鍵が見つかりません（SECRET_KEY または CLIENT_SECRET を設定してください）")
+
+  _secret_key_cache = key
+  return key
+
+
+def derive_key(key, purpose):
+  """
+  用途ごとの派生鍵を作成
+
+  同じ署名鍵で署名した値を別の用途（Cookieとアップロードのチケットなど）に流用されないよう、
+  用途の名前を固定したHMACで鍵を分けます。
+
+  Args:
+    key: 署名鍵（get_secret_key()の戻り値）
+    purpose: 用途の名前（'wambda.uploads' など）
+
+  Returns:
+    bytes: 派生鍵
+  """
+  return hmac.new(key, purpose.encode('utf-8'), hashlib.sha256).digest()
+
+
+def b64encode(data):
+  """URLセーフなBase64（パディングなし）"""
+  return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def b64decode(text):
+  """b64encodeの逆変換"""
+  return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def signature(value, key):
+  """
+  値のHMAC-SHA256署名を計算
+
+  Args:
+    value: 署名する文字列
+    key: 署名鍵
+
+  Returns:
+    str: URLセーフなBase64の署名
+  """
+  return b64encode(hmac.new(key, value.encode('utf-8'), hashlib.sha256).digest())
+
+
+def sign(value, key):
+  """
+  値に署名を付与
+
+  Args:
+    value: 署名する文字列（'.'を含んでもよい）
+    key: 署名鍵
+
+  Returns:
+    str: '<value>.<署名>'
+  """
+  return f"{value}.{signature(value, key)}"
+
+
+def unsign(signed_value, key):
+  """
+  署名を検証して元の値を取り出す
+
+  Args:
+    signed_value: sign()の戻り値
+    key: 署名鍵
+
+  Returns:
+    str: 元の値（署名が不正な場合はNone）
+  """
+  if not signed_value or '.' not in signed_value:
+    return None
+  value, sig = signed_value.rsplit('.', 1)
+  if not hmac.compare_digest(sig.encode('utf-8'), signature(value, key).encode('ascii')):
+    return None
+  return value
+
+
+def dumps(payload, key):
+  """
+  辞書をJSONにして署名付きの文字列にする
+
+  Args:
+    payload: JSONに変換できる辞書（'exp'にUNIX時刻を入れると有効期限になる）
+    key: 署名鍵
+
+  Returns:
+    str: '<Base64のJSON>.<署名>'
+  """
+  return sign(b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')), key)
+
+
+def loads(signed_value, key):
+  """
+  dumps()の戻り値を検証して辞書に戻す
+
+  Args:
+    signed_value: dumps()の戻り値
+    key: 署名鍵
+
+  Returns:
+    dict: 元の辞書（署名が不正、形式が不正、または'exp'を過ぎている場合はNone）
+  """
+  value = unsign(signed_value, key)
+  if value is None:
+    return None
+  try:
+    payload = json.loads(b64decode(value))
+  except ValueError:
+    return None
+  if not isinstance(payload, dict):
+    return None
+  if 'exp' in payload and payload['exp'] <= time.time():
+    return None
+  return payload
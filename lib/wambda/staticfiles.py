@@ -0,0 +1,312 @@
+"""
+WAMBDA 静的ファイルのビルド
+
+静的ディレクトリのファイルにコンテンツハッシュ付きの名前（css/app.css -> css/app.3f2a1b9c0d.css）を付けて
+出力ディレクトリにコピーし、事前圧縮ファイル（.gz/.br）とマニフェスト（元の名前 -> ハッシュ付きの名前）を生成します。
+ハッシュ付きのファイルは内容が変わると名前も変わるため、CloudFrontなどで長期間キャッシュでき、
+デプロイのたびにキャッシュを無効化する必要がなくなります。
+
+  wambda-admin.py collectstatic -d static -o staticfiles -m Lambda/staticfiles.json
+
+settings.STATIC_MANIFEST にマニフェストのパスを指定すると、shortcuts.static() がハッシュ付きのURLを返します。
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = "staticfiles.json"
+MANIFEST_VERSION = 1
+
+# ファイル名に含めるハッシュの長さ（16進数の文字数）
+HASH_LENGTH = 12
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# これより小さいファイルは圧縮しない
+COMPRESS_MIN_SIZE = 256
+
+# 事前圧縮の対象とするContent-Type（text/* は常に対象）
+COMPRESSIBLE_TYPES = {
+  "application/javascript",
+  "application/json",
+  "application/manifest+json",
+  "application/wasm",
+  "application/xml",
+  "image/svg+xml",
+  "image/x-icon",
+  "image/vnd.microsoft.icon",
+  "font/ttf",
+  "font/otf",
+  "application/vnd.ms-fontobject",
+}
+
+# エンコーディングごとの事前圧縮ファイルの拡張子
+_ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+# 事前圧縮ファイルはcollectで生成するため収集の対象外
+_IGNORE_SUFFIXES = (".gz", ".br")
+
+# Lambdaコンテナレベルのキャッシュ（マニフェストのパスごと）
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def hashed_name(name, digest):
+  """
+  ハッシュ付きのファイル名を生成
+
+  Args:
+    name: 静的ディレクトリからの相対パス（例: 'css/app.css'）
+    digest: ファイル内容のハッシュ（16進数）
+
+  Returns:
+    str: 'css/app.3f2a1b9c0d12.css'
+  """
+  directory, filename = os.path.split(name)
+  root, ext = os.path.splitext(filename)
+  hashed = f"{root}.{digest[:HASH_LENGTH]}{ext}"
+  return f"{directory}/{hashed}" if directory else hashed
+
+
+def is_compressible(name):
+  """事前圧縮の対象となるファイルかどうか"""
+  content_type = mimetypes.guess_type(name)[0] or ""
+  return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def _file_digest(path):
+  sha = hashlib.sha256()
+  with open(path, "rb") as f:
+    while True:
+      chunk = f.read(HASH_CHUNK_SIZE)
+      if not chunk:
+        break
+      sha.update(chunk)
+  return sha.hexdigest()
+
+
+def _iter_sources(static_dir, skip_dir=None):
+  """静的ディレクトリ内のファイルを (相対パス, os.stat_result) で列挙"""
+  root = os.path.abspath(static_dir)
+  for dirpath, dirnames, filenames in os.walk(root):
+    dirnames[:] = sorted(
+      name for name in dirnames
+      if not name.startswith(".") and os.path.join(dirpath, name) != skip_dir
+    )
+    for filename in sorted(filenames):
+      if filename.startswith(".") or filename.endswith(_IGNORE_SUFFIXES):
+        continue
+      path = os.path.join(dirpath, filename)
+      name = os.path.relpath(path, root).replace(os.sep, "/")
+      yield name, os.stat(path)
+
+
+def _get_brotli():
+  try:
+    import brotli
+  except ImportError:
+    return None
+  return brotli
+
+
+def _write_atomic(path, data):
+  tmp_path = f"{path}.tmp{threading.get_ident()}"
+  with open(tmp_path, "wb") as f:
+    f.write(data)
+  os.replace(tmp_path, path)
+
+
+def _compress(path, encodings):
+  """
+  事前圧縮ファイルを生成（元のファイルより小さくならない場合は作らない）
+
+  Returns:
+    list: 生成したエンコーディング（'gzip', 'br'）
+  """
+  with open(path, "rb") as f:
+    data = f.read()
+  created = []
+  for encoding in encodings:
+    suffix = _ENCODING_SUFFIXES[encoding]
+    if encoding == "gzip":
+      # mtime=0 で同じ内容からは常に同じ圧縮ファイルを生成する
+      compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    else:
+      compressed = _get_brotli().compress(data, quality=11)
+    if len(compressed) < len(data):
+      _write_atomic(path + suffix, compressed)
+      created.append(encoding)
+    elif os.path.exists(path + suffix):
+      os.remove(path + suffix)
+  return created
+
+
+def _process(static_dir, output_dir, name, stat, previous, encodings):
+  """
+  1ファイルをハッシュ・コピー・圧縮
+
+  前回のマニフェストとmtime・サイズが一致し、出力（前回生成した .gz/.br を含む）が揃っていれば
+  ハッシュの計算から省略します。
+
+  Returns:
+    (エントリ, 処理したかどうか)
+  """
+  source = os.path.join(static_dir, name)
+  compress = [encoding for encoding in encodings if stat.st_size >= COMPRESS_MIN_SIZE and is_compressible(name)]
+  if (
+    previous
+    and previous.get("mtime_ns") == stat.st_mtime_ns
+    and previous.get("size") == stat.st_size
+    and previous.get("compress") == compress
+    and all(
+      os.path.exists(os.path.join(output_dir, target_name) + suffix)
+      for target_name in (name, previous["hashed"])
+      for suffix in ("", *(_ENCODING_SUFFIXES[encoding] for encoding in previous.get("encodings", ())))
+    )
+  ):
+    return previous, False
+
+  digest = _file_digest(source)
+  hashed = hashed_name(name, digest)
+  created = []
+  for target_name in (name, hashed):
+    target = os.path.join(output_dir, target_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copy2(source, target)
+    if compress:
+      created = _compress(target, compress)
+  entry = {
+    "hashed": hashed,
+    "hash": digest,
+    "size": stat.st_size,
+    "mtime_ns": stat.st_mtime_ns,
+    "compress": compress,
+    "encodings": created,
+  }
+  return entry, True
+
+
+def read_manifest(path):
+  """
+  マニフェストを読み込む（存在しない・壊れている場合は空のマニフェスト）
+
+  Returns:
+    dict: {'version': 1, 'paths': {...}, 'files': {...}}
+  """
+  try:
+    with open(path) as f:
+      manifest = json.load(f)
+  except (OSError, ValueError):
+    return {"version": MANIFEST_VERSION, "paths": {}, "files": {}}
+  if manifest.get("version") != MANIFEST_VERSION:
+    return {"version": MANIFEST_VERSION, "paths": {}, "files": {}}
+  manifest.setdefault("paths", {})
+  manifest.setdefault("files", {})
+  return manifest
+
+
+class CollectResult:
+  """
+  collect()の結果
+
+  Attributes:
+    manifest: 書き出したマニフェスト
+    processed: ハッシュ・コピーしたファイル名のリスト
+    unchanged: 前回から変更がなく再利用したファイル名のリスト
+    removed: 静的ディレクトリから削除されたファイル名のリスト
+    elapsed: 所要時間（秒）
+  """
+  def __init__(self, manifest, processed, unchanged, removed, elapsed):
+    self.manifest = manifest
+    self.processed = processed
+    self.unchanged = unchanged
+    self.removed = removed
+    self.elapsed = elapsed
+
+  def __str__(self):
+    return (
+      f"{len(self.processed)} processed, {len(self.unchanged)} unchanged, "
+      f"{len(self.removed)} removed in {self.elapsed:.2f}s"
+    )
+
+
+def collect(static_dir, output_dir, manifest_path=None, encodings=("gzip", "br"), max_workers=None, force=False):
+  """
+  静的ファイルを収集し、ハッシュ付きのファイル・事前圧縮ファイル・マニフェストを生成
+
+  Args:
+    static_dir: 静的ファイルのディレクトリ
+    output_dir: 出力ディレクトリ（S3にアップロードするディレクトリ）
+    manifest_path: マニフェストの出力先（省略時は output_dir/staticfiles.json）
+    encodings: 生成する事前圧縮ファイル（'gzip', 'br'）。brotliがない場合 'br' は無視される
+    max_workers: ハッシュ・圧縮を並行実行するスレッド数（省略時はCPU数から決定）
+    force: Trueの場合、前回のマニフェストを使わずにすべてのファイルを処理する
+
+  Returns:
+    CollectResult
+  """
+  start = time.perf_counter()
+  static_dir = os.path.abspath(static_dir)
+  output_dir = os.path.abspath(output_dir)
+  if manifest_path is None:
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+  if not os.path.isdir(static_dir):
+    raise FileNotFoundError(f"静的ファイルのディレクトリが見つかりません: {static_dir}")
+  if output_dir == static_dir:
+    raise ValueError("出力ディレクトリには静的ファイルのディレクトリと別のディレクトリを指定してください")
+  os.makedirs(output_dir, exist_ok=True)
+
+  encodings = [encoding for encoding in encodings if encoding != "br" or _get_brotli() is not None]
+  previous_files = {} if force else read_manifest(manifest_path)["files"]
+
+  # 出力ディレクトリが静的ディレクトリ内にある場合は収集の対象から外す
+  sources = list(_iter_sources(static_dir, skip_dir=output_dir))
+
+  # hashlib・zlib・brotliはGILを解放するため、スレッドで並行に処理できる
+  files = {}
+  processed = []
+  unchanged = []
+  with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4)) as executor:
+    futures = [
+      (name, executor.submit(_process, static_dir, output_dir, name, stat, previous_files.get(name), encodings))
+      for name, stat in sources
+    ]
+    for name, future in futures:
+      entry, changed = future.result()
+      files[name] = entry
+      (processed if changed else unchanged).append(name)
+
+  manifest = {
+    "version": MANIFEST_VERSION,
+    "paths": {name: entry["hashed"] for name, entry in files.items()},
+    "files": files,
+  }
+  os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+  _write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+  removed = sorted(set(previous_files) - set(files))
+  return CollectResult(manifest, processed, unchanged, removed, time.perf_counter() - start)
+
+
+def load_manifest(path):
+  """
+  マニフェストの paths（元の名前 -> ハッシュ付きの名前）を取得（コンテナごとに一度だけ読み込む）
+
+  Args:
+    path: マニフェストのパス
+
+  Returns:
+    dict: 元の名前 -> ハッシュ付きの名前。マニフェストがない場合は空の辞書
+  """
+  paths = _manifests.get(path)
+  if paths is None:
+    with _manifests_lock:
+      paths = _manifests.get(path)
+      if paths is None:
+        paths = _manifests[path] = read_manifest(path)["paths"]
+  return paths
@@ -0,0 +1,66 @@
+"""
+WAMBDA S3直接アップロードのフォームフィールド
+
+wambda.uploads のチケットを受け取るWTFormsのフィールドです。
+wtforms のインポートを、フォームを使う場合に限るため wambda.uploads から分けています。
+"""
+from wtforms import StringField
+from wtforms.validators import StopValidation
+from wtforms.widgets import HiddenInput
+
+from wambda import uploads
+
+
+class S3UploadField(StringField):
+  """
+  S3に直接アップロードしたファイルを受け取るWTFormsのフィールド
+
+  フォームにはファイルそのものではなく、create_upload() のチケットを隠しフィールドで送ります。
+  検証時にチケットの署名とS3上のオブジェクト（head_object）を確認し、成功すると data が
+  UploadedObject になります。検証にはMasterが必要なため、フォームのmetaで渡します。
+
+  他のフィールドのエラーでフォームが再送されることがあるため、検証ではチケットを消費しません。
+  保存時は data.key（アップロードごとに一意）で重複を防ぐか、uploads.mark_completed() で完了を記録してください。
+
+    class AttachmentForm(Form):
+      attachment = S3UploadField("添付ファイル", [validators.DataRequired()], content_types=["image/"])
+
+    form = AttachmentForm(master.request.get_form_data(), meta={"master": master})
+    if form.validate():
+      form.attachment.data.key
+
+  Args:
+    max_size: 最大バイト数（チケットの上限より小さい場合に適用）
+    content_types: 許可するContent-Typeのリスト
+  """
+  widget = HiddenInput()
+
+  def __init__(self, label=None, validators=None, max_size=None, content_types=None, **kwargs):
+    super().__init__(label, validators, **kwargs)
+    self.max_size = max_size
+    self.content_types = content_types
+    self.ticket = None
+
+  def process_formdata(self, valuelist):
+    if valuelist and valuelist[0]:
+      self.ticket = valuelist[0]
+      self.data = self.ticket
+    else:
+      self.ticket = None
+      self.data = None
+
+  def _value(self):
+    return self.ticket or ""
+
+  def pre_validate(self, form):
+    if not self.ticket:
+      return
+    master = getattr(form.meta, "master", None)
+    if master is None:
+      raise ValueError("S3UploadFieldの検証には meta={'master': master} を指定してフォームを作成してください")
+    try:
+      self.data = uploads.complete_upload(master, self.ticket, self.max_size, self.content_types)
+    except uploads.UploadError as e:
+      self.data = None
+      # 後続のバリデーター（DataRequiredなど）でメッセージが上書きされないよう検証を止める
+      raise StopValidation(str(e)) from e
@@ -0,0 +1,464 @@
+"""
+WAMBDA S3への直接アップロード
+
+ファイルをAPI Gateway・Lambdaを経由させず、ブラウザから署名付きURL（presigned POST/PUT）で
+S3に直接アップロードするためのヘルパーです。Lambdaが扱うのは署名の生成と、アップロード後の
+head_object による確認だけなので、ファイルの大きさがLambdaのメモリ・実行時間・ペイロード上限に影響しません。
+
+  1. ビューで create_upload() を呼び、URL・フィールド・チケットをクライアントに渡す
+  2. クライアントがS3にアップロードする
+  3. クライアントがチケットを completion_view() のルート（またはS3UploadFieldを含むフォーム）に送る
+  4. サーバーがチケットの署名を検証し、head_object でサイズ・Content-Typeを確認する
+
+  # settings.py
+  UPLOAD_BUCKET = 'my-upload-bucket'
+
+  # views.py
+  from wambda import uploads
+
+  def upload_form(master):
+    upload = uploads.create_upload(master, filename='photo.png', content_type='image/png')
+    return json_response(master, upload)
+
+WTFormsのフィールド S3UploadField は wambda.upload_fields にあります（uploads.S3UploadField としても参照でき、
+その場合も最初の参照まで wtforms はインポートされません）。
+
+チケットは wambda.signing の署名鍵から派生させたアップロード専用の鍵で署名されるため、
+クライアントは別のキーやバケットを指定できず、認証Cookieなど他の署名付きの値をチケットとして使うこともできません。
+"""
+import logging
+import mimetypes
+import posixpath
+import re
+import threading
+import time
+import uuid
+
+from wambda import signing
+from wambda._lazy import lazy_import
+
+boto3 = lazy_import('boto3')
+
+DEFAULT_PREFIX = "uploads/"
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024
+DEFAULT_EXPIRES_IN = 900
+
+# チケットの有効期限は、署名付きURLの有効期限にこの秒数を加えたもの（アップロード中に期限切れにならないように）
+TICKET_GRACE = 3600
+
+# チケットの署名に使う派生鍵の用途
+TICKET_PURPOSE = "wambda.uploads"
+
+# 完了済みのアップロードを記録するマーカーオブジェクトのプレフィックス（<prefix><key> に空のオブジェクトを作成）
+COMPLETED_PREFIX = ".wambda/completed-uploads/"
+
+# キーに付ける拡張子として許可する文字
+_EXTENSION_PATTERN = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+# Lambdaコンテナレベルのs3クライアント（boto3のクライアントはスレッドセーフ）
+_clients = {}
+_clients_lock = threading.Lock()
+
+logger = logging.getLogger("wambda.uploads")
+
+
+class UploadError(ValueError):
+  """アップロードが確認できない、または条件を満たさない場合に発生する例外"""
+  pass
+
+
+class UploadAlreadyCompleted(UploadError):
+  """同じチケットで既に完了処理が行われている場合に発生する例外"""
+  pass
+
+
+def __getattr__(name):
+  """S3UploadFieldを最初の参照時にインポート（署名・チケットだけを使う場合に wtforms を読み込まない）"""
+  if name == "S3UploadField":
+    from wambda.upload_fields import S3UploadField
+    return S3UploadField
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_s3_client(region_name=None, endpoint_url=None):
+  """
+  署名付きURLの生成に使うs3クライアントを取得（リージョン・エンドポイントごとにキャッシュ）
+
+  署名はSigV4で、クライアント側で計算されるためAWSへのリクエストは発生しません。
+
+  Args:
+    region_name: リージョン（バケットのリージョンと一致させる）
+    endpoint_url: エンドポイント（ローカルのS3互換サーバーなど）
+
+  Returns:
+    botocore.client.S3: クライアント
+  """
+  key = (region_name, endpoint_url)
+  client = _clients.get(key)
+  if client is None:
+    with _clients_lock:
+      client = _clients.get(key)
+      if client is None:
+        from botocore.config import Config
+        client = _clients[key] = boto3.client(
+          "s3",
+          region_name=region_name,
+          endpoint_url=endpoint_url,
+          config=Config(signature_version="s3v4")
+        )
+  return client
+
+
+def _ticket_key(master):
+  """チケットの署名鍵（認証Cookieなどとは別の派生鍵）"""
+  return signing.derive_key(signing.get_secret_key(master), TICKET_PURPOSE)
+
+
+def get_client(master):
+  """
+  settingsに従ってs3クライアントを取得
+
+  settings.UPLOAD_REGION（省略時は settings.REGION）と settings.UPLOAD_ENDPOINT_URL を使用します。
+  """
+  settings = master.settings
+  return get_s3_client(
+    getattr(settings, 'UPLOAD_REGION', None) or getattr(settings, 'REGION', None),
+    getattr(settings, 'UPLOAD_ENDPOINT_URL', None)
+  )
+
+
+def generate_key(prefix=DEFAULT_PREFIX, filename=None):
+  """
+  推測されないオブジェクトキーを生成
+
+  クライアントのファイル名はキーに使わず、拡張子（英数字のみ）だけを引き継ぎます。
+
+  Args:
+    prefix: キーのプレフィックス
+    filename: クライアントのファイル名
+
+  Returns:
+    str: 'uploads/3f2a...c1.png'
+  """
+  extension = posixpath.splitext(filename or "")[1].lower()
+  if not _EXTENSION_PATTERN.match(extension):
+    extension = ""
+  return f"{prefix}{uuid.uuid4().hex}{extension}"
+
+
+def presigned_post(client, bucket, key, max_size=DEFAULT_MAX_SIZE, min_size=1, content_type=None,
+                   expires_in=DEFAULT_EXPIRES_IN, metadata=None, success_status=201):
+  """
+  署名付きPOST（HTMLフォームから直接アップロードできるポリシー）を生成
+
+  サイズの範囲とContent-TypeはポリシーでS3側に強制されます。
+  content_type を 'image/' のように '/' で終わる値にすると、前方一致で許可します。
+
+  Args:
+    client: s3クライアント
+    bucket: バケット名
+    key: オブジェクトキー
+    max_size: 最大バイト数
+    min_size: 最小バイト数
+    content_type: 許可するContent-Type
+    expires_in: 有効期限（秒）
+    metadata: オブジェクトに付けるメタデータ（x-amz-meta-*）
+    success_status: アップロード成功時にS3が返すステータスコード
+
+  Returns:
+    dict: {'url': POST先のURL, 'fields': フォームに含めるフィールド}
+  """
+  fields = {"success_action_status": str(success_status)}
+  conditions = [
+    ["content-length-range", min_size, max_size],
+    {"success_action_status": str(success_status)},
+  ]
+  if content_type:
+    if content_type.endswith("/"):
+      conditions.append(["starts-with", "$Content-Type", content_type])
+    else:
+      fields["Content-Type"] = content_type
+      conditions.append({"Content-Type": content_type})
+  for name, value in (metadata or {}).items():
+    field = f"x-amz-meta-{name}"
+    fields[field] = value
+    conditions.append({field: value})
+  return client.generate_presigned_post(bucket, key, Fields=fields, Conditions=conditions, ExpiresIn=expires_in)
+
+
+def presigned_put(client, bucket, key, content_type=None, expires_in=DEFAULT_EXPIRES_IN, metadata=None):
+  """
+  署名付きPUTのURLを生成（fetchやcurlでボディをそのまま送る場合）
+
+  PUTではサイズを制限できないため、完了時の verify_upload() で確認してください。
+
+  Returns:
+    dict: {'url': PUT先のURL, 'method': 'PUT', 'headers': リクエストに付ける必要のあるヘッダー}
+  """
+  params = {"Bucket": bucket, "Key": key}
+  headers = {}
+  if content_type:
+    params["ContentType"] = content_type
+    headers["Content-Type"] = content_type
+  if metadata:
+    params["Metadata"] = metadata
+    headers.update({f"x-amz-meta-{name}": value for name, value in metadata.items()})
+  url = client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in, HttpMethod="PUT")
+  return {"url": url, "method": "PUT", "headers": headers}
+
+
+def create_upload(master, filename=None, content_type=None, method="POST", bucket=None, prefix=None,
+                  max_size=None, expires_in=None, metadata=None):
+  """
+  アップロード用の署名付きURLとチケットを生成
+
+  bucket・prefix・max_size・expires_in を省略した場合は、それぞれ settings.UPLOAD_BUCKET・
+  UPLOAD_PREFIX・UPLOAD_MAX_SIZE・UPLOAD_EXPIRES_IN（またはモジュールの既定値）を使用します。
+
+  Args:
+    master: Masterインスタンス
+    filename: クライアントのファイル名（拡張子とContent-Typeの推測に使用）
+    content_type: Content-Type（省略時はfilenameから推測、推測できなければ制限しない）
+    method: 'POST'（presigned POST）または 'PUT'（presigned PUT）
+
+  Returns:
+    dict: POSTの場合は {'key', 'url', 'fields', 'ticket'}、PUTの場合は {'key', 'url', 'method', 'headers', 'ticket'}
+  """
+  settings = master.settings
+  bucket = bucket or getattr(settings, 'UPLOAD_BUCKET', None)
+  if not bucket:
+    raise ValueError("アップロード先のバケットが指定されていません（settings.UPLOAD_BUCKET を設定してください）")
+  if prefix is None:
+    prefix = getattr(settings, 'UPLOAD_PREFIX', DEFAULT_PREFIX)
+  max_size = max_size or getattr(settings, 'UPLOAD_MAX_SIZE', DEFAULT_MAX_SIZE)
+  expires_in = expires_in or getattr(settings, 'UPLOAD_EXPIRES_IN', DEFAULT_EXPIRES_IN)
+  if content_type is None and filename:
+    content_type = mimetypes.guess_type(filename)[0]
+
+  client = get_client(master)
+  key = generate_key(prefix, filename)
+  if method == "POST":
+    upload = presigned_post(client, bucket, key, max_size, content_type=content_type, expires_in=expires_in,
+                            metadata=metadata)
+  elif method == "PUT":
+    upload = presigned_put(client, bucket, key, content_type, expires_in, metadata)
+  else:
+    raise ValueError(f"methodは'POST'または'PUT'である必要があります: {method}")
+
+  payload = {"b": bucket, "k": key, "m": max_size, "exp": int(time.time()) + expires_in + TICKET_GRACE}
+  if content_type:
+    payload["t"] = content_type
+  upload["key"] = key
+  upload["ticket"] = signing.dumps(payload, _ticket_key(master))
+  return upload
+
+
+class UploadedObject:
+  """
+  S3にアップロードされたオブジェクト（head_objectの結果）
+
+  Attributes:
+    bucket: バケット名
+    key: オブジェクトキー
+    size: バイト数
+    content_type: Content-Type
+    etag: ETag（引用符なし）
+    metadata: メタデータ（x-amz-meta-* の名前部分 -> 値）
+    last_modified: 最終更新日時
+  """
+  def __init__(self, bucket, key, size, content_type, etag, metadata, last_modified):
+    self.bucket = bucket
+    self.key = key
+    self.size = size
+    self.content_type = content_type
+    self.etag = etag
+    self.metadata = metadata
+    self.last_modified = last_modified
+
+  def to_dict(self):
+    """JSONレスポンス用の辞書"""
+    return {"bucket": self.bucket, "key": self.key, "size": self.size, "content_type": self.content_type,
+            "etag": self.etag}
+
+  def __repr__(self):
+    return f"<UploadedObject s3://{self.bucket}/{self.key} ({self.content_type}, {self.size} bytes)>"
+
+
+def _content_type_allowed(content_type, allowed):
+  base = (content_type or "").split(";")[0].strip().lower()
+  for pattern in allowed:
+    pattern = pattern.lower()
+    if base == pattern or (pattern.endswith("/") and base.startswith(pattern)):
+      return True
+  return False
+
+
+def verify_upload(client, bucket, key, max_size=None, min_size=1, content_types=None, delete_invalid=False):
+  """
+  アップロードされたオブジェクトをダウンロードせずに確認（head_object）
+
+  Args:
+    client: s3クライアント
+    bucket: バケット名
+    key: オブジェクトキー
+    max_size: 最大バイト数
+    min_size: 最小バイト数
+    content_types: 許可するContent-Typeのリスト（'image/' のように '/' で終わる値は前方一致）
+    delete_invalid: Trueの場合、サイズ・Content-Typeの条件を満たさないオブジェクトを削除する
+
+  Returns:
+    UploadedObject
+
+  Raises:
+    UploadError: オブジェクトが存在しない、または条件を満たさない場合
+  """
+  try:
+    response = client.head_object(Bucket=bucket, Key=key)
+  except client.exceptions.ClientError as e:
+    if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+      raise UploadError("アップロードされたファイルが見つかりません") from e
+    raise
+  uploaded = UploadedObject(
+    bucket,
+    key,
+    response["ContentLength"],
+    response.get("ContentType"),
+    response.get("ETag", "").strip('"'),
+    response.get("Metadata", {}),
+    response.get("LastModified")
+  )
+  error = None
+  if uploaded.size < min_size:
+    error = "ファイルが空です" if min_size == 1 else f"ファイルサイズが{min_size}バイト未満です"
+  elif max_size is not None and uploaded.size > max_size:
+    error = f"ファイルサイズが上限（{max_size}バイト）を超えています"
+  elif content_types and not _content_type_allowed(uploaded.content_type, content_types):
+    error = f"許可されていないファイル形式です: {uploaded.content_type}"
+  if error is None:
+    return uploaded
+  if delete_invalid:
+    try:
+      client.delete_object(Bucket=bucket, Key=key)
+    except client.exceptions.ClientError as e:
+      # 削除できなくても、呼び出し元には条件を満たさないことを伝える
+      logger.warning("failed to delete rejected upload s3://%s/%s: %s", bucket, key, e)
+  raise UploadError(error)
+
+
+def mark_completed(client, bucket, key):
+  """
+  アップロードを完了済みとして記録（一度だけ成功する）
+
+  COMPLETED_PREFIX の下に空のマーカーオブジェクトを条件付き書き込み（If-None-Match: *）で作成するため、
+  複数のコンテナで同時に呼ばれても成功するのは1回だけです。
+
+  Raises:
+    UploadAlreadyCompleted: 既に完了済みの場合
+  """
+  try:
+    client.put_object(Bucket=bucket, Key=COMPLETED_PREFIX + key, Body=b"", IfNoneMatch="*")
+  except client.exceptions.ClientError as e:
+    if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "412", "ConditionalRequestConflict"):
+      raise UploadAlreadyCompleted("このアップロードは既に完了しています") from e
+    raise
+
+
+def complete_upload(master, ticket, max_size=None, content_types=None, delete_invalid=None, consume=False):
+  """
+  チケットを検証し、アップロードされたオブジェクトを確認
+
+  キーはサーバーが生成してチケットに署名したものなので、条件を満たさないオブジェクトは
+  デフォルトで削除されます（バケットに残り続けないように）。
+  consume=True の場合は確認後に mark_completed() で完了を記録し、同じチケットの再送を拒否します。
+
+  Args:
+    master: Masterインスタンス
+    ticket: create_upload() が返したチケット
+    max_size: チケットの上限に加えて適用する最大バイト数
+    content_types: 許可するContent-Typeのリスト
+    delete_invalid: 条件を満たさないオブジェクトを削除するか（省略時は settings.UPLOAD_DELETE_INVALID、既定はTrue）
+    consume: Trueの場合、チケットを一度だけ使えるようにする
+
+  Returns:
+    UploadedObject
+
+  Raises:
+    UploadError: チケットが不正・期限切れの場合、またはオブジェクトが条件を満たさない場合
+    UploadAlreadyCompleted: consume=True で、既に完了済みの場合
+  """
+  payload = signing.loads(ticket, _ticket_key(master))
+  if payload is None:
+    raise UploadError("アップロードのチケットが不正か、有効期限が切れています")
+  bucket = payload.get("b")
+  key = payload.get("k")
+  if not isinstance(bucket, str) or not isinstance(key, str) or not bucket or not key:
+    raise UploadError("アップロードのチケットが不正です")
+  limit = payload.get("m")
+  if max_size is not None:
+    limit = min(limit, max_size) if limit else max_size
+  if content_types is None and payload.get("t"):
+    content_types = [payload["t"]]
+  if delete_invalid is None:
+    delete_invalid = getattr(master.settings, 'UPLOAD_DELETE_INVALID', True)
+  client = get_client(master)
+  uploaded = verify_upload(client, bucket, key, limit, content_types=content_types, delete_invalid=delete_invalid)
+  if consume:
+    mark_completed(client, bucket, key)
+  return uploaded
+
+
+def completion_view(on_complete=None, max_size=None, content_types=None, field_name="ticket"):
+  """
+  アップロード完了の通知を受け取るビューを作成
+
+  リクエストのフォームデータまたはJSONの field_name にチケットを入れてPOSTします。
+  確認に成功すると on_complete(master, uploaded) を呼び、その戻り値（Noneの場合はオブジェクトの情報）を
+  JSONで返します。チケットやオブジェクトが不正な場合は400、同じチケットの再送は409を返します
+  （on_complete はアップロードごとに一度だけ呼ばれます）。
+
+    # urls.py
+    urlpatterns = [
+      path("uploads/complete", uploads.completion_view(on_complete=save_attachment), name="upload_complete"),
+    ]
+
+  Args:
+    on_complete: 確認後に呼ぶ関数 (master, UploadedObject) -> JSONに変換できる値
+    max_size: 最大バイト数（チケットの上限より小さい場合に適用）
+    content_types: 許可するContent-Typeのリスト
+    field_name: チケットのフィールド名
+
+  Returns:
+    ビュー関数
+  """
+  def view(master):
+    from wambda.shortcuts import json_response
+    request = master.request
+    if request.method != "POST":
+      return json_response(master, {"error": "POSTで送信してください"}, 405)
+    if request.content_type.lower().startswith("application/json"):
+      import json
+      try:
+        data = json.loads(request.get_body_bytes().tobytes() or b"{}")
+      except ValueError:
+        return json_response(master, {"error": "JSONの形式が正しくありません"}, 400)
+      ticket = data.get(field_name) if isinstance(data, dict) else None
+    else:
+      try:
+        ticket = request.get_form_data().get(field_name)
+      except ValueError as e:
+        # multipart/form-data の形式が正しくない場合など
+        master.logger.info("upload completion: invalid form data: %s", e)
+        return json_response(master, {"error": "フォームデータの形式が正しくありません"}, 400)
+    if not ticket:
+      return json_response(master, {"error": f"{field_name} がありません"}, 400)
+    try:
+      uploaded = complete_upload(master, ticket, max_size, content_types, consume=True)
+    except UploadAlreadyCompleted as e:
+      master.logger.info("upload rejected: %s", e)
+      return json_response(master, {"error": str(e)}, 409)
+    except UploadError as e:
+      master.logger.info("upload rejected: %s", e)
+      return json_response(master, {"error": str(e)}, 400)
+    result = on_complete(master, uploaded) if on_complete is not None else None
+    return json_response(master, uploaded.to_dict() if result is None else result)
+  return view
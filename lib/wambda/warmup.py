@@ -0,0 +1,230 @@
+"""
+WAMBDA コールドスタートの事前準備
+
+Lambdaの初期化フェーズ（モジュールの読み込み時）はCPUがブーストされ、
+リクエストのレイテンシにも含まれません。lambda_function.py のモジュールレベルで
+warmup() を呼び出すと、通常は最初のリクエストの中で行われる準備をここで済ませられます。
+
+  # Lambda/lambda_function.py
+  import os
+  from wambda import warmup
+
+  warmup.warmup(base_dir=os.path.dirname(__file__))
+
+  @warmup.warmer
+  def lambda_handler(event, context):
+    ...
+
+各ステップは個別に有効・無効を切り替えられ、所要時間がログに出力されます。
+"""
+import functools
+import importlib
+import logging
+import sys
+import time
+
+DEFAULT_STEPS = ("settings", "urls", "templates", "clients", "ssm", "jwks")
+
+# ウォーマー（定期実行のping）からの呼び出しであることを示すイベントのキー
+WARMER_KEY = "wambda-warmer"
+
+logger = logging.getLogger("wambda.warmup")
+
+
+class _WarmupMaster:
+  """リクエストなしで設定を参照する関数に渡すためのMasterの代用"""
+  def __init__(self, settings):
+    self.settings = settings
+    self.logger = logger
+
+
+class WarmupReport(list):
+  """
+  warmup()の結果（実行したステップの (名前, 所要秒数, 例外またはNone) のリスト）
+
+  Attributes:
+    elapsed: 全体の所要時間（秒）
+  """
+  elapsed = 0.0
+
+  @property
+  def failed(self):
+    """失敗したステップ名のリスト"""
+    return [name for name, _, error in self if error is not None]
+
+  def __str__(self):
+    parts = [f"{name}={seconds * 1000:.1f}ms" + (" (failed)" if error else "") for name, seconds, error in self]
+    return f"warmup {self.elapsed * 1000:.1f}ms: " + " ".join(parts)
+
+
+def _step_urls(settings, options):
+  # ルートのurls.pyと、そこから参照されるアプリのurls.py・views.pyをすべてインポートする
+  from wambda.urls import Router
+  Router()
+
+
+def _step_templates(settings, options):
+  from wambda.shortcuts import get_jinja_env
+  env = get_jinja_env(settings)
+  names = options.get("templates")
+  if names is None:
+    names = getattr(settings, "WARMUP_TEMPLATES", None)
+  if names is None:
+    names = env.list_templates(extensions=("html", "htm", "txt", "xml"))
+  # コンパイル済みのテンプレートは環境にキャッシュされる
+  for name in names:
+    env.get_template(name)
+
+
+def _step_clients(settings, options):
+  clients = options.get("clients")
+  if clients is None:
+    clients = getattr(settings, "WARMUP_CLIENTS", ())
+  region = getattr(settings, "REGION", None)
+  import boto3
+  for service_name in clients:
+    if service_name == "dynamodb":
+      from wambda.dynamodb import get_resource
+      get_resource(region)
+    else:
+      # サービス定義とエンドポイントの読み込みはboto3のデフォルトセッションにキャッシュされる
+      boto3.client(service_name, region_name=region)
+  if getattr(settings, "UPLOAD_BUCKET", None):
+    from wambda.uploads import get_client
+    get_client(_WarmupMaster(settings))
+  if _uses_cognito(settings):
+    from wambda.authenticate import get_cognito_client
+    get_cognito_client(_WarmupMaster(settings))
+
+
+def _step_ssm(settings, options):
+  if _uses_cognito(settings):
+    from wambda.authenticate import get_cognito_settings
+    get_cognito_settings(_WarmupMaster(settings))
+
+
+def _step_jwks(settings, options):
+  if _uses_cognito(settings):
+    from wambda.authenticate import get_cognito_config
+    # JWKSはPyJWKClientにキャッシュされ、最初のリクエストでの取得が不要になる
+    get_cognito_config(_WarmupMaster(settings)).jwk_client.get_signing_keys()
+
+
+_STEPS = {
+  "urls": _step_urls,
+  "templates": _step_templates,
+  "clients": _step_clients,
+  "ssm": _step_ssm,
+  "jwks": _step_jwks,
+}
+
+
+def _uses_cognito(settings):
+  return bool(getattr(settings, "COGNITO_SSM_PARAMS", None)) and not getattr(settings, "NO_AUTH", False)
+
+
+def warmup(steps=None, base_dir=None, settings_module="project.settings", strict=False, **options):
+  """
+  コールドスタート時の準備を実行
+
+  ステップ:
+    settings  : project.settings のインポート
+    urls      : URLパターンとビューのインポート
+    templates : Jinja2環境の作成とテンプレートのコンパイル（WARMUP_TEMPLATESで対象を指定可能）
+    clients   : boto3クライアントの作成（WARMUP_CLIENTSでサービス名を指定、UPLOAD_BUCKETがあればアップロード用のs3クライアントも）
+    ssm       : Cognito設定のSSMからの取得
+    jwks      : JWKSの取得
+
+  Args:
+    steps: 実行するステップ名のリスト（省略時はsettings.WARMUP_STEPS、なければすべて）
+    base_dir: sys.pathに追加するディレクトリ（通常は lambda_function.py のディレクトリ）
+    settings_module: 設定モジュールのインポートパス
+    strict: Trueの場合、失敗したステップの例外を送出する
+    **options: ステップごとの設定（templates=[...], clients=[...]）
+
+  Returns:
+    WarmupReport: 各ステップの所要時間
+  """
+  start = time.perf_counter()
+  if base_dir and base_dir not in sys.path:
+    sys.path.append(base_dir)
+
+  report = WarmupReport()
+  step_start = time.perf_counter()
+  try:
+    settings = importlib.import_module(settings_module)
+  except Exception as e:
+    # 設定が読み込めない場合は他のステップも実行できない
+    report.append(("settings", time.perf_counter() - step_start, e))
+    report.elapsed = time.perf_counter() - start
+    logger.exception("warmup failed: settings")
+    if strict:
+      raise
+    return report
+
+  report.append(("settings", time.perf_counter() - step_start, None))
+
+  from wambda import log
+  log.configure(settings)
+
+  if steps is None:
+    steps = getattr(settings, "WARMUP_STEPS", DEFAULT_STEPS)
+
+  for name in steps:
+    if name == "settings":
+      continue
+    step = _STEPS.get(name)
+    if step is None:
+      raise ValueError(f"不明なwarmupステップです: {name}")
+    step_start = time.perf_counter()
+    try:
+      step(settings, options)
+      error = None
+    except Exception as e:
+      # 準備の失敗でコールドスタート自体を失敗させない（最初のリクエストで改めて実行される）
+      error = e
+      logger.warning("warmup step %s failed: %s", name, e)
+      if strict:
+        raise
+    report.append((name, time.perf_counter() - step_start, error))
+
+  report.elapsed = time.perf_counter() - start
+  logger.info("%s", report)
+  return report
+
+
+def is_warmer_event(event):
+  """
+  ウォーマーからの呼び出しかどうかを判定
+
+  EventBridgeのスケジュールイベント、または {"wambda-warmer": true} を含むイベントを対象とします。
+
+  Args:
+    event: Lambdaイベント
+
+  Returns:
+    bool: ウォーマーからの呼び出しの場合True
+  """
+  if not isinstance(event, dict):
+    return False
+  if event.get(WARMER_KEY):
+    return True
+  return event.get("source") == "aws.events" and event.get("detail-type") == "Scheduled Event"
+
+
+def warmer(handler):
+  """
+  ウォーマーからの呼び出しに対して、ルーティングや認証を行わずに即座に応答するデコレータ
+
+  Args:
+    handler: lambda_handler
+
+  Returns:
+    デコレートされたハンドラー
+  """
+  @functools.wraps(handler)
+  def wrapper(event, context):
+    if is_warmer_event(event):
+      return {"statusCode": 200, "body": "warm"}
+    return handler(event, context)
+  return wrapper
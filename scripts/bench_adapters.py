@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WAMBDA adapter benchmark
+
+Compares the throughput of the same wambda app on three paths:
+
+  lambda   : lambda_handler(event, context) called directly (one Lambda instance)
+  asgi     : ASGIAdapter called in-process (adapter overhead only)
+  uvicorn  : ASGIAdapter behind uvicorn with N workers over HTTP (requires uvicorn)
+
+Usage:
+  python scripts/bench_adapters.py -l path/to/Lambda -p / -n 2000 --workers 4
+"""
+
+import argparse
+import asyncio
+import http.client
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+
+
+def percentile(values, p):
+  values = sorted(values)
+  if not values:
+    return 0.0
+  index = min(int(len(values) * p / 100), len(values) - 1)
+  return values[index]
+
+
+def report(name, latencies, elapsed):
+  print(f"{name:8s} {len(latencies) / elapsed:10.1f} req/s   "
+        f"p50 {percentile(latencies, 50) * 1000:7.2f} ms   "
+        f"p99 {percentile(latencies, 99) * 1000:7.2f} ms   "
+        f"mean {statistics.mean(latencies) * 1000:7.2f} ms")
+
+
+def bench_lambda(lambda_handler, path, requests):
+  from wambda.debug import create_test_event, LambdaContext
+  latencies = []
+  start = time.perf_counter()
+  for _ in range(requests):
+    t0 = time.perf_counter()
+    lambda_handler(create_test_event(path=path), LambdaContext())
+    latencies.append(time.perf_counter() - t0)
+  report("lambda", latencies, time.perf_counter() - start)
+
+
+def bench_asgi(lambda_handler, path, requests, concurrency):
+  from wambda.adapters import ASGIAdapter
+  app = ASGIAdapter(lambda_handler)
+  latencies = []
+
+  async def one():
+    async def receive():
+      return {"type": "http.request", "body": b""}
+
+    async def send(message):
+      pass
+
+    t0 = time.perf_counter()
+    await app({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []}, receive, send)
+    latencies.append(time.perf_counter() - t0)
+
+  async def run():
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+      async with semaphore:
+        await one()
+
+    await asyncio.gather(*(limited() for _ in range(requests)))
+
+  start = time.perf_counter()
+  asyncio.run(run())
+  report("asgi", latencies, time.perf_counter() - start)
+
+
+def bench_uvicorn(lambda_dir, path, requests, concurrency, workers, port):
+  # uvicornは別プロセスで起動するため、インストールされているかだけを確認する
+  if importlib.util.find_spec("uvicorn") is None:
+    print("uvicorn   skipped (pip install uvicorn)")
+    return
+
+  with tempfile.TemporaryDirectory() as tmp:
+    with open(os.path.join(tmp, "wambda_bench_app.py"), "w") as f:
+      f.write(textwrap.dedent(f"""\
+        import sys
+        sys.path.insert(0, {os.path.abspath(lambda_dir)!r})
+        from lambda_function import lambda_handler
+        from wambda.adapters import ASGIAdapter
+        app = ASGIAdapter(lambda_handler)
+      """))
+    server = subprocess.Popen(
+      [sys.executable, "-m", "uvicorn", "wambda_bench_app:app", "--port", str(port),
+       "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+      cwd=tmp, env={**os.environ, "AWS_SAM_LOCAL": "true"}
+    )
+    try:
+      # 起動を待つ
+      for _ in range(100):
+        try:
+          conn = http.client.HTTPConnection("localhost", port, timeout=1)
+          conn.request("GET", path)
+          conn.getresponse().read()
+          break
+        except OSError:
+          time.sleep(0.1)
+
+      latencies = []
+      lock = threading.Lock()
+      per_thread = max(requests // concurrency, 1)
+
+      def worker():
+        conn = http.client.HTTPConnection("localhost", port)
+        local = []
+        for _ in range(per_thread):
+          t0 = time.perf_counter()
+          conn.request("GET", path)
+          conn.getresponse().read()
+          local.append(time.perf_counter() - t0)
+        with lock:
+          latencies.extend(local)
+
+      threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+      start = time.perf_counter()
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+      report("uvicorn", latencies, time.perf_counter() - start)
+    finally:
+      server.terminate()
+      server.wait()
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark the Lambda path against the ASGI adapter")
+  parser.add_argument("-l", "--lambda-dir", default="Lambda", help="directory containing lambda_function.py")
+  parser.add_argument("-p", "--path", default="/", help="request path")
+  parser.add_argument("-n", "--requests", type=int, default=2000, help="number of requests per path")
+  parser.add_argument("-c", "--concurrency", type=int, default=16, help="concurrent clients")
+  parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="uvicorn workers")
+  parser.add_argument("--port", type=int, default=8765, help="uvicorn port")
+  options = parser.parse_args()
+
+  os.environ.setdefault("AWS_SAM_LOCAL", "true")
+  sys.path.insert(0, os.path.abspath(options.lambda_dir))
+  from lambda_function import lambda_handler
+
+  # ウォームアップ（初回インポート・キャッシュを計測から除外）
+  bench_lambda(lambda_handler, options.path, 10)
+  print("-" * 72)
+  bench_lambda(lambda_handler, options.path, options.requests)
+  bench_asgi(lambda_handler, options.path, options.requests, options.concurrency)
+  bench_uvicorn(options.lambda_dir, options.path, options.requests, options.concurrency, options.workers, options.port)
+
+
+if __name__ == "__main__":
+  main()
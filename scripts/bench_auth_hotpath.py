@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WAMBDA auth hot path microbenchmark
+
+Measures the warm-container cost of the cookie authentication hot path
+before and after CognitoConfig:
+
+  before : settings looked up twice, issuer/JWKS URL f-strings rebuilt and a
+           new PyJWKClient (and therefore a JWKS fetch) on every request;
+           SECRET_HASH recomputed on every call
+  after  : wambda.authenticate._decode_id_token / _calculate_secret_hash
+           using the precomputed CognitoConfig
+
+The JWKS document is served by an in-process wambda.cognito_local server,
+so --latency simulates the network round trip to Cognito.
+
+Requires PyJWT, cryptography and boto3.
+
+Usage:
+  python scripts/bench_auth_hotpath.py -n 2000 --latency 5
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import http.server
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+POOL_ID = "ap-northeast-1_bench"
+CLIENT_ID = "bench"
+CLIENT_SECRET = "bench-secret"
+
+
+def start_cognito(latency):
+  from wambda.cognito_local import UserPool, make_handler_class
+  httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), None)
+  issuer_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+  pool = UserPool(POOL_ID, CLIENT_ID, CLIENT_SECRET, issuer_url=issuer_url)
+  pool.add_user("user", "password")
+  httpd.RequestHandlerClass = make_handler_class(pool, latency=latency, quiet=True)
+  threading.Thread(target=httpd.serve_forever, daemon=True).start()
+  return pool, issuer_url
+
+
+def make_master(issuer_url):
+  settings = types.SimpleNamespace(REGION="ap-northeast-1", COGNITO_ISSUER_URL=issuer_url)
+  request = types.SimpleNamespace(clean_cookie=False)
+  return types.SimpleNamespace(settings=settings, request=request, logger=logging.getLogger("bench"))
+
+
+def legacy_decode_id_token(master, id_token):
+  """_decode_id_token before CognitoConfig (warm container)"""
+  from jwt import decode, PyJWKClient
+  from wambda.authenticate import get_cognito_settings
+  header, payload, signature = id_token.split(".")
+  decoded_payload = json.loads(base64.urlsafe_b64decode(payload + "=="))
+  cognito_settings = get_cognito_settings(master)
+  expected_issuer = f'{master.settings.COGNITO_ISSUER_URL}/{cognito_settings["USER_POOL_ID"]}'
+  if decoded_payload.get("iss") != expected_issuer:
+    return None
+  cognito_settings = get_cognito_settings(master)
+  jwk_client = PyJWKClient(f'{master.settings.COGNITO_ISSUER_URL}/{cognito_settings["USER_POOL_ID"]}/.well-known/jwks.json')
+  signing_key = jwk_client.get_signing_key_from_jwt(id_token)
+  return decode(
+    id_token,
+    signing_key.key,
+    algorithms=["RS256"],
+    audience=cognito_settings["CLIENT_ID"],
+    issuer=f'{master.settings.COGNITO_ISSUER_URL}/{cognito_settings["USER_POOL_ID"]}'
+  )
+
+
+def legacy_secret_hash(master, username):
+  """_calculate_secret_hash before CognitoConfig"""
+  from wambda.authenticate import get_cognito_settings
+  cognito_settings = get_cognito_settings(master)
+  message = username + cognito_settings["CLIENT_ID"]
+  dig = hmac.new(
+    cognito_settings["CLIENT_SECRET"].encode("utf-8"),
+    msg=message.encode("utf-8"),
+    digestmod=hashlib.sha256
+  ).digest()
+  return base64.b64encode(dig).decode()
+
+
+def bench(name, func, iterations):
+  func()
+  start_cpu = time.process_time()
+  start = time.perf_counter()
+  for _ in range(iterations):
+    func()
+  elapsed = time.perf_counter() - start
+  cpu = time.process_time() - start_cpu
+  print(f"{name:22s} {elapsed / iterations * 1_000_000:10.1f} us/call   cpu {cpu / iterations * 1_000_000:10.1f} us/call")
+  return elapsed / iterations
+
+
+def main():
+  parser = argparse.ArgumentParser(description="auth hot path microbenchmark")
+  parser.add_argument("-n", "--iterations", type=int, default=2000, help="iterations per case")
+  parser.add_argument("--latency", type=float, default=0.0, help="simulated Cognito latency for JWKS fetches (ms)")
+  args = parser.parse_args()
+
+  from wambda import authenticate
+
+  pool, issuer_url = start_cognito(args.latency / 1000)
+  master = make_master(issuer_url)
+  authenticate._cognito_settings_cache = {
+    "USER_POOL_ID": POOL_ID,
+    "CLIENT_ID": CLIENT_ID,
+    "CLIENT_SECRET": CLIENT_SECRET,
+  }
+  authenticate._cognito_config = None
+  id_token = pool._issue_tokens("user")["AuthenticationResult"]["IdToken"]
+
+  assert legacy_decode_id_token(master, id_token) == authenticate._decode_id_token(master, id_token)
+  assert legacy_secret_hash(master, "user") == authenticate._calculate_secret_hash(master, "user")
+
+  print("decode_id_token")
+  before = bench("  before", lambda: legacy_decode_id_token(master, id_token), args.iterations)
+  after = bench("  after", lambda: authenticate._decode_id_token(master, id_token), args.iterations)
+  print(f"  speedup {before / after:.1f}x")
+
+  print("secret_hash")
+  before = bench("  before", lambda: legacy_secret_hash(master, "user"), args.iterations * 10)
+  after = bench("  after", lambda: authenticate._calculate_secret_hash(master, "user"), args.iterations * 10)
+  print(f"  speedup {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WAMBDA JSON schema validation benchmark
+
+Compares the per-request CPU cost of validating a nested JSON order payload
+(customer object + list of line items, each with a list of options):
+
+  wtforms         : OrderForm(data=payload) with FormField/FieldList and validate()
+  schema          : wambda.schema.Schema compiled once at import time (the
+                    @validate_json path)
+  schema+compile  : the same schema built and compiled on every request
+                    (what the compile-once design avoids)
+
+Each path is measured with a valid payload and with a payload containing one
+invalid value in the last item. Requires WTForms.
+
+Usage:
+  python scripts/bench_schema.py -n 5000 --items 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+
+def make_payload(items):
+  return {
+    "customer": {"name": "田中太郎", "email": "tanaka@example.com", "phone": "03-0000-0000"},
+    "items": [
+      {
+        "sku": f"SKU-{i:05d}",
+        "quantity": i % 5 + 1,
+        "price": 1200.5,
+        "options": [{"name": "color", "value": "red"}, {"name": "size", "value": "M"}],
+      }
+      for i in range(items)
+    ],
+    "note": "置き配希望",
+    "gift": False,
+  }
+
+
+def build_schema():
+  from wambda.schema import Schema, String, Integer, Number, Boolean, List
+  return Schema({
+    "customer": {
+      "name": String(min_length=1, max_length=100),
+      "email": String(pattern=EMAIL_PATTERN, max_length=254),
+      "phone": String(max_length=20, required=False),
+    },
+    "items": List({
+      "sku": String(min_length=1, max_length=32),
+      "quantity": Integer(minimum=1, maximum=99),
+      "price": Number(minimum=0),
+      "options": List({"name": String(max_length=32), "value": String(max_length=64)}, max_items=10),
+    }, min_items=1, max_items=100),
+    "note": String(max_length=500, required=False, default=""),
+    "gift": Boolean(required=False, default=False),
+  })
+
+
+def build_wtforms():
+  from wtforms import Form, FormField, FieldList, StringField, IntegerField, FloatField, BooleanField
+  from wtforms.validators import DataRequired, Length, Regexp, NumberRange, Optional
+
+  class OptionForm(Form):
+    name = StringField(validators=[Length(max=32)])
+    value = StringField(validators=[Length(max=64)])
+
+  class ItemForm(Form):
+    sku = StringField(validators=[DataRequired(), Length(min=1, max=32)])
+    quantity = IntegerField(validators=[DataRequired(), NumberRange(min=1, max=99)])
+    price = FloatField(validators=[NumberRange(min=0)])
+    options = FieldList(FormField(OptionForm), max_entries=10)
+
+  class CustomerForm(Form):
+    name = StringField(validators=[DataRequired(), Length(min=1, max=100)])
+    email = StringField(validators=[DataRequired(), Regexp(EMAIL_PATTERN), Length(max=254)])
+    phone = StringField(validators=[Optional(), Length(max=20)])
+
+  class OrderForm(Form):
+    customer = FormField(CustomerForm)
+    items = FieldList(FormField(ItemForm), min_entries=1, max_entries=100)
+    note = StringField(validators=[Optional(), Length(max=500)])
+    gift = BooleanField()
+
+  return OrderForm
+
+
+def bench(name, func, iterations):
+  func()
+  start_cpu = time.process_time()
+  start = time.perf_counter()
+  for _ in range(iterations):
+    func()
+  elapsed = time.perf_counter() - start
+  cpu = time.process_time() - start_cpu
+  per_request = cpu / iterations * 1_000_000
+  print(f"{name:24s} {iterations / elapsed:10.0f} ops/s   cpu {per_request:9.1f} us/request")
+  return per_request
+
+
+def main():
+  parser = argparse.ArgumentParser(description="JSON schema validation benchmark")
+  parser.add_argument("-n", "--iterations", type=int, default=5000, help="iterations per path")
+  parser.add_argument("--items", type=int, default=20, help="line items in the payload")
+  args = parser.parse_args()
+
+  from wambda.schema import SchemaError
+
+  valid = make_payload(args.items)
+  invalid = json.loads(json.dumps(valid))
+  invalid["items"][-1]["quantity"] = 0
+  body = json.dumps(valid, ensure_ascii=False)
+  print(f"payload: {args.items} items, {len(body.encode())} bytes of JSON\n")
+
+  schema = build_schema()
+  order_form = build_wtforms()
+
+  # 両方が同じ判定をすることを確認
+  assert order_form(data=valid).validate() and not schema.errors(valid)
+  assert not order_form(data=invalid).validate()
+  errors = schema.errors(invalid)
+  assert errors and errors[0]["path"] == f"items[{args.items - 1}].quantity", errors
+
+  def run_schema(payload):
+    try:
+      schema.validate(payload)
+    except SchemaError:
+      pass
+
+  def run_schema_compile(payload):
+    try:
+      build_schema().validate(payload)
+    except SchemaError:
+      pass
+
+  results = {}
+  for label, payload in (("valid", valid), ("invalid", invalid)):
+    print(f"[{label}]")
+    results[label] = {
+      "wtforms": bench("wtforms", lambda: order_form(data=payload).validate(), args.iterations),
+      "schema": bench("schema", lambda: run_schema(payload), args.iterations),
+      "schema+compile": bench("schema+compile", lambda: run_schema_compile(payload), args.iterations),
+    }
+    print()
+
+  bench("json.loads (for scale)", lambda: json.loads(body), args.iterations)
+  print()
+  for label, result in results.items():
+    print(f"{label}: schema is {result['wtforms'] / result['schema']:.1f}x faster than wtforms")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WAMBDA signed auth cookie benchmark
+
+Compares the per-request CPU cost of the two cookie authentication paths:
+
+  jwt     : RS256 verification of the id_token (signing key already fetched,
+            i.e. the warm-container cost of _decode_id_token)
+  signed  : HMAC-SHA256 verification of the wambda_auth cookie plus the
+            id_token digest check (AUTH_SIGNED_COOKIE_MAX_AGE > 0)
+
+Requires PyJWT and cryptography.
+
+Usage:
+  python scripts/bench_signed_cookie.py -n 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+
+def make_id_token(private_key, issuer, client_id):
+  import jwt
+  now = int(time.time())
+  claims = {
+    "sub": "8f1c2d3e-0000-4000-8000-123456789abc",
+    "aud": client_id,
+    "iss": issuer,
+    "email": "user@example.com",
+    "email_verified": True,
+    "cognito:username": "user",
+    "token_use": "id",
+    "auth_time": now,
+    "iat": now,
+    "exp": now + 3600,
+  }
+  return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "bench"})
+
+
+def bench(name, func, iterations):
+  func()
+  start_cpu = time.process_time()
+  start = time.perf_counter()
+  for _ in range(iterations):
+    func()
+  elapsed = time.perf_counter() - start
+  cpu = time.process_time() - start_cpu
+  per_request = cpu / iterations * 1_000_000
+  print(f"{name:8s} {iterations / elapsed:10.0f} ops/s   cpu {per_request:8.1f} us/request")
+  return per_request
+
+
+def main():
+  parser = argparse.ArgumentParser(description="signed auth cookie benchmark")
+  parser.add_argument("-n", "--iterations", type=int, default=20000, help="iterations per path")
+  args = parser.parse_args()
+
+  import jwt
+  from cryptography.hazmat.primitives.asymmetric import rsa
+  from wambda import signing
+  from wambda.authenticate import SIGNED_AUTH_COOKIE_NAME, _token_digest
+
+  issuer = "https://cognito-idp.ap-northeast-1.amazonaws.com/ap-northeast-1_bench"
+  client_id = "benchclient"
+  private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+  public_key = private_key.public_key()
+  id_token = make_id_token(private_key, issuer, client_id)
+
+  secret_key = os.urandom(32)
+  claims = jwt.decode(id_token, public_key, algorithms=["RS256"], audience=client_id, issuer=issuer)
+  signed_cookie = signing.dumps({
+    "c": {name: claims[name] for name in ("cognito:username", "exp", "sub", "email")},
+    "t": _token_digest(id_token),
+    "exp": claims["exp"],
+  }, secret_key)
+  cookie_header = f"id_token={id_token}; {SIGNED_AUTH_COOKIE_NAME}={signed_cookie}"
+  print(f"cookie: {len(signed_cookie)} bytes (id_token: {len(id_token)} bytes)")
+
+  def jwt_path():
+    jwt.decode(id_token, public_key, algorithms=["RS256"], audience=client_id, issuer=issuer)
+
+  def signed_path():
+    for cookie in cookie_header.split(";"):
+      name, _, value = cookie.strip().partition("=")
+      if name == SIGNED_AUTH_COOKIE_NAME:
+        payload = signing.loads(value, secret_key)
+        assert payload["t"] == _token_digest(id_token)
+
+  full = bench("jwt", jwt_path, args.iterations)
+  fast = bench("signed", signed_path, args.iterations)
+  print(f"saving   {full - fast:8.1f} us/request ({full / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WAMBDA import time check
+
+Imports a wambda module in a fresh interpreter and fails (exit status 1) if
+
+  - the import takes longer than the budget, or
+  - a heavy dependency (boto3, botocore, jinja2, jwt, wtforms) was imported
+    eagerly instead of on first use.
+
+Each measurement runs in a new process so nothing is cached in sys.modules;
+the best of several runs is reported to reduce noise. Suitable for CI.
+
+Usage:
+  python scripts/check_import_time.py                      # wambda.handler, 50 ms budget
+  python scripts/check_import_time.py -m wambda.authenticate --budget 80
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ("boto3", "botocore", "jinja2", "jwt", "wtforms")
+
+LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib")
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {lib_dir!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module):
+  output = subprocess.run(
+    [sys.executable, "-c", PROBE.format(lib_dir=LIB_DIR, module=module)],
+    check=True, capture_output=True, text=True
+  ).stdout
+  return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+  parser = argparse.ArgumentParser(description="check wambda import time budget")
+  parser.add_argument("-m", "--module", default="wambda.handler", help="module to import")
+  parser.add_argument("--budget", type=float, default=50.0, help="import time budget (ms)")
+  parser.add_argument("-n", "--runs", type=int, default=5, help="number of runs (best is reported)")
+  args = parser.parse_args()
+
+  results = [measure(args.module) for _ in range(args.runs)]
+  best = min(result["elapsed"] for result in results) * 1000
+  eager = sorted(name for name in HEAVY_MODULES if name in results[0]["modules"])
+
+  print(f"import {args.module}: {best:.1f} ms (budget {args.budget:.1f} ms)")
+  failed = False
+  if best > args.budget:
+    print(f"FAIL: import time exceeds the budget by {best - args.budget:.1f} ms")
+    failed = True
+  if eager:
+    print(f"FAIL: heavy dependencies imported eagerly: {', '.join(eager)}")
+    failed = True
+  if not failed:
+    print("OK")
+  sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+  main()
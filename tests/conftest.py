@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+REGION = "us-east-1"
+
+
+@pytest.fixture(autouse=True)
+def aws_credentials(monkeypatch):
+  """motoを使うテストが実際のAWSアカウントに接続しないよう、ダミーの認証情報を設定"""
+  monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+  monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+  monkeypatch.setenv("AWS_SESSION_TOKEN", "testing")
+  monkeypatch.setenv("AWS_DEFAULT_REGION", REGION)
+  monkeypatch.delenv("AWS_PROFILE", raising=False)
@@ -0,0 +1,49 @@
+import asyncio
+import io
+
+from wambda.adapters import ASGIAdapter, WSGIAdapter
+
+
+def capture():
+  events = []
+
+  def lambda_handler(event, context):
+    events.append(event)
+    return {"statusCode": 200, "headers": {"Content-Type": "text/plain"}, "body": "ok"}
+  return lambda_handler, events
+
+
+def test_asgi_joins_duplicate_headers():
+  lambda_handler, events = capture()
+  scope = {
+    "type": "http", "method": "GET", "path": "/", "query_string": b"",
+    "headers": [(b"cookie", b"a=1"), (b"cookie", b"session_id=x"), (b"accept", b"text/html"), (b"accept", b"*/*")],
+  }
+  sent = []
+
+  async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+  async def send(message):
+    sent.append(message)
+
+  asyncio.run(ASGIAdapter(lambda_handler)(scope, receive, send))
+
+  event = events[0]
+  assert event["headers"]["Cookie"] == "a=1; session_id=x"
+  assert event["headers"]["Accept"] == "text/html, */*"
+  assert event["multiValueHeaders"]["Cookie"] == ["a=1", "session_id=x"]
+  assert sent[0]["status"] == 200
+
+
+def test_wsgi_passes_headers():
+  lambda_handler, events = capture()
+  environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": "/", "QUERY_STRING": "",
+    "HTTP_COOKIE": "a=1; session_id=x", "wsgi.input": io.BytesIO(b""),
+  }
+
+  body = WSGIAdapter(lambda_handler)(environ, lambda status, headers: None)
+
+  assert b"".join(body) == b"ok"
+  assert events[0]["headers"]["Cookie"] == "a=1; session_id=x"
@@ -0,0 +1,46 @@
+import types
+
+import jwt
+import pytest
+
+from wambda import authenticate
+
+ISSUER = "https://cognito-idp.us-east-1.amazonaws.com/us-east-1_pool"
+
+
+class FakeMaster:
+  def __init__(self):
+    self.settings = types.SimpleNamespace(REGION="us-east-1")
+    self.request = types.SimpleNamespace(clean_cookie=False)
+
+
+@pytest.fixture(autouse=True)
+def clear_rejected_tokens(monkeypatch):
+  monkeypatch.setattr(authenticate, "_rejected_tokens", None)
+
+
+def make_token(issuer):
+  return jwt.encode({"iss": issuer, "aud": "client"}, "x" * 32, algorithm="HS256")
+
+
+def test_config_error_is_not_cached_as_rejected_token(monkeypatch):
+  def broken_config(master):
+    raise RuntimeError("SSM unavailable")
+  monkeypatch.setattr(authenticate, "get_cognito_config", broken_config)
+  master = FakeMaster()
+
+  with pytest.raises(RuntimeError):
+    authenticate._decode_id_token(master, make_token(ISSUER))
+  assert master.request.clean_cookie is False
+  assert authenticate.get_negative_cache_stats()["size"] == 0
+
+
+def test_issuer_mismatch_and_malformed_tokens_are_rejected(monkeypatch):
+  config = types.SimpleNamespace(issuer=ISSUER)
+  monkeypatch.setattr(authenticate, "get_cognito_config", lambda master: config)
+
+  for token in (make_token("https://example.com/other"), "not-a-jwt", "a.bnVsbA.c"):
+    master = FakeMaster()
+    assert authenticate._decode_id_token(master, token) is None
+    assert master.request.clean_cookie is True
+  assert authenticate.get_negative_cache_stats()["size"] == 3
@@ -0,0 +1,75 @@
+import os
+
+from wambda import bundle
+
+
+def write(path, text=""):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, "w") as f:
+    f.write(text)
+
+
+def make_build(root):
+  build = root / "build"
+  source = root / "src"
+  write(str(source / "lambda_function.py"))
+  write(str(build / "lambda_function.py"), "import libpkg\n")
+  write(str(build / "libpkg" / "__init__.py"), "from libpkg import testing\n")
+  # インポートされるテスト用のサブパッケージ（numpy.testing のようなもの）
+  write(str(build / "libpkg" / "tests" / "__init__.py"), "VALUE = 1\n")
+  write(str(build / "libpkg" / "testing.py"), "from libpkg.tests import VALUE\n")
+  # パッケージではないテスト・ドキュメント
+  write(str(build / "libpkg" / "test" / "test_core.py"))
+  write(str(build / "libpkg" / "docs" / "index.txt"))
+  write(str(build / "libpkg" / "__pycache__" / "stale.cpython-311.pyc"))
+  write(str(build / "pkg_resources" / "__init__.py"))
+  write(str(build / "setuptools" / "__init__.py"))
+  write(str(build / "moto" / "__init__.py"))
+  return build, source
+
+
+def test_slim_keeps_importable_test_packages(tmp_path):
+  build, source = make_build(tmp_path)
+  report = bundle.analyze(str(build), source_dir=str(source))
+  output = tmp_path / "slim"
+
+  bundle.slim(report, str(output), compile_pyc=False)
+
+  assert (output / "libpkg" / "tests" / "__init__.py").is_file()
+  assert not (output / "libpkg" / "test").exists()
+  assert not (output / "libpkg" / "docs").exists()
+  assert not (output / "libpkg" / "__pycache__").exists()
+
+
+def test_setuptools_and_pkg_resources_are_not_suggested(tmp_path):
+  build, source = make_build(tmp_path)
+  report = bundle.analyze(str(build), source_dir=str(source))
+
+  suggested = [p.name for p in bundle.suggest_exclusions(report)]
+
+  assert suggested == ["moto"]
+  assert "unused, kept" in bundle.format_report(report)
+
+
+def test_reachable_dev_only_packages_are_warned_not_excluded(tmp_path):
+  build, source = make_build(tmp_path)
+  write(str(build / "lambda_function.py"), "import libpkg\nimport moto\n")
+  report = bundle.analyze(str(build), source_dir=str(source))
+
+  assert bundle.suggest_exclusions(report) == []
+  assert [p.name for p in bundle.dev_only_warnings(report)] == ["moto"]
+  assert "Warning: dev-only packages imported by the app" in bundle.format_report(report)
+
+
+def test_reachability_follows_importable_test_packages(tmp_path):
+  build, source = make_build(tmp_path)
+  # パッケージのテストから別のパッケージを使う（numpy.testing が依存を使うような場合）
+  write(str(build / "libpkg" / "tests" / "__init__.py"), "import helper\n")
+  write(str(build / "libpkg" / "test" / "test_core.py"), "import devtool\n")
+  write(str(build / "helper" / "__init__.py"))
+  write(str(build / "devtool" / "__init__.py"))
+  report = bundle.analyze(str(build), source_dir=str(source))
+
+  reachable = {p.name for p in report["packages"] if p.reachable}
+  assert "helper" in reachable
+  assert "devtool" not in reachable
@@ -0,0 +1,156 @@
+import itertools
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from wambda import cwlogs
+
+REGION = "us-east-1"
+GROUP = "/aws/lambda/app"
+STREAM = "2026/01/01/[$LATEST]abc"
+
+
+@pytest.fixture
+def client():
+  with mock_aws():
+    client = boto3.client("logs", region_name=REGION)
+    client.create_log_group(logGroupName=GROUP)
+    client.create_log_stream(logGroupName=GROUP, logStreamName=STREAM)
+    yield client
+
+
+@pytest.fixture
+def base_ms():
+  # motoは保持期間より古いイベントを返さないため、現在時刻の少し前から書き込む
+  return int(time.time() * 1000) - 60_000
+
+
+def put_events(client, base_ms, count, start=0):
+  client.put_log_events(
+    logGroupName=GROUP, logStreamName=STREAM,
+    logEvents=[
+      {"timestamp": base_ms + i, "message": f"{'ERROR' if i % 2 else 'INFO'} {i}"}
+      for i in range(start, start + count)
+    ],
+  )
+
+
+def spy(monkeypatch, client):
+  calls = []
+  original = client.filter_log_events
+
+  def wrapper(**kwargs):
+    calls.append(kwargs)
+    return original(**kwargs)
+  monkeypatch.setattr(client, "filter_log_events", wrapper)
+  return calls
+
+
+def test_iter_log_events_follows_next_token(client, base_ms, monkeypatch):
+  put_events(client, base_ms, 10)
+  calls = spy(monkeypatch, client)
+
+  events = list(cwlogs.iter_log_events(client, GROUP, base_ms, page_size=3))
+
+  assert [event["message"].split()[1] for event in events] == [str(i) for i in range(10)]
+  assert len(calls) == 4
+  assert "nextToken" not in calls[0]
+  assert all(call["nextToken"] for call in calls[1:])
+  assert all(call["limit"] == 3 for call in calls)
+
+
+def test_iter_log_events_stops_at_limit(client, base_ms, monkeypatch):
+  put_events(client, base_ms, 10)
+  calls = spy(monkeypatch, client)
+
+  events = list(cwlogs.iter_log_events(client, GROUP, base_ms, limit=4, page_size=3))
+
+  assert len(events) == 4
+  assert len(calls) == 2
+
+
+def test_filter_pattern_is_passed_through(client, base_ms, monkeypatch):
+  put_events(client, base_ms, 10)
+  calls = spy(monkeypatch, client)
+
+  events = list(cwlogs.iter_log_events(client, GROUP, base_ms, filter_pattern="ERROR", log_stream_names=[STREAM]))
+
+  assert [event["message"] for event in events] == [f"ERROR {i}" for i in range(1, 10, 2)]
+  assert calls[0]["filterPattern"] == "ERROR"
+  assert calls[0]["logStreamNames"] == [STREAM]
+
+
+def test_split_time_range_covers_range_without_overlap():
+  ranges = cwlogs.split_time_range(0, 99, 4)
+  assert ranges == [(0, 24), (25, 49), (50, 74), (75, 99)]
+  assert cwlogs.split_time_range(0, 2, 10) == [(0, 0), (1, 1), (2, 2)]
+
+
+def test_parallel_merges_slices_in_time_order(client, base_ms, monkeypatch):
+  put_events(client, base_ms, 40)
+  calls = spy(monkeypatch, client)
+
+  events = list(cwlogs.iter_log_events_parallel(
+    client, GROUP, base_ms, base_ms + 39, slices=4, filter_pattern="ERROR", page_size=3
+  ))
+
+  assert [event["timestamp"] - base_ms for event in events] == list(range(1, 40, 2))
+  starts = sorted({call["startTime"] - base_ms for call in calls})
+  assert starts == [0, 10, 20, 30]
+  assert all(call["filterPattern"] == "ERROR" for call in calls)
+
+
+def test_parallel_limit_stops_early(client, base_ms):
+  put_events(client, base_ms, 40)
+
+  events = list(cwlogs.iter_log_events_parallel(client, GROUP, base_ms, base_ms + 39, slices=4, limit=5, page_size=2))
+
+  assert [event["timestamp"] - base_ms for event in events] == [0, 1, 2, 3, 4]
+
+
+def test_parallel_propagates_errors(client, base_ms):
+  with pytest.raises(client.exceptions.ResourceNotFoundException):
+    list(cwlogs.iter_log_events_parallel(client, "/aws/lambda/missing", base_ms, base_ms + 39, slices=2))
+
+
+def test_follow_dedupes_events_across_polls(client, base_ms, monkeypatch):
+  put_events(client, base_ms, 3)
+  calls = spy(monkeypatch, client)
+  polls = []
+
+  def sleep(interval):
+    # 2回目のポーリングの前に、同じ時刻と新しい時刻のイベントを追加する
+    polls.append(interval)
+    if len(polls) == 1:
+      client.put_log_events(
+        logGroupName=GROUP, logStreamName=STREAM,
+        logEvents=[{"timestamp": base_ms + 2, "message": "SAME TIME"}, {"timestamp": base_ms + 5, "message": "NEW"}],
+      )
+
+  events = list(itertools.islice(cwlogs.follow(client, GROUP, base_ms, interval=0.5, sleep=sleep), 5))
+
+  assert [event["message"] for event in events] == ["INFO 0", "ERROR 1", "INFO 2", "SAME TIME", "NEW"]
+  assert len({event["eventId"] for event in events}) == 5
+  # 2回目のポーリングは最後に見たイベントの時刻から重なりの分だけ遡って再取得する（開始時刻より前には戻らない）
+  assert calls[1]["startTime"] == base_ms
+  assert polls == [0.5]
+
+
+def test_follow_picks_up_late_ingested_events(client, base_ms, monkeypatch):
+  put_events(client, base_ms + 10_000, 1)
+  client.create_log_stream(logGroupName=GROUP, logStreamName="late")
+  calls = spy(monkeypatch, client)
+
+  def sleep(interval):
+    if len(calls) == 1:
+      # 最新のイベントより前の時刻のイベントが、別のストリームから遅れて取り込まれる
+      client.put_log_events(logGroupName=GROUP, logStreamName="late",
+                            logEvents=[{"timestamp": base_ms + 5_000, "message": "LATE"}])
+
+  events = list(itertools.islice(
+    cwlogs.follow(client, GROUP, base_ms, interval=0, sleep=sleep, overlap_ms=8_000), 2))
+
+  assert [event["message"] for event in events] == ["INFO 0", "LATE"]
+  assert calls[1]["startTime"] == base_ms + 2_000
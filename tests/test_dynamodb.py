@@ -0,0 +1,313 @@
+import threading
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from wambda import dynamodb
+
+REGION = "us-east-1"
+TABLE = "items"
+
+
+@pytest.fixture
+def table(monkeypatch):
+  # 未処理分の再試行で実際に待たない
+  monkeypatch.setattr(dynamodb, "_backoff", lambda attempt: None)
+  with mock_aws():
+    resource = boto3.resource("dynamodb", region_name=REGION)
+    resource.create_table(
+      TableName=TABLE,
+      KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+      AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}, {"AttributeName": "sk", "AttributeType": "N"}],
+      BillingMode="PAY_PER_REQUEST",
+    )
+    # スレッドローカルにキャッシュされたリソース・テーブルを作り直す
+    dynamodb._local.__dict__.clear()
+    yield dynamodb.get_table(TABLE, REGION)
+    dynamodb._local.__dict__.clear()
+
+
+def spy(monkeypatch, obj, name):
+  """obj.name の呼び出し引数を記録する"""
+  calls = []
+  original = getattr(obj, name)
+
+  def wrapper(**kwargs):
+    calls.append(kwargs)
+    return original(**kwargs)
+  monkeypatch.setattr(obj, name, wrapper)
+  return calls
+
+
+def put_items(table, count, pk="a"):
+  with table.batch_writer() as writer:
+    for i in range(count):
+      writer.put_item(Item={"pk": pk, "sk": i, "name": f"item{i}", "size": i % 3})
+
+
+def test_batch_get_splits_at_100_keys(table, monkeypatch):
+  put_items(table, 250)
+  calls = spy(monkeypatch, dynamodb.get_resource(REGION), "batch_get_item")
+  keys = [{"pk": "a", "sk": i} for i in range(250)]
+
+  items = dynamodb.batch_get(TABLE, keys + keys[:10], region_name=REGION)
+
+  assert [len(call["RequestItems"][TABLE]["Keys"]) for call in calls] == [100, 100, 50]
+  assert sorted(item["sk"] for item in items) == list(range(250))
+
+
+def test_batch_get_retries_unprocessed_keys(table, monkeypatch):
+  put_items(table, 5)
+  resource = dynamodb.get_resource(REGION)
+  original = resource.batch_get_item
+  calls = []
+
+  def flaky(RequestItems):
+    calls.append(RequestItems)
+    keys = RequestItems[TABLE]["Keys"]
+    if len(calls) == 1:
+      # 1回目は先頭の2件だけ処理し、残りを未処理として返す
+      response = original(RequestItems={TABLE: dict(RequestItems[TABLE], Keys=keys[:2])})
+      response["UnprocessedKeys"] = {TABLE: dict(RequestItems[TABLE], Keys=keys[2:])}
+      return response
+    return original(RequestItems=RequestItems)
+  monkeypatch.setattr(resource, "batch_get_item", flaky)
+
+  items = dynamodb.batch_get(TABLE, [{"pk": "a", "sk": i} for i in range(5)], region_name=REGION)
+
+  assert len(calls) == 2
+  assert [key["sk"] for key in calls[1][TABLE]["Keys"]] == [2, 3, 4]
+  assert sorted(item["sk"] for item in items) == [0, 1, 2, 3, 4]
+
+
+def test_batch_get_raises_when_retries_exhausted(table, monkeypatch):
+  resource = dynamodb.get_resource(REGION)
+  monkeypatch.setattr(resource, "batch_get_item",
+                      lambda RequestItems: {"Responses": {}, "UnprocessedKeys": RequestItems})
+
+  with pytest.raises(dynamodb.BatchRetryExhausted) as error:
+    dynamodb.batch_get(TABLE, [{"pk": "a", "sk": 1}], region_name=REGION, max_retries=2)
+  assert error.value.unprocessed == [{"pk": "a", "sk": 1}]
+
+
+def test_batch_write_splits_at_25_items(table, monkeypatch):
+  put_items(table, 10, pk="old")
+  calls = spy(monkeypatch, dynamodb.get_resource(REGION), "batch_write_item")
+
+  dynamodb.batch_write(
+    TABLE,
+    put_items=[{"pk": "new", "sk": i} for i in range(55)],
+    delete_keys=[{"pk": "old", "sk": i} for i in range(10)],
+    region_name=REGION,
+  )
+
+  assert [len(call["RequestItems"][TABLE]) for call in calls] == [25, 25, 15]
+  assert table.scan(Select="COUNT")["Count"] == 55
+
+
+def test_batch_write_retries_unprocessed_items(table, monkeypatch):
+  resource = dynamodb.get_resource(REGION)
+  original = resource.batch_write_item
+  calls = []
+
+  def flaky(RequestItems):
+    calls.append(RequestItems)
+    requests = RequestItems[TABLE]
+    if len(calls) == 1:
+      original(RequestItems={TABLE: requests[:1]})
+      return {"UnprocessedItems": {TABLE: requests[1:]}}
+    return original(RequestItems=RequestItems)
+  monkeypatch.setattr(resource, "batch_write_item", flaky)
+
+  dynamodb.batch_write(TABLE, put_items=[{"pk": "a", "sk": i} for i in range(3)], region_name=REGION)
+
+  assert [len(call[TABLE]) for call in calls] == [3, 2]
+  assert table.scan(Select="COUNT")["Count"] == 3
+
+
+def test_query_paginates_lazily(table, monkeypatch):
+  put_items(table, 7)
+  put_items(table, 3, pk="b")
+  calls = spy(monkeypatch, table, "query")
+
+  from boto3.dynamodb.conditions import Key
+  items = dynamodb.query(TABLE, region_name=REGION, KeyConditionExpression=Key("pk").eq("a"), Limit=3)
+
+  first = next(items)
+  assert first["sk"] == 0
+  # 最初のページを読み終えるまで次のページは取得しない
+  assert len(calls) == 1
+  rest = list(items)
+  assert [item["sk"] for item in [first] + rest] == list(range(7))
+  assert [call.get("ExclusiveStartKey", {}).get("sk") for call in calls] == [None, 2, 5]
+
+
+def test_query_pages_yields_pages(table):
+  put_items(table, 5)
+  from boto3.dynamodb.conditions import Key
+  pages = list(dynamodb.query_pages(TABLE, region_name=REGION, KeyConditionExpression=Key("pk").eq("a"), Limit=2))
+  assert [len(page["Items"]) for page in pages] == [2, 2, 1]
+
+
+def test_scan_paginates_lazily(table, monkeypatch):
+  put_items(table, 5)
+  calls = spy(monkeypatch, table, "scan")
+
+  items = dynamodb.scan(TABLE, region_name=REGION, Limit=2)
+  next(items)
+  assert len(calls) == 1
+  assert len(list(items)) == 4
+  assert len(calls) == 3
+
+
+def test_parallel_scan_merges_segments(table):
+  put_items(table, 30, pk="a")
+  put_items(table, 30, pk="b")
+  put_items(table, 30, pk="c")
+
+  items = list(dynamodb.scan(TABLE, segments=4, region_name=REGION, Limit=5))
+
+  assert len(items) == 90
+  assert {(item["pk"], item["sk"]) for item in items} == {(pk, i) for pk in "abc" for i in range(30)}
+
+
+def test_parallel_scan_passes_filter_to_each_segment(table):
+  put_items(table, 30)
+  from boto3.dynamodb.conditions import Attr
+
+  items = list(dynamodb.scan(TABLE, segments=3, region_name=REGION, FilterExpression=Attr("size").eq(0)))
+
+  assert sorted(item["sk"] for item in items) == list(range(0, 30, 3))
+
+
+def test_parallel_scan_propagates_errors(table):
+  with pytest.raises(Exception) as error:
+    list(dynamodb.scan("missing-table", segments=2, region_name=REGION))
+  assert "ResourceNotFoundException" in str(error.value)
+
+
+def test_parallel_scan_inside_saturated_shared_pool(table):
+  put_items(table, 20)
+  from wambda import concurrent
+  executor = concurrent.get_executor()
+  workers = executor._max_workers
+  release = threading.Event()
+  started = threading.Barrier(workers + 1)
+
+  def occupy():
+    started.wait()
+    release.wait(10)
+
+  # 共有プールのスレッドをすべて埋めてから、その中の1つと同じ状況でスキャンする
+  blockers = [executor.submit(occupy) for _ in range(workers)]
+  started.wait(5)
+  try:
+    items = list(dynamodb.scan(TABLE, segments=4, region_name=REGION, page_timeout=5))
+  finally:
+    release.set()
+    for blocker in blockers:
+      blocker.result()
+  assert len(items) == 20
+
+
+def test_parallel_scan_times_out_waiting_for_pages(table, monkeypatch):
+  def stuck(*args, **kwargs):
+    time.sleep(1)
+    return iter(())
+  monkeypatch.setattr(dynamodb, "scan_pages", stuck)
+
+  with pytest.raises(TimeoutError):
+    list(dynamodb.scan(TABLE, segments=2, region_name=REGION, page_timeout=0.1))
+
+
+def test_projection_builds_expression_and_names():
+  assert dynamodb.projection("id", "name", "address.city", "tags[0]", "address.zip") == {
+    "ProjectionExpression": "#p0, #p1, #p2.#p3, #p4[0], #p2.#p5",
+    "ExpressionAttributeNames": {
+      "#p0": "id", "#p1": "name", "#p2": "address", "#p3": "city", "#p4": "tags", "#p5": "zip",
+    },
+  }
+
+
+def test_projection_with_batch_get_and_query(table):
+  table.put_item(Item={"pk": "a", "sk": 1, "name": "n", "size": 2, "data": {"status": "ok", "other": 1}})
+  fields = dynamodb.projection("pk", "sk", "name", "data.status")
+
+  items = dynamodb.batch_get(TABLE, [{"pk": "a", "sk": 1}], projection=fields, region_name=REGION)
+  assert items == [{"pk": "a", "sk": 1, "name": "n", "data": {"status": "ok"}}]
+
+  from boto3.dynamodb.conditions import Key
+  queried = list(dynamodb.query(TABLE, region_name=REGION, KeyConditionExpression=Key("pk").eq("a"), **fields))
+  assert queried == items
+
+
+class FakeMaster:
+  def __init__(self, **settings):
+    import types
+    self.settings = types.SimpleNamespace(REGION=REGION, **settings)
+
+
+@pytest.fixture
+def clear_container_caches():
+  dynamodb._container_caches.clear()
+  yield
+  dynamodb._container_caches.clear()
+
+
+def test_get_item_consistent_read_bypasses_identity_map(table, monkeypatch):
+  table.put_item(Item={"pk": "a", "sk": 1, "name": "old"})
+  master = FakeMaster()
+  key = {"pk": "a", "sk": 1}
+  assert dynamodb.get_item(master, TABLE, key, region_name=REGION)["name"] == "old"
+
+  # 他の書き込み（別のコンテナなど）で更新される
+  table.put_item(Item={"pk": "a", "sk": 1, "name": "new"})
+  calls = spy(monkeypatch, table, "get_item")
+
+  assert dynamodb.get_item(master, TABLE, key, region_name=REGION)["name"] == "old"
+  assert dynamodb.get_item(master, TABLE, key, consistent_read=True, region_name=REGION)["name"] == "new"
+  assert [call["ConsistentRead"] for call in calls] == [True]
+  assert dynamodb.cache_stats(master)["request"] == {"hits": 1, "misses": 2}
+
+
+def test_writes_invalidate_only_on_success_without_describe_table(table, monkeypatch, clear_container_caches):
+  table.put_item(Item={"pk": "a", "sk": 1, "name": "old"})
+  master = FakeMaster(DYNAMODB_CACHE={TABLE: {"ttl": 60}})
+  key = {"pk": "a", "sk": 1}
+  dynamodb.get_item(master, TABLE, key, region_name=REGION)
+
+  client = table.meta.client
+  describe_calls = spy(monkeypatch, client, "describe_table")
+
+  # 条件付き書き込みの失敗は元の例外のまま伝わり、キャッシュは残る
+  with pytest.raises(client.exceptions.ConditionalCheckFailedException):
+    dynamodb.put_item(master, TABLE, {"pk": "a", "sk": 1, "name": "x"}, region_name=REGION,
+                      ConditionExpression="attribute_not_exists(pk)")
+  assert (TABLE, dynamodb._key_marker(key)) in master._dynamodb_identity_map
+  assert len(dynamodb._container_caches[TABLE]) == 1
+
+  dynamodb.put_item(master, TABLE, {"pk": "a", "sk": 1, "name": "new"}, region_name=REGION)
+  assert master._dynamodb_identity_map == {}
+  assert len(dynamodb._container_caches[TABLE]) == 0
+  assert dynamodb.get_item(master, TABLE, key, region_name=REGION)["name"] == "new"
+
+  dynamodb.update_item(master, TABLE, key, region_name=REGION,
+                       UpdateExpression="SET #n = :n", ExpressionAttributeNames={"#n": "name"},
+                       ExpressionAttributeValues={":n": "updated"})
+  assert dynamodb.get_item(master, TABLE, key, region_name=REGION)["name"] == "updated"
+
+  dynamodb.delete_item(master, TABLE, key, region_name=REGION)
+  assert dynamodb.get_item(master, TABLE, key, region_name=REGION) is None
+  assert describe_calls == []
+
+
+def test_cache_stats_are_request_scoped(table):
+  first, second = FakeMaster(), FakeMaster()
+  dynamodb.get_item(first, TABLE, {"pk": "a", "sk": 1}, region_name=REGION)
+  dynamodb.get_item(first, TABLE, {"pk": "a", "sk": 1}, region_name=REGION)
+
+  assert dynamodb.cache_stats(first)["request"] == {"hits": 1, "misses": 1}
+  assert dynamodb.cache_stats(second)["request"] == {"hits": 0, "misses": 0}
+  assert "request" not in dynamodb.cache_stats()
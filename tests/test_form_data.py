@@ -0,0 +1,79 @@
+import pytest
+
+from wambda.handler import MultiDict, Request
+from wambda.multipart import MultipartError
+
+
+def make_request(body, content_type, method="POST"):
+  event = {
+    "requestContext": {"httpMethod": method},
+    "path": "/form",
+    "headers": {"Content-Type": content_type},
+    "body": body,
+  }
+  return Request(event, None)
+
+
+def test_urlencoded_body_is_parsed_on_first_access(monkeypatch):
+  request = make_request("name=a&tag=x&tag=y", "application/x-www-form-urlencoded")
+  calls = []
+  original = request._parse_body
+
+  def parse_body():
+    calls.append(1)
+    return original()
+  monkeypatch.setattr(request, "_parse_body", parse_body)
+
+  form = request.get_form_data()
+  assert calls == []
+  assert form.get("name") == "a"
+  assert form.getlist("tag") == ["x", "y"]
+  assert form.to_dict(flat=False) == {"name": ["a"], "tag": ["x", "y"]}
+  assert len(calls) == 1
+
+
+def test_multipart_is_parsed_eagerly():
+  body = (
+    "--x\r\n"
+    'Content-Disposition: form-data; name="title"\r\n\r\n'
+    "hello\r\n"
+    "--x\r\n"
+    'Content-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+    "Content-Type: text/plain\r\n\r\n"
+    "data\r\n"
+    "--x--\r\n"
+  )
+  request = make_request(body, "multipart/form-data; boundary=x")
+
+  form = request.get_form_data()
+
+  assert request._parsed_body is not None
+  assert form.get("title") == "hello"
+  assert form.get("file").filename == "a.txt"
+  assert request.get_files().get("file").read() == b"data"
+
+
+def test_malformed_multipart_raises_from_get_form_data():
+  request = make_request("--x\r\nbroken", "multipart/form-data; boundary=x")
+
+  with pytest.raises(MultipartError):
+    request.get_form_data()
+  # MultipartErrorはValueErrorとして扱える
+  with pytest.raises(ValueError):
+    request.get_form_data()
+
+
+def test_get_form_data_requires_body_method():
+  with pytest.raises(ValueError):
+    make_request("", "application/x-www-form-urlencoded", method="GET").get_form_data()
+
+
+def test_getlist_returns_a_copy():
+  form = MultiDict({"tag": ["x", "y"]})
+
+  values = form.getlist("tag")
+  values.append("z")
+
+  assert form.getlist("tag") == ["x", "y"]
+  assert form.getlist("count", type=int) == []
+  assert MultiDict({"n": ["1", "a", "2"]}).getlist("n", type=int) == [1, 2]
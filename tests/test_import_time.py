@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib")
+
+# scripts/check_import_time.py と同じ予算・同じ重い依存モジュール
+BUDGET_US = 50_000
+HEAVY_MODULES = ("boto3", "botocore", "jinja2", "jwt", "wtforms")
+
+
+def importtime(module):
+  """新しいプロセスで -X importtime を実行し、{モジュール名: 累積マイクロ秒} を返す"""
+  env = dict(os.environ, PYTHONPATH=LIB_DIR)
+  stderr = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+    check=True, capture_output=True, text=True, env=env
+  ).stderr
+  result = {}
+  for line in stderr.splitlines():
+    if not line.startswith("import time:") or "cumulative" in line:
+      continue
+    _, cumulative, name = line[len("import time:"):].split("|")
+    result[name.strip()] = int(cumulative)
+  return result
+
+
+def test_handler_import_is_within_budget_and_lazy():
+  runs = [importtime("wambda.handler") for _ in range(3)]
+
+  eager = sorted(
+    name for name in runs[0]
+    if name.split(".")[0] in HEAVY_MODULES
+  )
+  assert eager == [], f"heavy dependencies imported eagerly: {eager}"
+  best = min(run["wambda.handler"] for run in runs)
+  assert best <= BUDGET_US, f"import wambda.handler took {best / 1000:.1f} ms (budget {BUDGET_US / 1000:.0f} ms)"
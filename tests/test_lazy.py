@@ -0,0 +1,33 @@
+import sys
+import threading
+
+from wambda._lazy import LazyModule, lazy_import
+
+
+def test_nested_lazy_imports_do_not_deadlock(tmp_path, monkeypatch):
+  # 遅延インポートされたモジュールが、インポート中に別の遅延モジュールを使う
+  (tmp_path / "lazy_outer.py").write_text(
+    "from wambda._lazy import LazyModule\n"
+    "inner = LazyModule('lazy_inner')\n"
+    "VALUE = inner.VALUE + 1\n"
+  )
+  (tmp_path / "lazy_inner.py").write_text("VALUE = 41\n")
+  monkeypatch.syspath_prepend(str(tmp_path))
+  for name in ("lazy_outer", "lazy_inner"):
+    monkeypatch.delitem(sys.modules, name, raising=False)
+
+  outer = LazyModule("lazy_outer")
+  result = []
+  thread = threading.Thread(target=lambda: result.append(outer.VALUE), daemon=True)
+  thread.start()
+  thread.join(5)
+
+  assert result == [42]
+
+
+def test_lazy_import_returns_loaded_module():
+  assert lazy_import("json") is sys.modules["json"]
+  module = LazyModule("json")
+  assert "not loaded" in repr(module)
+  assert module.dumps([1]) == "[1]"
+  assert module._lazy_module is sys.modules["json"]
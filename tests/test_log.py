@@ -0,0 +1,31 @@
+import json
+import logging
+import types
+
+from wambda import log
+
+
+def test_configure_returns_app_logger_propagating_to_root(monkeypatch):
+  root = logging.getLogger()
+  saved = (root.level, list(root.handlers))
+  lines = []
+
+  class Collect(logging.Handler):
+    def emit(self, record):
+      lines.append(self.format(record))
+  root.handlers[:] = [Collect()]
+  monkeypatch.setattr(log, "_configured", False)
+  try:
+    logger = log.configure(types.SimpleNamespace(LOG_LEVEL="INFO"))
+    log.begin_request("req-1", "/users/1")
+    logger.info("ユーザー取得: %s", 1)
+  finally:
+    root.setLevel(saved[0])
+    root.handlers[:] = saved[1]
+
+  assert logger is logging.getLogger(log.APP_LOGGER_NAME) and logger is not root
+  assert logger.propagate and logger.handlers == []
+  record = json.loads(lines[0])
+  assert (record["logger"], record["request_id"], record["message"]) == ("app", "req-1", "ユーザー取得: 1")
+  # 2回目以降は設定をやり直さず、同じロガーを返す
+  assert log.configure(types.SimpleNamespace(LOG_LEVEL="DEBUG")) is logger
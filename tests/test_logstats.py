@@ -0,0 +1,79 @@
+import json
+import logging
+import types
+
+import pytest
+
+from wambda import log, logstats
+
+REQUEST_ID = "8f5c2d1e-1234-4abc-9def-0123456789ab"
+TIMING = "wambda-timing view=app.views.detail method=GET status=200 duration_ms=10.52"
+REPORT = (
+  f"REPORT RequestId: {REQUEST_ID}\tDuration: 12.34 ms\tBilled Duration: 13 ms\t"
+  "Memory Size: 128 MB\tMax Memory Used: 70 MB\tInit Duration: 250.01 ms"
+)
+PLATFORM_REPORT = json.dumps({
+  "time": "2026-01-01T00:00:00.000Z",
+  "type": "platform.report",
+  "record": {
+    "requestId": REQUEST_ID,
+    "metrics": {"durationMs": 12.34, "billedDurationMs": 13, "memorySizeMB": 128, "maxMemoryUsedMB": 70,
+                "initDurationMs": 250.01},
+    "status": "success",
+  },
+})
+
+
+@pytest.mark.parametrize("line", [
+  json.dumps({"level": "INFO", "request_id": REQUEST_ID, "message": TIMING}),
+  # LambdaのJSONログ形式（区切りの空白なし）
+  json.dumps({"level": "INFO", "message": TIMING, "requestId": REQUEST_ID}, separators=(",", ":")),
+  f"[INFO]\t2026-01-01T00:00:00.000Z\t{REQUEST_ID}\t{TIMING}",
+])
+def test_parse_timing_finds_request_id(line):
+  timing = logstats.parse_timing(line)
+  assert timing["request_id"] == REQUEST_ID
+  assert timing["view"] == "app.views.detail"
+  assert timing["duration"] == 10.52
+
+
+@pytest.mark.parametrize("line", [REPORT, PLATFORM_REPORT])
+def test_parse_report_text_and_platform_report(line):
+  assert logstats.parse_report(line) == {
+    "request_id": REQUEST_ID, "duration": 12.34, "billed": 13.0, "memory_size": 128, "memory_used": 70,
+    "init": 250.01,
+  }
+
+
+def test_platform_report_joins_timing_by_request_id():
+  stats = logstats.LatencyStats()
+  stats.add_line(json.dumps({"message": TIMING, "requestId": REQUEST_ID}, separators=(",", ":")))
+  stats.add_line(PLATFORM_REPORT)
+
+  rows = {row["route"]: row for row in stats.rows()}
+  assert set(rows) == {logstats.ALL_ROUTES, "app.views.detail"}
+  assert rows["app.views.detail"]["invocations"] == 1
+  assert rows["app.views.detail"]["max_ms"] == 12.34
+  assert rows["app.views.detail"]["cold_starts"] == 1
+
+
+def test_timing_logger_emits_at_warning_level(monkeypatch):
+  root = logging.getLogger()
+  saved = (root.level, list(root.handlers), logging.getLogger(log.TIMING_LOGGER_NAME).level)
+  records = []
+
+  class Collect(logging.Handler):
+    def emit(self, record):
+      records.append(record)
+  root.handlers[:] = [Collect()]
+  monkeypatch.setattr(log, "_configured", False)
+  try:
+    app_logger = log.configure(types.SimpleNamespace(LOG_LEVEL="WARNING", LOG_FORMAT="text"))
+    app_logger.info("hidden")
+    logging.getLogger(log.TIMING_LOGGER_NAME).info(TIMING)
+  finally:
+    root.setLevel(saved[0])
+    root.handlers[:] = saved[1]
+    logging.getLogger(log.TIMING_LOGGER_NAME).setLevel(saved[2])
+
+  assert [record.getMessage() for record in records] == [TIMING]
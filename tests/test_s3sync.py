@@ -0,0 +1,144 @@
+import json
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from wambda import s3sync
+
+REGION = "us-east-1"
+BUCKET = "static-bucket"
+HASHED = "app.0123456789ab.css"
+
+
+@pytest.fixture
+def client():
+  with mock_aws():
+    client = boto3.client("s3", region_name=REGION)
+    client.create_bucket(Bucket=BUCKET)
+    yield client
+
+
+@pytest.fixture
+def source(tmp_path):
+  (tmp_path / "css").mkdir()
+  (tmp_path / "css" / HASHED).write_text("body{}")
+  (tmp_path / "css" / f"{HASHED}.gz").write_bytes(b"gz")
+  (tmp_path / "css" / f"{HASHED}.br").write_bytes(b"br")
+  (tmp_path / "index.html").write_text("<html></html>")
+  (tmp_path / "staticfiles.json").write_text("{}")
+  return tmp_path
+
+
+def spy(monkeypatch, client, name):
+  calls = []
+  original = getattr(client, name)
+
+  def wrapper(*args, **kwargs):
+    calls.append((args, kwargs))
+    return original(*args, **kwargs)
+  monkeypatch.setattr(client, name, wrapper)
+  return calls
+
+
+def keys(client):
+  return sorted(item["Key"] for item in client.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+def test_first_deploy_uploads_with_headers(client, source):
+  result = s3sync.deploy(str(source), BUCKET, prefix="static", client=client)
+
+  assert sorted(result.uploaded) == ["css/" + HASHED, f"css/{HASHED}.br", f"css/{HASHED}.gz", "index.html"]
+  assert keys(client) == [
+    ".wambda/deploy-manifests/static/manifest.json",
+    "static/css/" + HASHED, f"static/css/{HASHED}.br", f"static/css/{HASHED}.gz", "static/index.html",
+  ]
+
+  css = client.head_object(Bucket=BUCKET, Key="static/css/" + HASHED)
+  assert css["ContentType"] == "text/css; charset=utf-8"
+  assert css["CacheControl"] == s3sync.IMMUTABLE_CACHE_CONTROL
+  assert "ContentEncoding" not in css
+  for suffix, encoding in ((".gz", "gzip"), (".br", "br")):
+    head = client.head_object(Bucket=BUCKET, Key=f"static/css/{HASHED}{suffix}")
+    assert head["ContentType"] == "text/css; charset=utf-8"
+    assert head["ContentEncoding"] == encoding
+    assert head["CacheControl"] == s3sync.IMMUTABLE_CACHE_CONTROL
+  html = client.head_object(Bucket=BUCKET, Key="static/index.html")
+  assert html["ContentType"] == "text/html; charset=utf-8"
+  assert html["CacheControl"] == s3sync.DEFAULT_CACHE_CONTROL
+
+
+def test_second_deploy_uploads_only_changed_files(client, source, monkeypatch):
+  s3sync.deploy(str(source), BUCKET, prefix="static", client=client)
+  (source / "index.html").write_text("<html>changed</html>")
+  uploads = spy(monkeypatch, client, "upload_file")
+
+  result = s3sync.deploy(str(source), BUCKET, prefix="static", client=client, cache_control="public, max-age=60")
+
+  assert result.uploaded == ["index.html"]
+  assert len(result.unchanged) == 3
+  assert [args[2] for args, kwargs in uploads] == ["static/index.html"]
+  assert client.head_object(Bucket=BUCKET, Key="static/index.html")["CacheControl"] == "public, max-age=60"
+  body = client.get_object(Bucket=BUCKET, Key="static/index.html")["Body"].read()
+  assert body == b"<html>changed</html>"
+
+
+def test_delete_removes_files_missing_locally(client, source):
+  s3sync.deploy(str(source), BUCKET, prefix="static", client=client)
+  (source / "index.html").unlink()
+
+  kept = s3sync.deploy(str(source), BUCKET, prefix="static", client=client)
+  assert kept.deleted == []
+  assert "static/index.html" in keys(client)
+
+  result = s3sync.deploy(str(source), BUCKET, prefix="static", client=client, delete=True)
+  assert result.deleted == ["index.html"]
+  assert "static/index.html" not in keys(client)
+  manifest = s3sync.read_deploy_manifest(client, BUCKET, "static")
+  assert "index.html" not in manifest
+
+
+def test_dry_run_sends_no_writes(client, source, monkeypatch):
+  s3sync.deploy(str(source), BUCKET, prefix="static", client=client)
+  (source / "index.html").unlink()
+  (source / "new.js").write_text("1")
+  writes = []
+  for name in ("upload_file", "put_object", "delete_objects", "delete_object"):
+    writes += spy(monkeypatch, client, name)
+
+  result = s3sync.deploy(str(source), BUCKET, prefix="static", client=client, delete=True, dry_run=True)
+
+  assert result.uploaded == ["new.js"]
+  assert result.deleted == ["index.html"]
+  assert writes == []
+  assert "static/new.js" not in keys(client)
+
+
+def test_manifest_is_not_stored_under_served_prefix(client, source):
+  s3sync.deploy(str(source), BUCKET, prefix="static", client=client)
+  assert not any(key.startswith("static/.") for key in keys(client))
+
+  s3sync.deploy(str(source), BUCKET, prefix="static", client=client, manifest_key="private/deploy.json")
+  assert json.loads(client.get_object(Bucket=BUCKET, Key="private/deploy.json")["Body"].read())["version"] == 1
+
+
+def test_access_denied_manifest_propagates(client, source, monkeypatch):
+  # s3:ListBucket がない場合、存在しないキーの取得はAccessDeniedになるが、マニフェストなしとは扱わない
+  def denied(**kwargs):
+    raise ClientError({"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "GetObject")
+  monkeypatch.setattr(client, "get_object", denied)
+  uploads = spy(monkeypatch, client, "upload_file")
+
+  with pytest.raises(ClientError, match="AccessDenied"):
+    s3sync.deploy(str(source), BUCKET, prefix="static", client=client, delete=True)
+  assert uploads == []
+
+
+def test_other_manifest_errors_propagate(client, monkeypatch):
+  def failing(**kwargs):
+    raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "GetObject")
+  monkeypatch.setattr(client, "get_object", failing)
+
+  with pytest.raises(ClientError):
+    s3sync.read_deploy_manifest(client, BUCKET, "static")
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from wambda.schema import Integer, List, Number, Schema, SchemaError, String
+
+
+def test_mutable_defaults_are_not_shared():
+  schema = Schema({
+    "tags": List(String(), required=False, default=[]),
+    "options": List(required=False, default=[{"color": "red"}]),
+    "note": String(required=False, default=""),
+    "created": List(required=False, default=list),
+  })
+
+  first = schema.validate({})
+  first["tags"].append("x")
+  first["options"][0]["color"] = "blue"
+  first["created"].append(1)
+  second = schema.validate({})
+
+  assert second == {"tags": [], "options": [{"color": "red"}], "note": "", "created": []}
+  assert second["tags"] is not first["tags"]
+
+
+@pytest.mark.parametrize("text", ["NaN", "Infinity", "-Infinity"])
+def test_number_rejects_non_finite_values(text):
+  schema = Schema({"price": Number(minimum=0)})
+
+  with pytest.raises(SchemaError) as error:
+    schema.validate(json.loads('{"price": %s}' % text))
+  assert error.value.errors == [{"path": "price", "message": "有限の数値である必要があります"}]
+
+
+def test_number_accepts_large_integers_and_rejects_bools():
+  schema = Schema({"n": Number(), "i": Integer()})
+
+  assert schema.validate({"n": 10 ** 400, "i": 3}) == {"n": 10 ** 400, "i": 3}
+  assert [error["path"] for error in schema.errors({"n": True, "i": 1.5})] == ["n", "i"]
@@ -0,0 +1,125 @@
+import types
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from wambda import authenticate, dynamodb, sessions, signing
+
+REGION = "us-east-1"
+TABLE = "sessions"
+
+
+class FakeMaster:
+  def __init__(self, session_id=None, new_session=False, refresh_token_rotated=False):
+    self.settings = types.SimpleNamespace(REGION=REGION, SESSION_MODE="dynamodb", SESSION_TABLE=TABLE)
+    self.request = types.SimpleNamespace(
+      username="alice", session_id=session_id, new_session=new_session, refresh_token_rotated=refresh_token_rotated,
+      id_token="id", access_token="access", refresh_token="refresh",
+    )
+    self.local = True
+    self.logger = types.SimpleNamespace(info=lambda *args: None, error=lambda *args: None)
+
+
+@pytest.fixture
+def table():
+  with mock_aws():
+    resource = boto3.resource("dynamodb", region_name=REGION)
+    resource.create_table(
+      TableName=TABLE,
+      KeySchema=[{"AttributeName": "session_id", "KeyType": "HASH"}],
+      AttributeDefinitions=[{"AttributeName": "session_id", "AttributeType": "S"}],
+      BillingMode="PAY_PER_REQUEST",
+    )
+    dynamodb._local.__dict__.clear()
+    sessions._cache = None
+    signing._secret_key_cache = b"k" * 32
+    yield resource.Table(TABLE)
+    signing._secret_key_cache = None
+    dynamodb._local.__dict__.clear()
+    sessions._cache = None
+
+
+def test_update_tokens_updates_existing_session(table):
+  master = FakeMaster()
+  session_id = sessions.create(master, "id1", "access1", "refresh")
+
+  assert sessions.update_tokens(master, session_id, "id2", "access2") is True
+  item = table.get_item(Key={"session_id": session_id})["Item"]
+  assert (item["id_token"], item["access_token"], item["refresh_token"]) == ("id2", "access2", "refresh")
+  assert sessions.load(master, session_id)["id_token"] == "id2"
+
+
+def test_update_tokens_does_not_recreate_deleted_session(table):
+  master = FakeMaster()
+  session_id = sessions.create(master, "id1", "access1", "refresh")
+  # 別のコンテナでサインアウトされた（このコンテナのキャッシュには残っている）
+  table.delete_item(Key={"session_id": session_id})
+
+  assert sessions.update_tokens(master, session_id, "id2", "access2") is False
+  assert "Item" not in table.get_item(Key={"session_id": session_id})
+  assert sessions.load(master, session_id) is None
+
+
+def test_load_rejects_partial_item(table):
+  master = FakeMaster()
+  table.put_item(Item={"session_id": "partial", "id_token": "id", "access_token": "access"})
+
+  assert sessions.load(master, "partial") is None
+
+
+def test_update_tokens_writes_rotated_refresh_token(table):
+  master = FakeMaster()
+  session_id = sessions.create(master, "id1", "access1", "refresh1")
+
+  assert sessions.update_tokens(master, session_id, "id2", "access2", refresh_token="refresh2") is True
+  assert table.get_item(Key={"session_id": session_id})["Item"]["refresh_token"] == "refresh2"
+
+
+def test_login_rotates_session_and_deletes_old_one(table):
+  old_id = sessions.create(FakeMaster(), "old-id", "old-access", "old-refresh")
+  master = FakeMaster(session_id=old_id, new_session=True)
+  master.request.username = "bob"
+  master.request.refresh_token = "bob-refresh"
+
+  cookies = authenticate._generate_session_cookies(master)
+
+  new_id = master.request.session_id
+  assert new_id != old_id
+  assert "Item" not in table.get_item(Key={"session_id": old_id})
+  item = table.get_item(Key={"session_id": new_id})["Item"]
+  assert (item["username"], item["refresh_token"]) == ("bob", "bob-refresh")
+  assert sessions.get_session_id_from_cookie(master, cookies[0].split(";")[0]) == new_id
+
+
+def test_refresh_updates_session_in_place(table):
+  session_id = sessions.create(FakeMaster(), "id1", "access1", "refresh1")
+  master = FakeMaster(session_id=session_id, refresh_token_rotated=True)
+  master.request.refresh_token = "refresh2"
+
+  authenticate._generate_session_cookies(master)
+
+  assert master.request.session_id == session_id
+  item = table.get_item(Key={"session_id": session_id})["Item"]
+  assert (item["id_token"], item["refresh_token"]) == ("id", "refresh2")
+
+
+def test_session_and_auth_cookies_use_separate_keys(table):
+  master = FakeMaster()
+  master.settings.AUTH_SIGNED_COOKIE_MAX_AGE = 300
+  master.request.decode_token = {"cognito:username": "alice", "sub": "1"}
+  auth_value = authenticate._generate_signed_cookie(master).split(";")[0].partition("=")[2]
+  session_value = sessions.generate_cookie(master, "sid").split(";")[0].partition("=")[2]
+
+  assert sessions.get_session_id_from_cookie(master, f"session_id={session_value}") == "sid"
+  # 認証Cookieの値はセッションIDとして受け付けない
+  assert sessions.get_session_id_from_cookie(master, f"session_id={auth_value}") is False
+
+  # セッションの鍵で署名した認証Cookieの内容は受け付けない
+  payload = signing.loads(auth_value, authenticate._signed_cookie_key(master))
+  forged = signing.dumps(payload, sessions._cookie_key(master))
+  master.event = {"headers": {"Cookie": f"wambda_auth={forged}"}}
+  assert authenticate._set_auth_by_signed_cookie(master, "id", "refresh", "access") is False
+  master.event = {"headers": {"Cookie": f"wambda_auth={auth_value}"}}
+  master.request.set_token = lambda **kwargs: None
+  assert authenticate._set_auth_by_signed_cookie(master, "id", "refresh", "access") is True
@@ -0,0 +1,25 @@
+import os
+
+from wambda import staticfiles
+
+
+def collect(tmp_path):
+  return staticfiles.collect(str(tmp_path / "static"), str(tmp_path / "out"), encodings=("gzip",))
+
+
+def test_collect_reprocesses_missing_compressed_variants(tmp_path):
+  (tmp_path / "static").mkdir()
+  (tmp_path / "static" / "app.css").write_text("body { color: red; }\n" * 50)
+  (tmp_path / "static" / "logo.png").write_bytes(b"\x89PNG" * 100)
+
+  first = collect(tmp_path)
+  hashed = first.manifest["paths"]["app.css"]
+  assert first.manifest["files"]["app.css"]["encodings"] == ["gzip"]
+  assert sorted(collect(tmp_path).unchanged) == ["app.css", "logo.png"]
+
+  os.remove(tmp_path / "out" / (hashed + ".gz"))
+  result = collect(tmp_path)
+
+  assert result.processed == ["app.css"]
+  assert result.unchanged == ["logo.png"]
+  assert (tmp_path / "out" / (hashed + ".gz")).exists()
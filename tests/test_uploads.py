@@ -0,0 +1,256 @@
+import base64
+import json
+import time
+import types
+
+import boto3
+import pytest
+import requests
+from moto import mock_aws
+from wtforms import Form
+
+from wambda import signing, uploads
+from wambda.upload_fields import S3UploadField
+from wambda.handler import MultiDict, Request
+
+REGION = "us-east-1"
+BUCKET = "upload-bucket"
+SECRET = b"s" * 32
+
+
+class FakeMaster:
+  def __init__(self, method="POST", body=None, content_type="application/json", **settings):
+    self.settings = types.SimpleNamespace(REGION=REGION, UPLOAD_BUCKET=BUCKET, **settings)
+    event = {
+      "requestContext": {"httpMethod": method},
+      "path": "/uploads/complete",
+      "headers": {"Content-Type": content_type},
+      "body": body,
+    }
+    self.request = Request(event, None)
+    self.logger = types.SimpleNamespace(info=lambda *args: None)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+  monkeypatch.setattr(signing, "_secret_key_cache", SECRET)
+  with mock_aws():
+    uploads._clients.clear()
+    client = boto3.client("s3", region_name=REGION)
+    client.create_bucket(Bucket=BUCKET)
+    yield client
+    uploads._clients.clear()
+
+
+def keys(client):
+  return [item["Key"] for item in client.list_objects_v2(Bucket=BUCKET).get("Contents", [])]
+
+
+def policy_conditions(post):
+  return json.loads(base64.b64decode(post["fields"]["policy"]))["conditions"]
+
+
+def upload(client, key, body, content_type="image/png"):
+  client.put_object(Bucket=BUCKET, Key=key, Body=body, ContentType=content_type)
+
+
+def test_presigned_post_conditions(s3):
+  post = uploads.presigned_post(s3, BUCKET, "uploads/a.png", max_size=1000, content_type="image/png")
+  conditions = policy_conditions(post)
+  assert ["content-length-range", 1, 1000] in conditions
+  assert {"Content-Type": "image/png"} in conditions
+  assert post["fields"]["Content-Type"] == "image/png"
+  assert post["fields"]["key"] == "uploads/a.png"
+
+  prefix = uploads.presigned_post(s3, BUCKET, "uploads/b", content_type="image/", metadata={"user": "alice"})
+  conditions = policy_conditions(prefix)
+  assert ["starts-with", "$Content-Type", "image/"] in conditions
+  assert "Content-Type" not in prefix["fields"]
+  assert {"x-amz-meta-user": "alice"} in conditions
+  assert prefix["fields"]["x-amz-meta-user"] == "alice"
+
+
+def test_presigned_post_uploads_to_s3(s3):
+  post = uploads.presigned_post(s3, BUCKET, "uploads/a.png", content_type="image/png")
+
+  response = requests.post(post["url"], data=post["fields"], files={"file": ("a.png", b"png-data")})
+
+  # motoはsuccess_action_statusを文字列のまま返す
+  assert int(response.status_code) == 201
+  assert s3.get_object(Bucket=BUCKET, Key="uploads/a.png")["Body"].read() == b"png-data"
+
+
+def test_presigned_put(s3):
+  put = uploads.presigned_put(s3, BUCKET, "uploads/a.txt", content_type="text/plain", metadata={"user": "alice"})
+
+  assert put["method"] == "PUT"
+  assert put["headers"] == {"Content-Type": "text/plain", "x-amz-meta-user": "alice"}
+  response = requests.put(put["url"], data=b"hello", headers=put["headers"])
+  assert response.status_code == 200
+  head = s3.head_object(Bucket=BUCKET, Key="uploads/a.txt")
+  assert head["ContentType"] == "text/plain"
+  assert head["Metadata"] == {"user": "alice"}
+
+
+def test_create_and_complete_upload(s3):
+  master = FakeMaster()
+  created = uploads.create_upload(master, filename="photo.PNG", max_size=100)
+  assert created["key"].startswith("uploads/") and created["key"].endswith(".png")
+  upload(s3, created["key"], b"x" * 10)
+
+  uploaded = uploads.complete_upload(master, created["ticket"])
+
+  assert uploaded.to_dict() == {
+    "bucket": BUCKET, "key": created["key"], "size": 10, "content_type": "image/png", "etag": uploaded.etag,
+  }
+
+
+def test_complete_upload_missing_object(s3):
+  master = FakeMaster()
+  created = uploads.create_upload(master, filename="photo.png")
+
+  with pytest.raises(uploads.UploadError, match="見つかりません"):
+    uploads.complete_upload(master, created["ticket"])
+
+
+@pytest.mark.parametrize("body, content_type, message", [
+  (b"x" * 101, "image/png", "上限"),
+  (b"x" * 10, "text/html", "許可されていない"),
+  (b"", "image/png", "空"),
+])
+def test_complete_upload_rejects_and_deletes_invalid_object(s3, body, content_type, message):
+  master = FakeMaster()
+  created = uploads.create_upload(master, filename="photo.png", max_size=100)
+  upload(s3, created["key"], body, content_type)
+
+  with pytest.raises(uploads.UploadError, match=message):
+    uploads.complete_upload(master, created["ticket"])
+  assert keys(s3) == []
+
+
+def test_complete_upload_can_keep_invalid_object(s3):
+  master = FakeMaster(UPLOAD_DELETE_INVALID=False)
+  created = uploads.create_upload(master, filename="photo.png")
+  upload(s3, created["key"], b"x", "text/html")
+
+  with pytest.raises(uploads.UploadError):
+    uploads.complete_upload(master, created["ticket"])
+  assert keys(s3) == [created["key"]]
+
+
+def test_complete_upload_applies_stricter_limits(s3):
+  master = FakeMaster()
+  created = uploads.create_upload(master, filename="photo.png", max_size=100)
+  upload(s3, created["key"], b"x" * 50)
+
+  with pytest.raises(uploads.UploadError, match="上限"):
+    uploads.complete_upload(master, created["ticket"], max_size=20)
+
+
+def test_complete_upload_rejects_bad_tickets(s3):
+  master = FakeMaster()
+  created = uploads.create_upload(master, filename="photo.png")
+  upload(s3, created["key"], b"x")
+  key = uploads._ticket_key(master)
+  payload = json.loads(signing.b64decode(created["ticket"].split(".")[0]))
+
+  tampered = signing.b64encode(json.dumps(dict(payload, k="uploads/other.png")).encode()) + "." + \
+    created["ticket"].split(".")[1]
+  expired = signing.dumps(dict(payload, exp=int(time.time()) - 1), key)
+  # 同じ署名鍵の認証Cookieなど、アップロード専用の鍵で署名されていない値
+  other_purpose = signing.dumps(payload, signing.get_secret_key(master))
+  for ticket in (tampered, expired, other_purpose, "garbage"):
+    with pytest.raises(uploads.UploadError, match="チケット"):
+      uploads.complete_upload(master, ticket)
+
+  for broken in ({"k": payload["k"]}, {"b": BUCKET}, {"b": BUCKET, "k": ["list"]}):
+    with pytest.raises(uploads.UploadError, match="チケットが不正"):
+      uploads.complete_upload(master, signing.dumps(broken, key))
+  assert keys(s3) == [created["key"]]
+
+
+def call_view(view, **kwargs):
+  response = view(FakeMaster(**kwargs))
+  return response["statusCode"], json.loads(response["body"])
+
+
+def test_completion_view_status_codes(s3):
+  created = uploads.create_upload(FakeMaster(), filename="photo.png")
+  view = uploads.completion_view()
+
+  assert call_view(view, method="GET")[0] == 405
+  assert call_view(view, body="{")[0] == 400
+  assert call_view(view, body="{}") == (400, {"error": "ticket がありません"})
+  assert call_view(view, body=json.dumps({"ticket": "garbage"}))[0] == 400
+  # 形式の正しくないmultipart/form-data
+  assert call_view(view, body="--x\r\nbroken", content_type="multipart/form-data; boundary=x")[0] == 400
+  assert call_view(view, body=json.dumps({"ticket": created["ticket"]}))[0] == 400
+
+  upload(s3, created["key"], b"x" * 3)
+  status, body = call_view(view, body=json.dumps({"ticket": created["ticket"]}))
+  assert status == 200
+  assert body["key"] == created["key"] and body["size"] == 3
+
+
+def test_completion_view_form_data_and_on_complete(s3):
+  created = uploads.create_upload(FakeMaster(), filename="photo.png")
+  upload(s3, created["key"], b"x")
+  view = uploads.completion_view(on_complete=lambda master, uploaded: {"saved": uploaded.key}, field_name="file")
+
+  from urllib.parse import urlencode
+  status, body = call_view(view, body=urlencode({"file": created["ticket"]}),
+                           content_type="application/x-www-form-urlencoded")
+
+  assert (status, body) == (200, {"saved": created["key"]})
+
+
+def test_completion_view_rejects_replayed_ticket(s3):
+  created = uploads.create_upload(FakeMaster(), filename="photo.png")
+  upload(s3, created["key"], b"x")
+  calls = []
+  view = uploads.completion_view(on_complete=lambda master, uploaded: calls.append(uploaded.key))
+  body = json.dumps({"ticket": created["ticket"]})
+
+  assert call_view(view, body=body)[0] == 200
+  status, error = call_view(view, body=body)
+
+  assert status == 409 and "既に完了" in error["error"]
+  assert calls == [created["key"]]
+  with pytest.raises(uploads.UploadAlreadyCompleted):
+    uploads.complete_upload(FakeMaster(), created["ticket"], consume=True)
+  # consumeしない確認（フォームの再検証など）は引き続き成功する
+  assert uploads.complete_upload(FakeMaster(), created["ticket"]).key == created["key"]
+
+
+def test_import_does_not_load_wtforms():
+  import os
+  import subprocess
+  import sys
+  lib = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib")
+  code = "import sys, wambda.uploads; print('wtforms' in sys.modules)"
+  result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                          env={**os.environ, "PYTHONPATH": lib})
+  assert result.stdout.strip() == "False"
+
+
+class AttachmentForm(Form):
+  attachment = S3UploadField("添付ファイル", content_types=["image/"])
+
+
+def test_s3_upload_field_pre_validate(s3):
+  master = FakeMaster()
+  created = uploads.create_upload(master, filename="photo.png")
+  upload(s3, created["key"], b"x")
+
+  form = AttachmentForm(MultiDict({"attachment": [created["ticket"]]}), meta={"master": master})
+  assert form.validate()
+  assert form.attachment.data.key == created["key"]
+  assert 'type="hidden"' in form.attachment()
+
+  invalid = AttachmentForm(MultiDict({"attachment": ["garbage"]}), meta={"master": master})
+  assert not invalid.validate()
+  assert invalid.attachment.data is None
+  assert "チケット" in invalid.attachment.errors[0]
+
+  with pytest.raises(ValueError, match="meta"):
+    AttachmentForm(MultiDict({"attachment": [created["ticket"]]})).validate()